@@ -0,0 +1,101 @@
+"""Add composite indexes for per-user range queries
+
+Revision ID: 3c9a5e1f7b20
+Revises: eeee1206724f
+Create Date: 2026-10-17 10:00:00.000000
+
+Índices alineados con los accesos reales (antes sólo existían ix_*_id):
+
+- ix_events_user_id_start_time (user_id, start_time)
+    timeline_service.get_timeline:
+    WHERE user_id = ? AND start_time >= ? AND start_time <= ?
+    Plan: SEARCH events USING INDEX ix_events_user_id_start_time
+          (user_id=? AND start_time>? AND start_time<?)
+    Antes: SCAN events (todas las filas de todos los usuarios).
+
+- ix_tasks_user_id_planned_start (user_id, planned_start)
+    timeline_service.get_timeline (tareas agendadas):
+    WHERE user_id = ? AND planned_start >= ? AND planned_start <= ?
+    Plan: SEARCH tasks USING INDEX ix_tasks_user_id_planned_start
+          (user_id=? AND planned_start>? AND planned_start<?)
+
+- ix_tasks_user_id_status_deadline (user_id, status, deadline)
+    recommendation_service.get_task_suggestions:
+    WHERE user_id = ? AND status = 'pending' AND (deadline <= ? OR energy_required ...)
+    Plan: SEARCH tasks USING INDEX ix_tasks_user_id_status_deadline (user_id=? AND status=?)
+    El OR con energy_required impide usar deadline como rango, pero el prefijo
+    (user_id, status) ya limita la búsqueda a las tareas pendientes del usuario.
+
+- ix_focus_sessions_user_id_status (user_id, status)
+    routers/focus.py: /focus/start (status = 'active') y /focus/current (status != 'completed')
+    Plan: SEARCH focus_sessions USING INDEX ix_focus_sessions_user_id_status (user_id=? AND status=?)
+    (con status != sólo se usa el prefijo user_id).
+
+- ix_push_subscriptions_endpoint UNIQUE (endpoint)
+    crud.create_subscription: WHERE endpoint = ?
+    Además garantiza un único registro por dispositivo. Los duplicados existentes
+    se eliminan antes (se conserva el más reciente).
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9a5e1f7b20"
+down_revision: Union[str, Sequence[str], None] = "eeee1206724f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_events_user_id_start_time",
+        "events",
+        ["user_id", "start_time"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tasks_user_id_planned_start",
+        "tasks",
+        ["user_id", "planned_start"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_tasks_user_id_status_deadline",
+        "tasks",
+        ["user_id", "status", "deadline"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_focus_sessions_user_id_status",
+        "focus_sessions",
+        ["user_id", "status"],
+        unique=False,
+    )
+
+    op.execute(
+        sa.text(
+            "DELETE FROM push_subscriptions WHERE id NOT IN "
+            "(SELECT MAX(id) FROM push_subscriptions GROUP BY endpoint)"
+        )
+    )
+    op.create_index(
+        op.f("ix_push_subscriptions_endpoint"),
+        "push_subscriptions",
+        ["endpoint"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_push_subscriptions_endpoint"), table_name="push_subscriptions"
+    )
+    op.drop_index("ix_focus_sessions_user_id_status", table_name="focus_sessions")
+    op.drop_index("ix_tasks_user_id_status_deadline", table_name="tasks")
+    op.drop_index("ix_tasks_user_id_planned_start", table_name="tasks")
+    op.drop_index("ix_events_user_id_start_time", table_name="events")
@@ -0,0 +1,82 @@
+"""Add focus_interruptions
+
+Revision ID: 4e7b2a9d0c13
+Revises: d5a81c3e9f62
+Create Date: 2026-10-17 12:00:00.000000
+
+Registro append-only de interrupciones con su momento. Las sesiones antiguas
+conservan su contador y interruption_notes: no hay marcas de tiempo que migrar.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e7b2a9d0c13"
+down_revision: Union[str, Sequence[str], None] = "d5a81c3e9f62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "focus_interruptions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("session_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("note", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["session_id"],
+            ["focus_sessions.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["task_id"],
+            ["tasks.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_focus_interruptions_id"), "focus_interruptions", ["id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_focus_interruptions_session_id"),
+        "focus_interruptions",
+        ["session_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_focus_interruptions_user_id_occurred_at",
+        "focus_interruptions",
+        ["user_id", "occurred_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_focus_interruptions_user_id_task_id",
+        "focus_interruptions",
+        ["user_id", "task_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_focus_interruptions_user_id_task_id", table_name="focus_interruptions"
+    )
+    op.drop_index(
+        "ix_focus_interruptions_user_id_occurred_at", table_name="focus_interruptions"
+    )
+    op.drop_index(
+        op.f("ix_focus_interruptions_session_id"), table_name="focus_interruptions"
+    )
+    op.drop_index(op.f("ix_focus_interruptions_id"), table_name="focus_interruptions")
+    op.drop_table("focus_interruptions")
@@ -0,0 +1,46 @@
+"""Add keyset pagination indexes
+
+Revision ID: 8f41d2b6c0a3
+Revises: 3c9a5e1f7b20
+Create Date: 2026-10-17 11:00:00.000000
+
+Los listados paginados por cursor (?after=) ordenan por (clave, id):
+
+- tasks:      WHERE user_id = ? AND id > ?                  ORDER BY id
+              -> ix_tasks_user_id_id (user_id, id)
+- categories: WHERE user_id = ? AND (name, id) > (?, ?)     ORDER BY name, id
+              -> ix_categories_user_id_name_id (user_id, name, id)
+- events:     WHERE user_id = ? AND (start_time, id) > (?, ?) ORDER BY start_time, id
+              -> reutiliza ix_events_user_id_start_time (revisión 3c9a5e1f7b20)
+
+Con estos índices cada página cuesta O(limit) aunque el usuario tenga decenas
+de miles de filas; OFFSET sigue disponible pero recorre las filas saltadas.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8f41d2b6c0a3"
+down_revision: Union[str, Sequence[str], None] = "3c9a5e1f7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_tasks_user_id_id", "tasks", ["user_id", "id"], unique=False)
+    op.create_index(
+        "ix_categories_user_id_name_id",
+        "categories",
+        ["user_id", "name", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_categories_user_id_name_id", table_name="categories")
+    op.drop_index("ix_tasks_user_id_id", table_name="tasks")
@@ -0,0 +1,40 @@
+"""Track focus pauses
+
+Revision ID: a93f6d1e2b47
+Revises: 4e7b2a9d0c13
+Create Date: 2026-10-17 12:00:00.000000
+
+paused_seconds acumula las pausas cerradas y paused_at marca la pausa en curso,
+para que duration_minutes no cuente el tiempo en pausa.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a93f6d1e2b47"
+down_revision: Union[str, Sequence[str], None] = "4e7b2a9d0c13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("focus_sessions") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "paused_seconds", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+        batch_op.add_column(
+            sa.Column("paused_at", sa.DateTime(timezone=True), nullable=True)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("focus_sessions") as batch_op:
+        batch_op.drop_column("paused_at")
+        batch_op.drop_column("paused_seconds")
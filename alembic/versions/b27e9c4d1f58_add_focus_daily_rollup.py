@@ -0,0 +1,67 @@
+"""Add focus_daily_rollup
+
+Revision ID: b27e9c4d1f58
+Revises: 8f41d2b6c0a3
+Create Date: 2026-10-17 12:00:00.000000
+
+Totales de focus por (usuario, día) mantenidos al parar sesiones y registrar
+interrupciones. Se rellena a partir de las sesiones existentes.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b27e9c4d1f58"
+down_revision: Union[str, Sequence[str], None] = "8f41d2b6c0a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "focus_daily_rollup",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("sessions", sa.Integer(), nullable=False),
+        sa.Column("minutes", sa.Integer(), nullable=False),
+        sa.Column("interruptions", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Integer(), nullable=False),
+        sa.Column("score_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+
+    # Backfill con la misma lógica que focus_service.rebuild_focus_rollup
+    if op.get_bind().dialect.name == "sqlite":
+        day = "date(start_time)"
+    else:
+        # Día UTC, como las actualizaciones incrementales (TimeZone de la sesión aparte)
+        day = "CAST(timezone('UTC', start_time) AS DATE)"
+    op.execute(
+        sa.text(
+            "INSERT INTO focus_daily_rollup "
+            "(user_id, day, sessions, minutes, interruptions, score_sum, score_count) "
+            f"SELECT user_id, {day}, "
+            "SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), "
+            "SUM(CASE WHEN status = 'completed' "
+            "THEN COALESCE(duration_minutes, 0) ELSE 0 END), "
+            "COALESCE(SUM(interruptions), 0), "
+            "SUM(CASE WHEN status = 'completed' "
+            "THEN COALESCE(feedback_score, 0) ELSE 0 END), "
+            "SUM(CASE WHEN status = 'completed' AND feedback_score IS NOT NULL "
+            "THEN 1 ELSE 0 END) "
+            f"FROM focus_sessions WHERE user_id IS NOT NULL GROUP BY user_id, {day}"
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("focus_daily_rollup")
@@ -0,0 +1,105 @@
+"""Add timeline_day_index
+
+Revision ID: c1f4e8b7a605
+Revises: a93f6d1e2b47
+Create Date: 2026-10-17 12:00:00.000000
+
+Días adicionales (posteriores al de inicio) que ocupa cada evento o tarea
+agendada, para encontrar por índice lo que solapa una ventana del timeline.
+Se rellena a partir de los eventos y tareas existentes.
+"""
+from datetime import timedelta, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c1f4e8b7a605"
+down_revision: Union[str, Sequence[str], None] = "a93f6d1e2b47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Misma regla que timeline_index.py (copiada: las migraciones no importan la app)
+TASK_DEFAULT_DURATION = timedelta(minutes=30)
+
+
+def _utc_date(value):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _spanned_days(start, end):
+    if start is None or end is None or end <= start:
+        return []
+    first = _utc_date(start) + timedelta(days=1)
+    last = _utc_date(end - timedelta(microseconds=1))
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    day_index = op.create_table(
+        "timeline_day_index",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("item_type", sa.String(), nullable=False),
+        sa.Column("item_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("user_id", "day", "item_type", "item_id"),
+    )
+    op.create_index(
+        "ix_timeline_day_index_item",
+        "timeline_day_index",
+        ["item_type", "item_id"],
+        unique=False,
+    )
+
+    bind = op.get_bind()
+    events = sa.table(
+        "events",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("start_time", sa.DateTime(timezone=True)),
+        sa.column("end_time", sa.DateTime(timezone=True)),
+    )
+    tasks = sa.table(
+        "tasks",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("planned_start", sa.DateTime(timezone=True)),
+        sa.column("planned_end", sa.DateTime(timezone=True)),
+    )
+
+    rows = []
+    for item_id, user_id, start, end in bind.execute(
+        sa.select(events.c.id, events.c.user_id, events.c.start_time, events.c.end_time)
+    ):
+        rows.extend(
+            {"user_id": user_id, "day": day, "item_type": "event", "item_id": item_id}
+            for day in _spanned_days(start, end)
+        )
+    for item_id, user_id, start, end in bind.execute(
+        sa.select(
+            tasks.c.id, tasks.c.user_id, tasks.c.planned_start, tasks.c.planned_end
+        ).where(tasks.c.planned_start.is_not(None))
+    ):
+        end = end or start + TASK_DEFAULT_DURATION
+        rows.extend(
+            {"user_id": user_id, "day": day, "item_type": "task", "item_id": item_id}
+            for day in _spanned_days(start, end)
+        )
+    rows = [row for row in rows if row["user_id"] is not None]
+    if rows:
+        op.bulk_insert(day_index, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_timeline_day_index_item", table_name="timeline_day_index")
+    op.drop_table("timeline_day_index")
@@ -0,0 +1,49 @@
+"""Unique open focus session per user
+
+Revision ID: d5a81c3e9f62
+Revises: b27e9c4d1f58
+Create Date: 2026-10-17 12:00:00.000000
+
+Índice único parcial sobre focus_sessions(user_id) para las sesiones activas o
+pausadas. Antes de crearlo se cierran las sesiones abiertas duplicadas (se
+conserva la más reciente de cada usuario).
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a81c3e9f62"
+down_revision: Union[str, Sequence[str], None] = "b27e9c4d1f58"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_SESSIONS = "status IN ('active', 'paused')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        sa.text(
+            "UPDATE focus_sessions "
+            "SET status = 'completed', end_time = COALESCE(end_time, start_time) "
+            f"WHERE {OPEN_SESSIONS} AND id NOT IN ("
+            f"SELECT MAX(id) FROM focus_sessions WHERE {OPEN_SESSIONS} "
+            "GROUP BY user_id)"
+        )
+    )
+    op.create_index(
+        "ux_focus_sessions_user_id_open",
+        "focus_sessions",
+        ["user_id"],
+        unique=True,
+        sqlite_where=sa.text(OPEN_SESSIONS),
+        postgresql_where=sa.text(OPEN_SESSIONS),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ux_focus_sessions_user_id_open", table_name="focus_sessions")
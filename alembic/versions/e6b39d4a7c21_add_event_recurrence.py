@@ -0,0 +1,77 @@
+"""Add event recurrence
+
+Revision ID: e6b39d4a7c21
+Revises: c1f4e8b7a605
+Create Date: 2026-10-17 12:00:00.000000
+
+RRULE en events (recurrence_rule, recurrence_until) y tabla event_exceptions
+para cancelar o modificar ocurrencias concretas.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e6b39d4a7c21"
+down_revision: Union[str, Sequence[str], None] = "c1f4e8b7a605"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SERIES = "recurrence_rule IS NOT NULL"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.add_column(sa.Column("recurrence_rule", sa.String(), nullable=True))
+        batch_op.add_column(
+            sa.Column("recurrence_until", sa.DateTime(timezone=True), nullable=True)
+        )
+    op.create_index(
+        "ix_events_user_id_series",
+        "events",
+        ["user_id", "recurrence_until"],
+        unique=False,
+        sqlite_where=sa.text(SERIES),
+        postgresql_where=sa.text(SERIES),
+    )
+
+    op.create_table(
+        "event_exceptions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("original_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("is_cancelled", sa.Boolean(), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["event_id"],
+            ["events.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_event_exceptions_id"), "event_exceptions", ["id"], unique=False
+    )
+    op.create_index(
+        "ux_event_exceptions_event_id_original_start",
+        "event_exceptions",
+        ["event_id", "original_start"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ux_event_exceptions_event_id_original_start", table_name="event_exceptions"
+    )
+    op.drop_index(op.f("ix_event_exceptions_id"), table_name="event_exceptions")
+    op.drop_table("event_exceptions")
+    op.drop_index("ix_events_user_id_series", table_name="events")
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.drop_column("recurrence_until")
+        batch_op.drop_column("recurrence_rule")
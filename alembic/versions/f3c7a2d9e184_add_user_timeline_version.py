@@ -0,0 +1,36 @@
+"""Add user timeline version
+
+Revision ID: f3c7a2d9e184
+Revises: e6b39d4a7c21
+Create Date: 2026-10-17 12:00:00.000000
+
+users.timeline_version versiona las cachés del timeline: crud la incrementa en la
+misma transacción que la escritura y todos los workers la leen de la BD.
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c7a2d9e184"
+down_revision: Union[str, Sequence[str], None] = "e6b39d4a7c21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "timeline_version", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("timeline_version")
@@ -1,4 +1,10 @@
-from main import app
+import os
+
+# En Vercel cada invocación es efímera: sin pool de conexiones persistente.
+# Debe fijarse antes de importar main (database.py crea el engine al importarse).
+os.environ.setdefault("DB_ENGINE_PROFILE", "serverless")
+
+from main import app  # noqa: E402
 
 # This file is used by Vercel to look for the ASGI application
 # No other code is needed here if 'main.py' contains 'app = FastAPI(...)'
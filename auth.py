@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -71,6 +74,46 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+# --- POOL DE HASHING ---
+# bcrypt tarda ~250 ms por llamada. En lugar de ocupar hilos del threadpool de AnyIO
+# (compartido con /timeline, /tasks, ...) usamos un pool propio y acotado.
+# bcrypt libera el GIL, así que un pool de hilos es suficiente.
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", 2))
+# Peticiones que pueden esperar en cola además de las que se están ejecutando
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", 16))
+HASH_BUSY_RETRY_AFTER = int(os.getenv("HASH_BUSY_RETRY_AFTER", 2))
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=HASH_POOL_SIZE, thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(HASH_POOL_SIZE + HASH_QUEUE_LIMIT)
+
+
+class HashingPoolBusy(Exception):
+    """El pool de hashing está saturado; main.py lo traduce a un 503."""
+
+
+async def _run_in_hash_pool(func, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingPoolBusy()
+    try:
+        future = _hash_executor.submit(func, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # El hueco se libera cuando termina el trabajo, aunque el cliente se haya ido
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
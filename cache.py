@@ -0,0 +1,191 @@
+"""
+Cachés en memoria del proceso (TTL + LRU acotado).
+
+Cada worker de uvicorn tiene su propia copia, así que los TTL deben ser cortos:
+sirven para absorber el polling de los clientes, no como fuente de verdad. Las
+cachés del timeline se versionan con users.timeline_version, común a todos.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+
+import models
+
+_MISSING = object()
+
+# Registro de todas las cachés creadas, para poder vaciarlas de golpe (tests, admin)
+_registry = []
+
+
+class TTLCache:
+    """Caché LRU con expiración por entrada y contadores de aciertos/fallos."""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def clear_all():
+    for c in _registry:
+        c.clear()
+
+
+def all_stats():
+    return {c.name: c.stats() for c in _registry}
+
+
+# --- Cachés de autenticación ---
+# token -> (user_id). El TTL real se recorta a la expiración del JWT.
+# user_id -> dict con las columnas de models.User (nunca instancias ORM).
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 2048))
+
+token_cache = TTLCache(
+    "auth_tokens", maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS
+)
+user_cache = TTLCache(
+    "auth_users", maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_user(user_id: int):
+    """Se llama desde crud cuando cambian los datos del usuario."""
+    user_cache.invalidate(user_id)
+
+
+# --- Sesión de focus activa ---
+# user_id -> id de la sesión abierta (activa o pausada), o 0 si no tiene.
+# /focus/start, stop, pause y resume la mantienen; el TTL corto acota la
+# incoherencia entre workers (una sesión iniciada en otro proceso).
+FOCUS_CACHE_TTL_SECONDS = float(os.getenv("FOCUS_CACHE_TTL_SECONDS", 15))
+
+active_focus_cache = TTLCache(
+    "focus_active_sessions",
+    maxsize=USER_CACHE_MAX_SIZE,
+    ttl=FOCUS_CACHE_TTL_SECONDS,
+)
+
+
+# --- Timeline ---
+# user_id -> (versión, calculado_en, válido_hasta, vista) de /timeline/now. La vista
+# sólo cambia cuando termina o empieza uno de sus elementos (o cambia el día), así
+# que se guarda hasta ese momento, con NOW_VIEW_MAX_TTL_SECONDS como tope; una
+# escritura en cualquier worker cambia la versión y la descarta.
+NOW_VIEW_MAX_TTL_SECONDS = float(os.getenv("NOW_VIEW_MAX_TTL_SECONDS", 60))
+
+now_view_cache = TTLCache(
+    "timeline_now", maxsize=USER_CACHE_MAX_SIZE, ttl=NOW_VIEW_MAX_TTL_SECONDS
+)
+
+
+# (user_id, ventana, skip, limit, cursor, estrategia, versión) -> página del timeline.
+# La versión del usuario forma parte de la clave: al escribir se incrementa y las
+# páginas anteriores dejan de encontrarse (el LRU acaba expulsándolas).
+TIMELINE_CACHE_TTL_SECONDS = float(os.getenv("TIMELINE_CACHE_TTL_SECONDS", 60))
+TIMELINE_CACHE_MAX_SIZE = int(os.getenv("TIMELINE_CACHE_MAX_SIZE", 4096))
+
+timeline_cache = TTLCache(
+    "timeline_windows",
+    maxsize=TIMELINE_CACHE_MAX_SIZE,
+    ttl=TIMELINE_CACHE_TTL_SECONDS,
+)
+
+# (event_id, ventana, versión) -> ocurrencias expandidas de una serie recurrente
+occurrence_cache = TTLCache(
+    "event_occurrences",
+    maxsize=TIMELINE_CACHE_MAX_SIZE,
+    ttl=TIMELINE_CACHE_TTL_SECONDS,
+)
+
+# Versión de los datos de timeline de cada usuario: vive en users.timeline_version
+# para que todos los workers la compartan. crud la incrementa en la misma transacción
+# que la escritura, así que en cuanto se confirma ningún proceso vuelve a servir
+# las entradas guardadas con la versión anterior. Leerla es un SELECT por clave
+# primaria, mucho más barato que recalcular la página.
+
+
+def timeline_version(db, user_id: int) -> int:
+    return (
+        db.scalar(select(models.User.timeline_version).where(models.User.id == user_id))
+        or 0
+    )
+
+
+def invalidate_timeline(db, user_id: int):
+    """
+    crud lo llama al escribir eventos, tareas, categorías o el país del usuario,
+    antes del commit: el incremento se confirma (o se deshace) junto con la escritura.
+    """
+    users = models.User.__table__
+    db.execute(
+        update(users)
+        .where(users.c.id == user_id)
+        .values(timeline_version=users.c.timeline_version + 1)
+    )
+    now_view_cache.invalidate(user_id)
@@ -1,25 +1,49 @@
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, case, func, literal, or_, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 # from passlib.context import CryptContext # Ya no se necesita aquí
+import cache
 import models
 import schemas
+import timeline_index  # noqa: F401  (registra los listeners de timeline_day_index)
 from auth import get_password_hash
+from services import recurrence_service
 
 # --- FUNCIONES DE SEGURIDAD ---
 # (Las funciones de seguridad están centralizadas en auth.py)
 
 
 # --- CATEGORÍAS (Categories) ---
-def get_categories(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return (
+# Paginación: orden estable (clave, id). Con `after` (clave, id del último elemento
+# de la página anterior) se continúa por índice; si no, se usa skip/limit.
+def _keyset_after(columns, values):
+    """(col1, col2) > (v1, v2), con los valores tipados como sus columnas."""
+    return tuple_(*columns) > tuple_(
+        *(literal(value, column.type) for column, value in zip(columns, values))
+    )
+
+
+def category_sort_key(category: models.Category):
+    return (category.name, category.id)
+
+
+def get_categories(
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, after: tuple = None
+):
+    query = (
         db.query(models.Category)
         .filter(models.Category.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .order_by(models.Category.name, models.Category.id)
     )
+    if after is not None:
+        query = query.filter(
+            _keyset_after([models.Category.name, models.Category.id], after)
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 
 def create_category(db: Session, category: schemas.CategoryCreate, user_id: int):
@@ -44,6 +68,8 @@ def update_category(
         setattr(db_category, key, value)
 
     db.add(db_category)
+    # El color de la categoría aparece en el timeline
+    cache.invalidate_timeline(db, db_category.user_id)
     db.commit()
     db.refresh(db_category)
     return db_category
@@ -55,6 +81,7 @@ def delete_category(db: Session, category_id: int):
         return None
 
     db.delete(db_category)
+    cache.invalidate_timeline(db, db_category.user_id)
     db.commit()
     return db_category
 
@@ -73,9 +100,20 @@ def get_user_by_id(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
-    # 1. Encriptamos la contraseña
-    hashed_password = get_password_hash(user.password)
+def get_user_with_children(db: Session, user_id: int):
+    """Usuario con tareas y eventos (relaciones raise_on_sql: carga explícita)."""
+    return (
+        db.query(models.User)
+        .options(selectinload(models.User.tasks), selectinload(models.User.events))
+        .filter(models.User.id == user_id)
+        .first()
+    )
+
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    # 1. Encriptamos la contraseña (salvo que ya venga calculada desde el pool de hashing)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     # 2. Preparamos el modelo de base de datos
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     # 3. Lo agregamos a la sesión
@@ -98,26 +136,97 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
         setattr(db_user, key, value)
 
     db.add(db_user)
+    if "country" in update_data:
+        cache.invalidate_timeline(db, user_id)  # Cambian los festivos
     db.commit()
     db.refresh(db_user)
+    # La caché de get_current_user guarda columnas del usuario (p.ej. country)
+    cache.invalidate_user(user_id)
     return db_user
 
 
 # --- TAREAS (Tasks) ---
-def get_tasks(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return (
+def task_sort_key(task: models.Task):
+    return (task.id,)
+
+
+def get_tasks(
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, after: tuple = None
+):
+    query = (
         db.query(models.Task)
         .filter(models.Task.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
+        .order_by(models.Task.id)
+    )
+    if after is not None:
+        query = query.filter(models.Task.id > after[0])
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def get_task_stats(db: Session, user_id: int, now: datetime = None):
+    """
+    Estadísticas de tareas en una sola consulta agregada (GROUP BY), sin cargar
+    objetos ORM. Los grupos (estado x completada x energía) son como mucho unas
+    decenas de filas, que se combinan en Python.
+    """
+    now = now or datetime.now(timezone.utc)
+    Task = models.Task
+    finished = [models.TaskStatus.completed, models.TaskStatus.ignored]
+    is_open = and_(
+        or_(Task.is_completed.is_(False), Task.is_completed.is_(None)),
+        or_(Task.status.notin_(finished), Task.status.is_(None)),
+    )
+    overdue = func.sum(case((and_(is_open, Task.deadline < now), 1), else_=0))
+
+    rows = (
+        db.query(
+            Task.status,
+            Task.is_completed,
+            Task.energy_required,
+            func.count(Task.id),
+            overdue,
+        )
+        .filter(Task.user_id == user_id)
+        .group_by(Task.status, Task.is_completed, Task.energy_required)
         .all()
     )
 
+    stats = {
+        "total": 0,
+        "completed": 0,
+        "incomplete": 0,
+        "overdue": 0,
+        "by_status": {s.value: 0 for s in models.TaskStatus},
+        "by_energy": {
+            e.value: {"total": 0, "incomplete": 0} for e in models.EnergyLevel
+        },
+    }
+    for status, is_completed, energy, count, overdue_count in rows:
+        stats["total"] += count
+        stats["overdue"] += overdue_count or 0
+        if status is not None:
+            stats["by_status"][status.value] += count
+        energy_stats = stats["by_energy"].get(energy.value) if energy else None
+        if energy_stats is not None:
+            energy_stats["total"] += count
+
+        # Mismo criterio que antes: completada por flag o por estado; las ignoradas no cuentan
+        if is_completed or status == models.TaskStatus.completed:
+            stats["completed"] += count
+        elif status != models.TaskStatus.ignored:
+            stats["incomplete"] += count
+            if energy_stats is not None:
+                energy_stats["incomplete"] += count
+    return stats
+
 
 def create_user_task(db: Session, task: schemas.TaskCreate, user_id: int):
     # Convertimos el esquema de Pydantic a Modelo de DB
     db_task = models.Task(**task.model_dump(), user_id=user_id)
     db.add(db_task)
+    cache.invalidate_timeline(db, user_id)
     db.commit()
     db.refresh(db_task)
     db.refresh(db_task)
@@ -138,6 +247,7 @@ def update_task(db: Session, task_id: int, task_update: schemas.TaskUpdate):
         setattr(db_task, key, value)
 
     db.add(db_task)
+    cache.invalidate_timeline(db, db_task.user_id)
     db.commit()
     db.refresh(db_task)
     return db_task
@@ -149,6 +259,7 @@ def delete_task(db: Session, task_id: int):
         return None
 
     db.delete(db_task)
+    cache.invalidate_timeline(db, db_task.user_id)
     db.commit()
     return db_task
 
@@ -158,24 +269,48 @@ def delete_task(db: Session, task_id: int):
 
 
 # --- EVENTOS (Events) ---
-def get_events(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+def event_sort_key(event: models.Event):
+    return (event.start_time, event.id)
+
+
+def get_events(
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, after: tuple = None
+):
     """
     Obtiene eventos del usuario con eager loading de categoría.
     Usa joinedload para evitar problema N+1.
+    Ordenados por (start_time, id); `after` continúa tras esa clave.
     """
-    return (
+    query = (
         db.query(models.Event)
         .options(joinedload(models.Event.category))
         .filter(models.Event.user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .order_by(models.Event.start_time, models.Event.id)
+    )
+    if after is not None:
+        query = query.filter(
+            _keyset_after([models.Event.start_time, models.Event.id], after)
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+
+def _refresh_series_until(db_event: models.Event):
+    db_event.recurrence_until = (
+        recurrence_service.series_until(
+            db_event.start_time, db_event.end_time, db_event.recurrence_rule
+        )
+        if db_event.recurrence_rule
+        else None
     )
 
 
 def create_user_event(db: Session, event: schemas.EventCreate, user_id: int):
     db_event = models.Event(**event.model_dump(), user_id=user_id)
+    _refresh_series_until(db_event)
     db.add(db_event)
+    cache.invalidate_timeline(db, user_id)
     db.commit()
     db.refresh(db_event)
     db.refresh(db_event)
@@ -194,8 +329,10 @@ def update_event(db: Session, event_id: int, event_update: schemas.EventUpdate):
     update_data = event_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_event, key, value)
+    _refresh_series_until(db_event)
 
     db.add(db_event)
+    cache.invalidate_timeline(db, db_event.user_id)
     db.commit()
     db.refresh(db_event)
     return db_event
@@ -207,10 +344,62 @@ def delete_event(db: Session, event_id: int):
         return None
 
     db.delete(db_event)
+    cache.invalidate_timeline(db, db_event.user_id)
     db.commit()
     return db_event
 
 
+def get_event_exceptions(db: Session, event_id: int):
+    return (
+        db.query(models.EventException)
+        .filter(models.EventException.event_id == event_id)
+        .order_by(models.EventException.original_start)
+        .all()
+    )
+
+
+def upsert_event_exception(
+    db: Session, db_event: models.Event, exception: schemas.EventExceptionCreate
+):
+    """Crea o reemplaza la excepción de la ocurrencia `original_start`."""
+    db_exception = (
+        db.query(models.EventException)
+        .filter(
+            models.EventException.event_id == db_event.id,
+            models.EventException.original_start == exception.original_start,
+        )
+        .first()
+    )
+    if db_exception is None:
+        db_exception = models.EventException(event_id=db_event.id)
+    for key, value in exception.model_dump().items():
+        setattr(db_exception, key, value)
+
+    db.add(db_exception)
+    cache.invalidate_timeline(db, db_event.user_id)
+    db.commit()
+    db.refresh(db_exception)
+    return db_exception
+
+
+def delete_event_exception(db: Session, db_event: models.Event, exception_id: int):
+    db_exception = (
+        db.query(models.EventException)
+        .filter(
+            models.EventException.id == exception_id,
+            models.EventException.event_id == db_event.id,
+        )
+        .first()
+    )
+    if not db_exception:
+        return None
+
+    db.delete(db_exception)
+    cache.invalidate_timeline(db, db_event.user_id)
+    db.commit()
+    return db_exception
+
+
 # --- PUSH NOTIFICATIONS ---
 def create_subscription(
     db: Session, subscription: schemas.PushSubscriptionCreate, user_id: int
@@ -1,9 +1,12 @@
 import logging
 import os
+import threading
+import time
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 
 load_dotenv(override=True)
 
@@ -16,17 +19,311 @@ if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
         "postgres://", "postgresql://", 1
     )
 
+# --- PERFILES DE ENGINE ---
+# sqlite:     desarrollo local (un solo proceso, check_same_thread=False)
+# sqlite_wal: instalaciones pequeñas de un solo nodo sobre SQLite (WAL + escritor único)
+# server:     PostgreSQL con pool persistente (uvicorn/gunicorn)
+# serverless: sin pool (NullPool), cada invocación abre y cierra su conexión (Vercel)
+ENGINE_PROFILES = ("sqlite", "sqlite_wal", "server", "serverless")
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def resolve_engine_profile(url: str) -> str:
+    """Perfil explícito (DB_ENGINE_PROFILE) o deducido de la URL y el entorno."""
+    profile = os.getenv("DB_ENGINE_PROFILE")
+    if profile:
+        if profile not in ENGINE_PROFILES:
+            raise ValueError(
+                f"DB_ENGINE_PROFILE inválido: {profile!r} (usa uno de {ENGINE_PROFILES})"
+            )
+        return profile
+    if url.startswith("sqlite"):
+        return "sqlite"
+    if os.getenv("VERCEL"):
+        return "serverless"
+    return "server"
+
+
+def build_engine_kwargs(url: str, profile: str) -> dict:
+    """
+    Argumentos de create_engine() para cada perfil. Una URL sqlite:// nunca recibe
+    opciones de pool de servidor (p. ej. DB_ENGINE_PROFILE=server en un .env local).
+    """
+    if profile in ("sqlite", "sqlite_wal") or url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+
+    if profile == "serverless":
+        # Cada función serverless vive poco: un pool sólo retendría conexiones
+        # que Postgres no puede recuperar. pre_ping no aporta sin pool.
+        return {"poolclass": NullPool}
+
+    return {
+        "poolclass": QueuePool,
+        "pool_size": _env_int("DB_POOL_SIZE", 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+class PoolStats:
+    """Contadores de uso del pool, alimentados por los eventos de SQLAlchemy."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.invalidations = 0
+
+    def attach(self, engine):
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects_total": self.connects,
+                "checkouts_total": self.checkouts,
+                "checkins_total": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "invalidations_total": self.invalidations,
+            }
+
+
+# --- SQLITE EN PRODUCCIÓN (perfil sqlite_wal) ---
+# WAL permite muchos lectores en paralelo con un escritor; busy_timeout hace que
+# SQLite espere al lock en vez de fallar con "database is locked".
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_MMAP_SIZE = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+SQLITE_CACHE_SIZE_KB = _env_int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS:d}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE:d}")
+        # cache_size negativo = tamaño en KiB en lugar de páginas
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB:d}")
+    finally:
+        cursor.close()
+
+
+class SQLiteWriteSerializer:
+    """
+    Serializa las escrituras de todas las sesiones del proceso con un único lock.
+
+    pysqlite sólo abre la transacción (BEGIN) al llegar el primer INSERT/UPDATE/DELETE,
+    así que las lecturas no toman el lock y siguen en paralelo gracias a WAL.
+    Se adquiere al hacer flush o ejecutar DML y se libera al terminar la transacción raíz.
+    """
+
+    _INFO_KEY = "_sqlite_write_lock"
+
+    def __init__(self, timeout: float):
+        self._lock = threading.Lock()
+        self.timeout = timeout
+        self.acquisitions = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+
+    def attach(self, session_factory):
+        event.listen(session_factory, "before_flush", self._before_flush)
+        event.listen(session_factory, "do_orm_execute", self._do_orm_execute)
+        event.listen(
+            session_factory, "after_transaction_end", self._after_transaction_end
+        )
+
+    def acquire_for(self, session: Session):
+        if session.info.get(self._INFO_KEY):
+            return
+        started = time.monotonic()
+        acquired = self._lock.acquire(blocking=False)
+        if not acquired:
+            self.waits += 1
+            acquired = self._lock.acquire(timeout=self.timeout)
+            self.wait_seconds += time.monotonic() - started
+        if not acquired:
+            # Seguimos sin el lock: busy_timeout de SQLite es la última red de seguridad
+            self.timeouts += 1
+            logger.warning("SQLite write lock timeout, continuing without it")
+            return
+        self.acquisitions += 1
+        session.info[self._INFO_KEY] = True
+
+    def release_for(self, session: Session):
+        if session.info.pop(self._INFO_KEY, False):
+            self._lock.release()
+
+    def _before_flush(self, session, flush_context, instances):
+        if session.new or session.dirty or session.deleted:
+            self.acquire_for(session)
+
+    def _do_orm_execute(self, orm_execute_state):
+        if (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        ):
+            self.acquire_for(orm_execute_state.session)
+
+    def _after_transaction_end(self, session, transaction):
+        if transaction.parent is None:
+            self.release_for(session)
+
+    def stats(self) -> dict:
+        return {
+            "write_lock_acquisitions": self.acquisitions,
+            "write_lock_waits": self.waits,
+            "write_lock_timeouts": self.timeouts,
+            "write_lock_wait_seconds": round(self.wait_seconds, 3),
+        }
+
+
+ENGINE_PROFILE = resolve_engine_profile(SQLALCHEMY_DATABASE_URL)
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    **build_engine_kwargs(SQLALCHEMY_DATABASE_URL, ENGINE_PROFILE),
 )
+pool_stats = PoolStats()
+pool_stats.attach(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+write_serializer = None
+if ENGINE_PROFILE == "sqlite_wal":
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    write_serializer = SQLiteWriteSerializer(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    write_serializer.attach(SessionLocal)
+
 Base = declarative_base()
 
 
+def get_pool_stats() -> dict:
+    """
+    Estado del pool para dimensionarlo según el número de workers.
+    Si peak_checked_out se acerca a pool_size + max_overflow, el pool se queda corto.
+    """
+    pool = engine.pool
+    stats = {
+        "profile": ENGINE_PROFILE,
+        "pool_class": type(pool).__name__,
+        **pool_stats.snapshot(),
+    }
+    if write_serializer is not None:
+        stats.update(write_serializer.stats())
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "overflow": max(0, pool.overflow()),
+                "idle": pool.checkedin(),
+            }
+        )
+    return stats
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+# --- ENGINE ASÍNCRONO ---
+# Usado por las variantes async de las lecturas calientes (routers/async_reads.py).
+# Se crea bajo demanda para no exigir aiosqlite/asyncpg a quien no activa esas rutas.
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    base_scheme = scheme.split("+", 1)[0]
+    if base_scheme not in _ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver async configurado para {scheme!r}")
+    return f"{_ASYNC_DRIVERS[base_scheme]}{sep}{rest}"
+
+
+def build_async_engine_kwargs(profile: str) -> dict:
+    kwargs = build_engine_kwargs(SQLALCHEMY_DATABASE_URL, profile)
+    # create_async_engine elige su propio pool adaptado (AsyncAdaptedQueuePool)
+    if kwargs.get("poolclass") is QueuePool:
+        kwargs.pop("poolclass")
+    return kwargs
+
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(
+            to_async_url(SQLALCHEMY_DATABASE_URL),
+            **build_async_engine_kwargs(ENGINE_PROFILE),
+        )
+        if ENGINE_PROFILE == "sqlite_wal":
+            event.listen(_async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            bind=get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_sessionmaker
+
+
+async def get_async_db():
+    """
+    Dependencia async. Las rutas reutilizan la lógica síncrona con
+    `await db.run_sync(func, ...)`: el código ORM corre en el event loop y cede
+    el control en cada espera del driver, sin ocupar hilos del threadpool.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,36 +1,108 @@
+import time
 from typing import Optional
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 import auth
+import cache
 import crud
+import models
 import schemas
-from database import get_db
+from database import get_async_db, get_db
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Columnas de User que guardamos en caché (nunca la instancia ORM, que pertenece a otra sesión).
+# El hash de la contraseña no sale de la BD, ni la versión del timeline (otro worker
+# puede haberla cambiado): en la instancia reasociada quedan sin cargar y, si alguien
+# las lee, se piden en esa sesión.
+_UNCACHED_USER_COLUMNS = {"hashed_password", "timeline_version"}
+_USER_COLUMNS = [
+    c.key for c in models.User.__table__.columns if c.key not in _UNCACHED_USER_COLUMNS
+]
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
+
+def _decode_token_user_id(token: str, credentials_exception: HTTPException) -> int:
+    """Devuelve el user_id del token, usando la caché de tokens ya validados."""
+    user_id = cache.token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
+    try:
+        payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+        sub: str = payload.get("sub")
+        if sub is None:
+            raise credentials_exception
+        token_data = schemas.TokenData(id=sub)
+        user_id = int(token_data.id)
+    except (jwt.PyJWTError, ValueError):
+        raise credentials_exception
+
+    # Nunca cachear más allá de la expiración del propio token
+    ttl = cache.token_cache.ttl
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    cache.token_cache.set(token, user_id, ttl=ttl)
+    return user_id
+
+
+def _attach_cached_user(db: Session, values: dict) -> models.User:
+    """
+    Reconstruye el usuario desde la caché y lo asocia a la sesión actual sin SELECT.
+    Sus relaciones son lazy="raise_on_sql": quien las necesite debe cargarlas con
+    una consulta explícita (selectinload/joinedload o crud), nunca al acceder.
+    """
+    user = models.User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(id=user_id)
-    except jwt.PyJWTError:
+
+
+def _load_user(db: Session, user_id: int) -> Optional[models.User]:
+    values = cache.user_cache.get(user_id)
+    if values is not None:
+        return _attach_cached_user(db, values)
+
+    user = crud.get_user_by_id(db, user_id=user_id)
+    if user is not None:
+        cache.user_cache.set(
+            user_id, {key: getattr(user, key) for key in _USER_COLUMNS}
+        )
+    return user
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+):
+    credentials_exception = _credentials_exception()
+    user_id = _decode_token_user_id(token, credentials_exception)
+
+    user = _load_user(db, user_id)
+    if user is None:
         raise credentials_exception
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
+    """Variante de get_current_user para las rutas async (misma caché)."""
+    credentials_exception = _credentials_exception()
+    user_id = _decode_token_user_id(token, credentials_exception)
 
-    user = crud.get_user_by_id(db, user_id=int(token_data.id))
+    user = await db.run_sync(_load_user, user_id)
     if user is None:
         raise credentials_exception
     return user
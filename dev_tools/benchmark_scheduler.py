@@ -0,0 +1,156 @@
+"""
+Benchmark del auto-scheduler (services/scheduler_service.py).
+
+Crea en una BD SQLite en memoria un usuario con N tareas pendientes (energía y
+deadline aleatorios) y unos eventos diarios, y mide cada fase de la agenda
+nocturna sobre un horizonte de 4 semanas.
+
+Uso:
+    python dev_tools/benchmark_scheduler.py
+    python dev_tools/benchmark_scheduler.py --tasks 10000 --days 28 --repeat 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import crud  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+from services import scheduler_service  # noqa: E402
+
+NOW = datetime(2026, 3, 2, 7, tzinfo=timezone.utc)
+
+
+def _seed(db, n_tasks: int, days: int, rng: random.Random):
+    user = crud.create_user(
+        db, schemas.UserCreate(email="bench@example.com", password="password123")
+    )
+    category = models.Category(name="Bench", user_id=user.id)
+    db.add(category)
+    db.flush()
+
+    events = []
+    for day in range(days):
+        for hour in rng.sample(range(9, 18), 3):
+            start = NOW.replace(hour=hour) + timedelta(days=day)
+            events.append(
+                {
+                    "title": "Meeting",
+                    "start_time": start,
+                    "end_time": start + timedelta(minutes=rng.choice((30, 60, 90))),
+                    "user_id": user.id,
+                    "category_id": category.id,
+                }
+            )
+    db.execute(models.Event.__table__.insert(), events)
+
+    energies = list(models.EnergyLevel)
+    tasks = [
+        {
+            "title": f"Task {i}",
+            "energy_required": rng.choice(energies).name,
+            "deadline": NOW + timedelta(hours=rng.randint(1, days * 24 * 2))
+            if rng.random() < 0.7
+            else None,
+            "status": models.TaskStatus.pending.name,
+            "is_completed": False,
+            "user_id": user.id,
+        }
+        for i in range(n_tasks)
+    ]
+    db.execute(models.Task.__table__.insert(), tasks)
+    db.commit()
+    return user.id
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(n_tasks: int, days: int, seed: int):
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user_id = _seed(db, n_tasks, days, random.Random(seed))
+        date_start = scheduler_service._round_up(NOW)
+        date_end = date_start + timedelta(days=days)
+
+        tasks, load_ms = _timed(
+            lambda: scheduler_service.get_pending_tasks(db, user_id)
+        )
+        fragments, slots_ms = _timed(
+            lambda: scheduler_service.get_schedulable_slots(
+                db, user_id, date_start, date_end
+            )
+        )
+        (plan, unscheduled), plan_ms = _timed(
+            lambda: scheduler_service.plan_schedule(tasks, fragments)
+        )
+        items = [
+            {"task_id": task.id, "planned_start": start, "planned_end": end}
+            for task, start, end, _ in plan
+        ]
+        applied, apply_ms = _timed(
+            lambda: scheduler_service.apply_schedule(db, user_id, items)
+        )
+        return {
+            "load": load_ms,
+            "slots": slots_ms,
+            "plan": plan_ms,
+            "apply": apply_ms,
+            "total": load_ms + slots_ms + plan_ms + apply_ms,
+            "applied": applied,
+            "on_time": sum(
+                1 for task, _, _, late in plan if task.deadline is not None and not late
+            ),
+            "late": sum(1 for *_, late in plan if late),
+            "unscheduled": len(unscheduled),
+        }
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    runs = [run(args.tasks, args.days, args.seed + i) for i in range(args.repeat)]
+    print(f"📅 {args.tasks} tareas, horizonte de {args.days} días, {args.repeat} rondas")
+    for phase in ("load", "slots", "plan", "apply", "total"):
+        values = [r[phase] for r in runs]
+        print(
+            f"   {phase:<6} mediana {statistics.median(values):8.1f} ms"
+            f"   máx {max(values):8.1f} ms"
+        )
+    last = runs[-1]
+    print(
+        f"   agendadas {last['applied']} (a tiempo {last['on_time']},"
+        f" tarde {last['late']}),"
+        f" sin hueco {last['unscheduled']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
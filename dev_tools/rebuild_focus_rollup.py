@@ -0,0 +1,35 @@
+"""
+Reconstruye focus_daily_rollup desde focus_sessions.
+
+Uso:
+    python dev_tools/rebuild_focus_rollup.py            # todos los usuarios
+    python dev_tools/rebuild_focus_rollup.py --user 42  # un usuario
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal  # noqa: E402
+from services import focus_service  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", type=int, default=None, help="ID de usuario")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        focus_service.rebuild_focus_rollup(db, user_id=args.user)
+        db.commit()
+    finally:
+        db.close()
+
+    target = f"usuario {args.user}" if args.user else "todos los usuarios"
+    print(f"✅ focus_daily_rollup reconstruido para {target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Reconstruye timeline_day_index desde events y tasks.
+
+Uso:
+    python dev_tools/rebuild_timeline_index.py            # todos los usuarios
+    python dev_tools/rebuild_timeline_index.py --user 42  # un usuario
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import timeline_index  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user", type=int, default=None, help="ID de usuario")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rows = timeline_index.reindex_user(db, user_id=args.user)
+        db.commit()
+    finally:
+        db.close()
+
+    target = f"usuario {args.user}" if args.user else "todos los usuarios"
+    print(f"✅ timeline_day_index reconstruido para {target} ({rows} filas)")
+
+
+if __name__ == "__main__":
+    main()
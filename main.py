@@ -8,9 +8,13 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 
+import auth
+import cache
 import models
-from database import engine
+import query_stats
+from database import engine, get_pool_stats
 from routers import (
+    async_reads,
     auth_routes,
     categories,
     events,
@@ -19,6 +23,7 @@ from routers import (
     tasks,
     timeline,
 )
+from services import holiday_service
 
 load_dotenv()
 
@@ -45,6 +50,16 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     )
 
 
+@app.exception_handler(auth.HashingPoolBusy)
+async def hashing_busy_exception_handler(request: Request, exc: auth.HashingPoolBusy):
+    logger.warning("Password hashing pool saturated, rejecting request")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry shortly"},
+        headers={"Retry-After": str(auth.HASH_BUSY_RETRY_AFTER)},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled Error: {str(exc)}", exc_info=True)
@@ -108,7 +123,43 @@ async def add_security_headers(request, call_next):
     return response
 
 
+# Instrumentación SQL por petición (query_stats.py)
+# En desarrollo se devuelve en cabeceras; en producción sólo se registra en logs.
+@app.middleware("http")
+async def track_db_queries(request, call_next):
+    stats, token = query_stats.start_request()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.end_request(token)
+
+    query_stats.report(stats, request.method, request.url.path)
+    if stats.strict and stats.over_budget:
+        # Modo estricto (CI/desarrollo): no dejar pasar respuestas con fan-out oculto
+        response = JSONResponse(
+            status_code=500,
+            content={
+                "detail": "Internal Server Error (Query budget exceeded)",
+                "query_count": stats.count,
+                "query_budget": stats.budget,
+            },
+        )
+
+    if ENVIRONMENT == "production":
+        logger.info(
+            f"{request.method} {request.url.path}: "
+            f"{stats.count} queries, {stats.total_ms} ms"
+        )
+    else:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = str(stats.total_ms)
+    return response
+
+
 # Incluir Routers
+# Las variantes async deben registrarse primero: FastAPI usa la primera ruta que coincide
+if os.getenv("ASYNC_READ_ROUTES", "false").lower() == "true":
+    app.include_router(async_reads.router)
 app.include_router(auth_routes.router)
 app.include_router(tasks.router)
 app.include_router(events.router)
@@ -121,3 +172,14 @@ app.include_router(focus.router)
 @app.get("/")
 def read_root():
     return {"message": "La API del Calendario TDAH esta viva!"}
+
+
+@app.get("/health")
+def read_health():
+    """Estadísticas del pool de conexiones y de las cachés en memoria de este worker."""
+    return {
+        "status": "ok",
+        "db_pool": get_pool_stats(),
+        "caches": cache.all_stats(),
+        "holiday_index": holiday_service.index_stats(),
+    }
@@ -1,21 +1,32 @@
 # -*- coding: utf-8 -*-
 import enum
+from datetime import datetime, timezone
 
 from sqlalchemy import (
     Boolean,
     Column,
+    Date,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Interval,
     String,
+    text,
 )
 from sqlalchemy.orm import relationship
 
 from database import Base  # Importamos la base que creamos en el paso anterior
 
 
+def _as_utc(value: datetime) -> datetime:
+    # SQLite devuelve datetimes naive aunque se guarden en UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
 # Definimos los niveles de energía para TDAH
 class EnergyLevel(str, enum.Enum):
     low = "low"
@@ -30,13 +41,21 @@ class User(Base):
 
     hashed_password = Column(String)
     country = Column(String, default="US")  # Default country for holidays
+    # Versión de sus datos de timeline: crud la incrementa al escribir (ver cache.py)
+    timeline_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relaciones
-    events = relationship("Event", back_populates="owner")
-    tasks = relationship("Task", back_populates="owner")
-    categories = relationship("Category", back_populates="owner")
-    push_subscriptions = relationship("PushSubscription", back_populates="owner")
-    focus_sessions = relationship("FocusSession", back_populates="owner")
+    # raise_on_sql: nunca se cargan de forma implícita (un usuario puede tener miles
+    # de tareas/eventos). Quien las necesite debe pedirlas con selectinload().
+    events = relationship("Event", back_populates="owner", lazy="raise_on_sql")
+    tasks = relationship("Task", back_populates="owner", lazy="raise_on_sql")
+    categories = relationship("Category", back_populates="owner", lazy="raise_on_sql")
+    push_subscriptions = relationship(
+        "PushSubscription", back_populates="owner", lazy="raise_on_sql"
+    )
+    focus_sessions = relationship(
+        "FocusSession", back_populates="owner", lazy="raise_on_sql"
+    )
 
 
 class Category(Base):
@@ -49,6 +68,11 @@ class Category(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="categories")
 
+    __table_args__ = (
+        # Listado paginado por cursor: ORDER BY name, id
+        Index("ix_categories_user_id_name_id", "user_id", "name", "id"),
+    )
+
 
 class Event(Base):
     __tablename__ = "events"  # Eventos con hora fija (Citas, Clases)
@@ -64,6 +88,52 @@ class Event(Base):
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     category = relationship("Category")
 
+    # Recurrencia (ver services/recurrence_service.py): start_time/end_time son la
+    # primera ocurrencia; recurrence_until es el fin de la última (NULL = sin fin)
+    recurrence_rule = Column(String, nullable=True)
+    recurrence_until = Column(DateTime(timezone=True), nullable=True)
+    exceptions = relationship(
+        "EventException", back_populates="event", cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        # Timeline: WHERE user_id = ? AND start_time BETWEEN ? AND ?
+        Index("ix_events_user_id_start_time", "user_id", "start_time"),
+        # Series activas en una ventana: WHERE user_id = ? AND recurrence_until > ?
+        Index(
+            "ix_events_user_id_series",
+            "user_id",
+            "recurrence_until",
+            sqlite_where=text("recurrence_rule IS NOT NULL"),
+            postgresql_where=text("recurrence_rule IS NOT NULL"),
+        ),
+    )
+
+
+class EventException(Base):
+    """Cancelación o modificación de una ocurrencia de un evento recurrente."""
+
+    __tablename__ = "event_exceptions"
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    original_start = Column(DateTime(timezone=True), nullable=False)
+    is_cancelled = Column(Boolean, nullable=False, default=False)
+    # Valores que sustituyen a los de la serie (NULL = sin cambio)
+    start_time = Column(DateTime(timezone=True), nullable=True)
+    end_time = Column(DateTime(timezone=True), nullable=True)
+    title = Column(String, nullable=True)
+
+    event = relationship("Event", back_populates="exceptions")
+
+    __table_args__ = (
+        Index(
+            "ux_event_exceptions_event_id_original_start",
+            "event_id",
+            "original_start",
+            unique=True,
+        ),
+    )
+
 
 class TaskStatus(str, enum.Enum):
     pending = "pending"
@@ -90,14 +160,23 @@ class Task(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        # Timeline: WHERE user_id = ? AND planned_start BETWEEN ? AND ?
+        Index("ix_tasks_user_id_planned_start", "user_id", "planned_start"),
+        # Sugerencias: WHERE user_id = ? AND status = ? AND deadline <= ?
+        Index("ix_tasks_user_id_status_deadline", "user_id", "status", "deadline"),
+        # Listado paginado por cursor: ORDER BY id
+        Index("ix_tasks_user_id_id", "user_id", "id"),
+    )
+
 
 class PushSubscription(Base):
     __tablename__ = "push_subscriptions"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
 
-    # Endpoint URL (from browser/device)
-    endpoint = Column(String, nullable=False)
+    # Endpoint URL (from browser/device). Único: create_subscription lo usa como clave
+    endpoint = Column(String, nullable=False, unique=True, index=True)
 
     # Keys for encryption (p256dh, auth) - JSON string or separate cols
     keys = Column(
@@ -121,10 +200,124 @@ class FocusSession(Base):
 
     duration_minutes = Column(Integer, default=0)
     interruptions = Column(Integer, default=0)
-    interruption_notes = Column(String, nullable=True)
+    interruption_notes = Column(String, nullable=True)  # Legado: ver FocusInterruption
     feedback_score = Column(Integer, nullable=True)
 
     status = Column(String, default="active")  # active, paused, completed
 
+    # Pausas: segundos acumulados de pausas ya cerradas + inicio de la pausa en curso
+    paused_seconds = Column(Integer, nullable=False, default=0, server_default="0")
+    paused_at = Column(DateTime(timezone=True), nullable=True)
+
     owner = relationship("User", back_populates="focus_sessions")
     task = relationship("Task")
+
+    def pause(self, now: datetime):
+        if self.status == "active":
+            self.status = "paused"
+            self.paused_at = now
+
+    def resume(self, now: datetime):
+        self._close_pause(now)
+        self.status = "active"
+
+    def _close_pause(self, now: datetime):
+        if self.paused_at is not None:
+            elapsed = (now - _as_utc(self.paused_at)).total_seconds()
+            self.paused_seconds = (self.paused_seconds or 0) + max(0, int(elapsed))
+            self.paused_at = None
+
+    def finish(self, now: datetime):
+        """Cierra la sesión; la duración excluye el tiempo en pausa."""
+        self._close_pause(now)
+        self.end_time = now
+        self.status = "completed"
+        self.duration_minutes = self.active_seconds_at(now) // 60
+
+    def active_seconds_at(self, now: datetime) -> int:
+        """Segundos de foco efectivo (sin pausas) hasta `now` o hasta end_time."""
+        if self.start_time is None:
+            return 0
+        end = _as_utc(self.end_time) if self.end_time else now
+        if self.paused_at is not None:
+            # Una pausa en curso congela el contador
+            end = min(end, _as_utc(self.paused_at))
+        elapsed = (end - _as_utc(self.start_time)).total_seconds()
+        return max(0, int(elapsed) - (self.paused_seconds or 0))
+
+    @property
+    def active_seconds(self) -> int:
+        return self.active_seconds_at(datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Focus: WHERE user_id = ? AND status = ? / status != 'completed'
+        Index("ix_focus_sessions_user_id_status", "user_id", "status"),
+        # Como mucho una sesión abierta por usuario (regla garantizada por la BD)
+        Index(
+            "ux_focus_sessions_user_id_open",
+            "user_id",
+            unique=True,
+            sqlite_where=text("status IN ('active', 'paused')"),
+            postgresql_where=text("status IN ('active', 'paused')"),
+        ),
+    )
+
+
+class TimelineDayIndex(Base):
+    """
+    Días que ocupa un evento o tarea agendada además de su día de inicio (sólo
+    existen filas para lo que cruza la medianoche UTC). Permite encontrar por
+    índice lo que empezó antes de una ventana y sigue en curso dentro de ella.
+    Lo mantiene timeline_index.py en cada escritura de Event/Task.
+    """
+
+    __tablename__ = "timeline_day_index"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    item_type = Column(String, primary_key=True)  # "event" o "task"
+    item_id = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        # Reindexar/borrar un elemento: WHERE item_type = ? AND item_id = ?
+        Index("ix_timeline_day_index_item", "item_type", "item_id"),
+    )
+
+
+class FocusInterruption(Base):
+    """Registro append-only de interrupciones (una fila por interrupción)."""
+
+    __tablename__ = "focus_interruptions"
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(
+        Integer, ForeignKey("focus_sessions.id"), nullable=False, index=True
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Copiada de la sesión para agrupar por tarea sin JOIN
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    note = Column(String, nullable=True)
+
+    __table_args__ = (
+        # Analítica: WHERE user_id = ? AND occurred_at BETWEEN ... (por hora)
+        Index("ix_focus_interruptions_user_id_occurred_at", "user_id", "occurred_at"),
+        # Analítica: GROUP BY task_id de un usuario
+        Index("ix_focus_interruptions_user_id_task_id", "user_id", "task_id"),
+    )
+
+
+class FocusDailyRollup(Base):
+    """
+    Totales de focus por usuario y día (UTC de inicio de la sesión).
+    Se mantiene de forma incremental desde routers/focus.py; si se desincroniza
+    se reconstruye con dev_tools/rebuild_focus_rollup.py.
+    """
+
+    __tablename__ = "focus_daily_rollup"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    sessions = Column(Integer, nullable=False, default=0)  # Sesiones completadas
+    minutes = Column(Integer, nullable=False, default=0)
+    interruptions = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    score_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,104 @@
+"""
+Instrumentación de SQL por petición: número de sentencias, tiempo en BD y
+detección de sentencias repetidas (patrón N+1).
+
+Los listeners se registran sobre la clase Engine, así cubren el engine de la app,
+el asíncrono y los de los tests. El estado de cada petición vive en un ContextVar
+que main.py inicializa en un middleware.
+"""
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Máximo de sentencias por petición antes de avisar (0 = sin presupuesto)
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", 25))
+# En modo estricto superar el presupuesto hace fallar la petición (lo aplica main.py)
+SQL_QUERY_BUDGET_STRICT = (
+    os.getenv("SQL_QUERY_BUDGET_STRICT", "false").lower() == "true"
+)
+# Veces que puede repetirse la misma sentencia antes de considerarla un N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+
+
+class RequestQueryStats:
+    def __init__(self, budget: int = None, strict: bool = None):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.statements = Counter()
+        self.budget = SQL_QUERY_BUDGET if budget is None else budget
+        self.strict = SQL_QUERY_BUDGET_STRICT if strict is None else strict
+
+    @property
+    def total_ms(self) -> float:
+        return round(self.total_seconds * 1000, 2)
+
+    @property
+    def over_budget(self) -> bool:
+        return bool(self.budget) and self.count > self.budget
+
+    def repeated_statements(self, threshold: int = None):
+        """Sentencias ejecutadas al menos `threshold` veces (candidatas a N+1)."""
+        threshold = SQL_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar = ContextVar("request_query_stats", default=None)
+
+
+def start_request(**kwargs):
+    """Empieza a contar; devuelve (stats, token) para end_request()."""
+    stats = RequestQueryStats(**kwargs)
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current() -> RequestQueryStats:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.statements[statement] += 1
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("query_start_time")
+    if stats is None or not starts:
+        return
+    stats.total_seconds += time.perf_counter() - starts.pop()
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute no se llama si la sentencia falla
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def report(stats: RequestQueryStats, method: str, path: str):
+    """Registra los avisos de presupuesto y de N+1 de una petición terminada."""
+    if stats.over_budget:
+        logger.warning(
+            f"{method} {path}: {stats.count} SQL statements "
+            f"(budget {stats.budget}), {stats.total_ms} ms"
+        )
+    for sql, n in stats.repeated_statements():
+        logger.warning(f"{method} {path}: possible N+1, executed {n} times: {sql}")
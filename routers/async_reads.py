@@ -0,0 +1,102 @@
+"""
+Variantes async de las lecturas más consultadas (polling de los clientes).
+
+Se registran antes que los routers síncronos cuando ASYNC_READ_ROUTES=true, de modo
+que atienden las mismas rutas. Reutilizan la lógica síncrona con AsyncSession.run_sync,
+así un solo worker atiende miles de clientes sin depender del tamaño del threadpool.
+"""
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+import models
+import schemas
+from database import get_async_db
+from dependencies import get_current_user_async
+from routers.timeline import (
+    decode_timeline_cursor,
+    resolve_timeline_window,
+    set_timeline_cursor,
+)
+from services import focus_service, pagination, timeline_service
+
+router = APIRouter(tags=["Async reads"])
+
+
+@router.get("/timeline/", response_model=List[schemas.TimelineItem])
+async def read_timeline_async(
+    response: Response,
+    start: datetime = None,
+    end: datetime = None,
+    skip: int = 0,
+    limit: int = 50,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    start, end, limit = resolve_timeline_window(start, end, limit)
+    after_key = decode_timeline_cursor(after)
+    items = await db.run_sync(
+        timeline_service.get_timeline,
+        user_id=current_user.id,
+        date_start=start,
+        date_end=end,
+        skip=skip,
+        limit=limit,
+        after=after_key,
+    )
+    set_timeline_cursor(response, items, limit)
+    return items
+
+
+@router.get("/timeline/now", response_model=schemas.NowView)
+async def read_now_view_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    return await db.run_sync(
+        timeline_service.get_now_view,
+        user_id=current_user.id,
+        current_time=datetime.now(timezone.utc),
+    )
+
+
+@router.get("/tasks/", response_model=List[schemas.Task])
+async def read_tasks_async(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    if limit > 1000:
+        limit = 1000
+    try:
+        after_key = pagination.decode_cursor(after, (int,)) if after else None
+    except pagination.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    tasks = await db.run_sync(
+        crud.get_tasks, user_id=current_user.id, skip=skip, limit=limit, after=after_key
+    )
+    cursor = pagination.next_cursor(tasks, limit, crud.task_sort_key)
+    if cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = cursor
+    return tasks
+
+
+@router.get("/focus/current", response_model=schemas.FocusSession)
+async def get_current_focus_session_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async),
+):
+    active_session = await db.run_sync(
+        focus_service.get_active_session, current_user.id
+    )
+    if not active_session:
+        raise HTTPException(status_code=404, detail="No active session found")
+    return active_session
@@ -3,6 +3,7 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import auth
 import crud
@@ -15,29 +16,37 @@ router = APIRouter(tags=["Authentication"])
 
 
 @router.post(
-    "/users/", response_model=schemas.User, status_code=status.HTTP_201_CREATED
+    "/users/", response_model=schemas.UserProfile, status_code=status.HTTP_201_CREATED
 )
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # Handler async: las consultas van al threadpool y bcrypt a su propio pool
+    # (auth._hash_executor), así un pico de registros no bloquea al resto de endpoints.
+
     # 1. Verificar si ya existe un usuario con este email
-    db_user = crud.get_user_by_email(db, email=user.email)
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
 
     if db_user:
         # 🛑 Si el usuario ya existe: Levantamos una excepción HTTP.
         raise HTTPException(status_code=400, detail="El email ya está registrado")
 
-    # 2. Si no existe: Llama a la función de CRUD para crearlo
-    return crud.create_user(db=db, user=user)
+    # 2. Si no existe: hash fuera del threadpool y creación vía CRUD
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await run_in_threadpool(
+        crud.create_user, db=db, user=user, hashed_password=hashed_password
+    )
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     # 1. Buscar usuario por email (el form_data usa 'username', pero nosotros usamos email)
-    user = crud.get_user_by_email(db, email=form_data.username)
+    user = await run_in_threadpool(crud.get_user_by_email, db, email=form_data.username)
 
-    # 2. Verificar si usuario existe y si la contraseña es correcta
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    # 2. Verificar si usuario existe y si la contraseña es correcta (en el pool de hashing)
+    if not user or not await auth.verify_password_async(
+        form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -53,12 +62,21 @@ def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-@router.get("/users/me", response_model=schemas.User)
+@router.get("/users/me", response_model=schemas.UserProfile)
 def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 
-@router.put("/users/me", response_model=schemas.User)
+@router.get("/users/me/full", response_model=schemas.User)
+def read_users_me_full(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Perfil con todas las tareas y eventos. Costoso: usar sólo para exportar."""
+    return crud.get_user_with_children(db, current_user.id)
+
+
+@router.put("/users/me", response_model=schemas.UserProfile)
 def update_user_me(
     user_update: schemas.UserUpdate,
     db: Session = Depends(get_db),
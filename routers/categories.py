@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 import crud
@@ -8,22 +8,37 @@ import models
 import schemas
 from database import get_db
 from dependencies import get_current_user
+from services import pagination
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @router.get("/", response_model=List[schemas.Category])
 def read_categories(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
-    Obtener lista de categorías.
+    Obtener lista de categorías, ordenadas por nombre.
     Solo se devuelven las categorías creadas por el usuario autenticado.
+    Con `after` (cabecera X-Next-Cursor de la página anterior) se ignora skip.
     """
-    return crud.get_categories(db, user_id=current_user.id, skip=skip, limit=limit)
+    try:
+        after_key = pagination.decode_cursor(after, (str, int)) if after else None
+    except pagination.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    categories = crud.get_categories(
+        db, user_id=current_user.id, skip=skip, limit=limit, after=after_key
+    )
+    cursor = pagination.next_cursor(categories, limit, crud.category_sort_key)
+    if cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = cursor
+    return categories
 
 
 @router.get("/{category_id}", response_model=schemas.Category)
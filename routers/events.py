@@ -1,6 +1,7 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 import crud
@@ -8,28 +9,43 @@ import models
 import schemas
 from database import get_db
 from dependencies import get_current_user
+from services import pagination
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
 
 @router.get("/", response_model=List[schemas.Event])
 def read_events(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
-    Obtiene la lista de eventos del usuario con paginación.
+    Obtiene la lista de eventos del usuario con paginación, ordenados por inicio.
 
     - skip: número de registros a saltar (default: 0)
     - limit: número máximo de registros a devolver (default: 100, max: 1000)
+    - after: cursor de la cabecera X-Next-Cursor de la página anterior (ignora skip)
     """
     # Validar que limit no sea excesivo
     if limit > 1000:
         limit = 1000
 
-    return crud.get_events(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    try:
+        after_key = pagination.decode_cursor(after, (datetime, int)) if after else None
+    except pagination.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    events = crud.get_events(
+        db=db, user_id=current_user.id, skip=skip, limit=limit, after=after_key
+    )
+    cursor = pagination.next_cursor(events, limit, crud.event_sort_key)
+    if cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = cursor
+    return events
 
 
 @router.post("/", response_model=schemas.Event, status_code=status.HTTP_201_CREATED)
@@ -96,3 +112,55 @@ def delete_event(
 
     crud.delete_event(db, event_id)
     return None
+
+
+# --- EXCEPCIONES DE EVENTOS RECURRENTES ---
+def _get_own_series(db: Session, event_id: int, user_id: int) -> models.Event:
+    db_event = crud.get_event(db, event_id=event_id)
+    if not db_event:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if db_event.user_id != user_id:
+        raise HTTPException(status_code=403, detail="No tienes permiso")
+    if not db_event.recurrence_rule:
+        raise HTTPException(status_code=400, detail="El evento no es recurrente")
+    return db_event
+
+
+@router.get("/{event_id}/exceptions", response_model=List[schemas.EventException])
+def read_event_exceptions(
+    event_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    _get_own_series(db, event_id, current_user.id)
+    return crud.get_event_exceptions(db, event_id)
+
+
+@router.put("/{event_id}/exceptions", response_model=schemas.EventException)
+def upsert_event_exception(
+    event_id: int,
+    exception: schemas.EventExceptionCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Cancela (is_cancelled) o modifica (start_time, end_time, title) la ocurrencia
+    que empieza en original_start. Si ya tenía excepción, se reemplaza.
+    """
+    db_event = _get_own_series(db, event_id, current_user.id)
+    return crud.upsert_event_exception(db, db_event, exception)
+
+
+@router.delete(
+    "/{event_id}/exceptions/{exception_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+def delete_event_exception(
+    event_id: int,
+    exception_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    db_event = _get_own_series(db, event_id, current_user.id)
+    if not crud.delete_event_exception(db, db_event, exception_id):
+        raise HTTPException(status_code=404, detail="Excepción no encontrada")
+    return None
@@ -1,13 +1,17 @@
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
+import cache
 import models
 import schemas
 from database import get_db
 from routers.auth_routes import get_current_user
+from services import focus_service
 
 router = APIRouter(
     prefix="/focus",
@@ -22,34 +26,27 @@ def start_focus_session(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    # Check if there is already an active session?
-    # For now, let's assume we can only have one active session.
-    active_session = (
-        db.query(models.FocusSession)
-        .filter(
-            models.FocusSession.user_id == current_user.id,
-            models.FocusSession.status == "active",
-        )
-        .first()
-    )
-
-    if active_session:
-        # Option: Close it or return it?
-        # Let's return error to generic "Finish previous session first"
-        raise HTTPException(
-            status_code=400,
-            detail="You already have an active focus session. Please finish it first.",
-        )
-
+    # La regla "una sesión abierta por usuario" la garantiza el índice único
+    # parcial ux_focus_sessions_user_id_open: dos /start simultáneos no pueden
+    # colarse entre una comprobación y el INSERT.
     new_session = models.FocusSession(
         user_id=current_user.id,
         task_id=session_in.task_id,
         start_time=datetime.now(timezone.utc),
         status="active",
     )
-    db.add(new_session)
+    try:
+        # SAVEPOINT: si choca con el índice sólo se deshace este INSERT
+        with db.begin_nested():
+            db.add(new_session)
+    except IntegrityError:
+        raise HTTPException(
+            status_code=400,
+            detail="You already have an active focus session. Please finish it first.",
+        )
     db.commit()
     db.refresh(new_session)
+    focus_service.remember_active_session(current_user.id, new_session.id)
     return new_session
 
 
@@ -59,17 +56,8 @@ def get_current_focus_session(
 ):
     """
     Obtiene la sesión de focus activa del usuario.
-    Usa joinedload para cargar la tarea asociada si existe.
     """
-    active_session = (
-        db.query(models.FocusSession)
-        .options(joinedload(models.FocusSession.task))
-        .filter(
-            models.FocusSession.user_id == current_user.id,
-            models.FocusSession.status != "completed",
-        )
-        .first()
-    )
+    active_session = focus_service.get_active_session(db, current_user.id)
 
     if not active_session:
         raise HTTPException(status_code=404, detail="No active session found")
@@ -101,27 +89,10 @@ def stop_focus_session(
         return session  # Already done
 
     now = datetime.now(timezone.utc)
-    session.end_time = now
-    session.status = "completed"
-    if feedback_score:
-        session.feedback_score = feedback_score
-
-    # Calculate duration
-    # Note: start_time in DB might be different timezone awareness depending on DB setup (SQLite vs Postgres)
-    # Ensure both are aware or naive.
-    # models.py uses DateTime(timezone=True), so we should get aware datetimes.
-
-    # Simple check for duration
-    if session.start_time:
-        # ensure compatibility
-        start = session.start_time
-        if start.tzinfo is None:
-            # fallback if db returned naive, assume it was saved as UTC
-            start = start.replace(tzinfo=timezone.utc)
-
-        delta = now - start
-        minutes = int(delta.total_seconds() / 60)
-        session.duration_minutes = minutes
+    if not focus_service.finish_session(db, session, now, feedback_score):
+        # Otra petición la cerró entre medias: ya está contada en el rollup
+        db.refresh(session)
+        return session
 
     # Mark task as completed if requested
     if complete_task and session.task_id:
@@ -129,9 +100,11 @@ def stop_focus_session(
         if task:
             task.is_completed = True
             task.status = models.TaskStatus.completed
+            cache.invalidate_timeline(db, current_user.id)
 
     db.commit()
     db.refresh(session)
+    focus_service.remember_active_session(current_user.id, None)
     return session
 
 
@@ -152,10 +125,13 @@ def pause_focus_session(
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    if session.status == "completed":
+        raise HTTPException(status_code=400, detail="Session already finished")
 
-    session.status = "paused"
+    session.pause(datetime.now(timezone.utc))
     db.commit()
     db.refresh(session)
+    focus_service.remember_active_session(current_user.id, session.id)
     return session
 
 
@@ -176,13 +152,15 @@ def resume_focus_session(
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
+    if session.status == "completed":
+        # Reabrirla podría dejar dos sesiones abiertas (lo impide el índice único)
+        raise HTTPException(status_code=400, detail="Session already finished")
 
-    session.status = "active"
-    # Note: We are not adjusting start_time, which means 'duration' will include pause time if we just subtract end - start.
-    # For a simple MVP, this is acceptable, but ideally we track "paused_duration".
-    # Let's keep it simple for now as requested.
+    # El tiempo en pausa se acumula en paused_seconds y no cuenta en la duración
+    session.resume(datetime.now(timezone.utc))
     db.commit()
     db.refresh(session)
+    focus_service.remember_active_session(current_user.id, session.id)
     return session
 
 
@@ -205,47 +183,110 @@ def log_interruption(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session.interruptions += 1
-    if note:
-        # Append note?
-        if session.interruption_notes:
-            session.interruption_notes += f"; {note}"
-        else:
-            session.interruption_notes = note
-
+    focus_service.log_interruptions(db, session, [(None, note)])
     db.commit()
     db.refresh(session)
     return session
 
 
-@router.get("/stats", response_model=schemas.FocusStats)
-def get_focus_stats(
-    db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
+@router.post("/{session_id}/interruptions", response_model=schemas.FocusSession)
+def log_interruptions_batch(
+    session_id: int,
+    batch: schemas.FocusInterruptionBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
 ):
     """
-    Obtiene estadísticas de las sesiones de focus del usuario.
-    Usa joinedload para cargar tareas asociadas si existen.
+    Registra varias interrupciones en una sola petición (p. ej. las acumuladas
+    offline por el cliente). Sin occurred_at se usa el momento de la petición.
     """
-    user_sessions = (
+    session = (
         db.query(models.FocusSession)
-        .options(joinedload(models.FocusSession.task))
-        .filter(models.FocusSession.user_id == current_user.id)
+        .filter(
+            models.FocusSession.id == session_id,
+            models.FocusSession.user_id == current_user.id,
+        )
+        .first()
+    )
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    focus_service.log_interruptions(
+        db, session, [(item.occurred_at, item.note) for item in batch.interruptions]
+    )
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+@router.get(
+    "/{session_id}/interruptions", response_model=List[schemas.FocusInterruption]
+)
+def list_interruptions(
+    session_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Interrupciones de una sesión en orden cronológico."""
+    return (
+        db.query(models.FocusInterruption)
+        .filter(
+            models.FocusInterruption.session_id == session_id,
+            models.FocusInterruption.user_id == current_user.id,
+        )
+        .order_by(models.FocusInterruption.occurred_at, models.FocusInterruption.id)
         .all()
     )
 
-    total_sessions = len(user_sessions)
-    total_minutes = sum([s.duration_minutes for s in user_sessions])
-    total_interruptions = sum([s.interruptions for s in user_sessions])
-
-    # filter sessions with feedback
-    rated_sessions = [
-        s.feedback_score for s in user_sessions if s.feedback_score is not None
-    ]
-    avg_score = sum(rated_sessions) / len(rated_sessions) if rated_sessions else 0.0
-
-    return schemas.FocusStats(
-        total_sessions=total_sessions,
-        total_minutes=total_minutes,
-        avg_score=avg_score,
-        total_interruptions=total_interruptions,
+
+@router.get("/interruptions/stats", response_model=schemas.InterruptionAnalytics)
+def get_interruption_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Interrupciones por hora del día (UTC) y por tarea en el rango dado."""
+    return focus_service.get_interruption_analytics(
+        db, current_user.id, date_start=start, date_end=end
+    )
+
+
+@router.get("/stats", response_model=schemas.FocusStats)
+def get_focus_stats(
+    group_by: Optional[schemas.StatsGroupBy] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Obtiene estadísticas de las sesiones de focus del usuario (agregadas en SQL).
+
+    - group_by: day | week | month para añadir el desglose por periodo
+    - start / end: rango (por inicio de sesión) del desglose
+    """
+    stats = focus_service.get_focus_stats(db, current_user.id)
+    if group_by:
+        stats["buckets"] = focus_service.get_focus_buckets(
+            db, current_user.id, group_by.value, date_start=start, date_end=end
+        )
+    return schemas.FocusStats(**stats)
+
+
+@router.get("/rollup", response_model=List[schemas.FocusStatsBucket])
+def get_focus_rollup(
+    group_by: schemas.StatsGroupBy = schemas.StatsGroupBy.day,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Desglose por periodo leído de focus_daily_rollup (una fila por día con actividad).
+    Sólo incluye sesiones completadas; las interrupciones cuentan al registrarse.
+    """
+    return focus_service.get_rollup_buckets(
+        db, current_user.id, group_by.value, date_start=start, date_end=end
     )
@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 import crud
@@ -8,33 +8,25 @@ import models
 import schemas
 from database import get_db
 from dependencies import get_current_user
-from services import recommendation_service
+from services import pagination, recommendation_service, scheduler_service
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
-@router.get("/stats")
+@router.get("/stats", response_model=schemas.TaskStats)
 def get_task_stats(
     db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)
 ):
-    tasks = crud.get_tasks(db=db, user_id=current_user.id)
-    completed = sum(
-        1 for t in tasks if t.is_completed or t.status == models.TaskStatus.completed
-    )
-    incomplete = sum(
-        1
-        for t in tasks
-        if not t.is_completed
-        and t.status != models.TaskStatus.completed
-        and t.status != models.TaskStatus.ignored
-    )
-    return {"completed": completed, "incomplete": incomplete}
+    """Totales de tareas (completadas, pendientes, vencidas, por estado y energía)."""
+    return crud.get_task_stats(db, user_id=current_user.id)
 
 
 @router.get("/", response_model=List[schemas.Task])
 def read_tasks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -43,12 +35,23 @@ def read_tasks(
 
     - skip: número de registros a saltar (default: 0)
     - limit: número máximo de registros a devolver (default: 100, max: 1000)
+    - after: cursor de la cabecera X-Next-Cursor de la página anterior (ignora skip)
     """
     # Validar que limit no sea excesivo
     if limit > 1000:
         limit = 1000
 
-    tasks = crud.get_tasks(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    try:
+        after_key = pagination.decode_cursor(after, (int,)) if after else None
+    except pagination.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    tasks = crud.get_tasks(
+        db=db, user_id=current_user.id, skip=skip, limit=limit, after=after_key
+    )
+    cursor = pagination.next_cursor(tasks, limit, crud.task_sort_key)
+    if cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = cursor
     return tasks
 
 
@@ -72,6 +75,47 @@ def get_task_suggestions(
     )
 
 
+# Mismo tope que /timeline/free-slots
+MAX_SCHEDULE_HORIZON_DAYS = 92
+
+
+def _check_horizon(horizon_days: int):
+    if not 1 <= horizon_days <= MAX_SCHEDULE_HORIZON_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"horizon_days debe estar entre 1 y {MAX_SCHEDULE_HORIZON_DAYS}",
+        )
+
+
+@router.get("/schedule", response_model=schemas.SchedulePlan)
+def propose_schedule(
+    horizon_days: int = scheduler_service.SCHEDULER_HORIZON_DAYS,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Propone horario (planned_start/planned_end) para las tareas pendientes sin
+    agendar, en los huecos libres de los próximos horizon_days días. No guarda nada.
+    """
+    _check_horizon(horizon_days)
+    return scheduler_service.propose_schedule(
+        db, current_user.id, horizon_days=horizon_days
+    )
+
+
+@router.post("/schedule", response_model=schemas.SchedulePlan)
+def apply_schedule(
+    horizon_days: int = scheduler_service.SCHEDULER_HORIZON_DAYS,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """Calcula el mismo plan que GET /tasks/schedule y lo guarda."""
+    _check_horizon(horizon_days)
+    return scheduler_service.schedule_user(
+        db, current_user.id, horizon_days=horizon_days
+    )
+
+
 @router.get("/{task_id}", response_model=schemas.Task)
 def read_task(
     task_id: int,
@@ -1,7 +1,7 @@
-from datetime import datetime, timezone
-from typing import List
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 import crud
@@ -9,17 +9,61 @@ import models
 import schemas
 from database import get_db
 from dependencies import get_current_user
-from services import timeline_service
+from services import availability_service, pagination, timeline_service
 
 router = APIRouter(prefix="/timeline", tags=["Timeline"])
 
 
+def resolve_timeline_window(start: datetime, end: datetime, limit: int):
+    """Valores por defecto del rango y del tamaño de página (compartido con async_reads)."""
+    # Si no se especifican fechas, usar HOY (00:00 a 23:59)
+    if not start:
+        now = datetime.now(timezone.utc)
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if not end:
+        # Si se dio start pero no end, asumimos fin del día de start, O 24h despues?
+        # Para consistencia con "Month View" que manda start y end explícitos,
+        # si falta end, asumimos el final del día de 'start'.
+        end = start.replace(hour=23, minute=59, second=59, microsecond=999999)
+
+    # Validar límite (ahora es límite de página, no total)
+    if limit > 1000:
+        limit = 1000
+
+    return start, end, limit
+
+
+TIMELINE_ITEM_TYPES = ("event", "holiday", "task")
+
+
+def decode_timeline_cursor(after: Optional[str]):
+    """Cursor (start, type, id) de ?after= (compartido con async_reads)."""
+    if not after:
+        return None
+    try:
+        key = pagination.decode_cursor(after, (datetime, str, int))
+    except pagination.InvalidCursor:
+        key = None
+    if key is None or key[1] not in TIMELINE_ITEM_TYPES:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return key
+
+
+def set_timeline_cursor(response: Response, items: list, limit: int):
+    cursor = pagination.next_cursor(items, limit, timeline_service.timeline_sort_key)
+    if cursor:
+        response.headers[pagination.NEXT_CURSOR_HEADER] = cursor
+
+
 @router.get("/", response_model=List[schemas.TimelineItem])
 def read_timeline(
+    response: Response,
     start: datetime = None,
     end: datetime = None,
     skip: int = 0,
     limit: int = 50,
+    after: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
@@ -30,30 +74,55 @@ def read_timeline(
     - end: fecha de fin (default: hoy 23:59)
     - skip: items a saltar (paginación)
     - limit: items a devolver (paginación, max: 100)
+    - after: cursor de la cabecera X-Next-Cursor de la página anterior (ignora skip)
     """
-    # Si no se especifican fechas, usar HOY (00:00 a 23:59)
-    if not start:
-        now = datetime.now(timezone.utc)
-        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    if not end:
-        # Si se dio start pero no end, asumimos fin del día de start, O 24h despues?
-        # Para consistencia con "Month View" que manda start y end explícitos,
-        # si falta end, asumimos el final del día de 'start'.
-        end = start.replace(hour=23, minute=59, second=59, microsecond=999999)
+    start, end, limit = resolve_timeline_window(start, end, limit)
+    after_key = decode_timeline_cursor(after)
 
-    # Validar límite (ahora es límite de página, no total)
-    if limit > 1000:
-        limit = 1000
-
-    return timeline_service.get_timeline(
+    items = timeline_service.get_timeline(
         db,
         user_id=current_user.id,
         date_start=start,
         date_end=end,
         skip=skip,
         limit=limit,
+        after=after_key,
     )
+    set_timeline_cursor(response, items, limit)
+    return items
+
+
+# Un año como máximo: la respuesta tiene una entrada por día
+MAX_DENSITY_DAYS = 366
+
+
+@router.get("/density", response_model=List[schemas.TimelineDensityDay])
+def read_timeline_density(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Recuento por día de eventos, tareas agendadas y festivos (vista de mes).
+
+    - start: primer día (default: día 1 del mes actual, UTC)
+    - end: último día incluido (default: último día del mes de start)
+    """
+    if not start:
+        start = datetime.now(timezone.utc).date().replace(day=1)
+    if not end:
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        end = next_month - timedelta(days=1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end debe ser posterior a start")
+    if (end - start).days + 1 > MAX_DENSITY_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede superar {MAX_DENSITY_DAYS} días",
+        )
+
+    return timeline_service.get_density(db, current_user.id, start, end)
 
 
 @router.get("/now", response_model=schemas.NowView)
@@ -63,3 +132,41 @@ def read_now_view(
     return timeline_service.get_now_view(
         db, user_id=current_user.id, current_time=datetime.now(timezone.utc)
     )
+
+
+# Ventanas de varias semanas; más allá la respuesta deja de ser útil para planificar
+MAX_FREE_SLOTS_DAYS = 92
+
+
+@router.get("/free-slots", response_model=List[schemas.FreeSlot])
+def read_free_slots(
+    start: datetime = None,
+    end: datetime = None,
+    min_minutes: int = 30,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Huecos libres entre eventos y tareas agendadas.
+
+    - start: inicio de la ventana (default: ahora)
+    - end: fin de la ventana (default: 7 días después de start)
+    - min_minutes: duración mínima de un hueco (default: 30)
+    """
+    if not start:
+        start = datetime.now(timezone.utc)
+    if not end:
+        end = start + timedelta(days=7)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end debe ser posterior a start")
+    if end - start > timedelta(days=MAX_FREE_SLOTS_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango no puede superar {MAX_FREE_SLOTS_DAYS} días",
+        )
+    if min_minutes < 1:
+        raise HTTPException(status_code=400, detail="min_minutes debe ser positivo")
+
+    return availability_service.get_free_slots(
+        db, current_user.id, start, end, min_minutes
+    )
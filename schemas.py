@@ -1,11 +1,13 @@
+import enum
 import re
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
 # --- 1. Enums (Para que coincidan con models.py) ---
 from models import EnergyLevel
+from services.recurrence_service import parse_rule
 
 
 # --- 1.1 Category Schemas ---
@@ -90,6 +92,36 @@ class Task(TaskBase):
         from_attributes = True
 
 
+class EnergyStats(BaseModel):
+    total: int
+    incomplete: int
+
+
+class TaskStats(BaseModel):
+    completed: int
+    incomplete: int
+    total: int
+    overdue: int  # Sin completar y con deadline vencido
+    by_status: Dict[str, int]
+    by_energy: Dict[str, EnergyStats]
+
+
+class ScheduledTask(BaseModel):
+    task_id: int
+    title: str
+    energy_required: EnergyLevel
+    deadline: Optional[datetime] = None
+    planned_start: datetime
+    planned_end: datetime
+    late: bool = False  # No cabe antes del deadline dentro del horizonte
+
+
+class SchedulePlan(BaseModel):
+    items: List[ScheduledTask]
+    unscheduled: List[int]  # Tareas sin hueco en el horizonte
+    applied: Optional[int] = None  # Tareas guardadas (sólo POST)
+
+
 # --- 3.1 Unificación (Timeline) ---
 class TimelineItem(BaseModel):
     id: int
@@ -99,27 +131,51 @@ class TimelineItem(BaseModel):
     type: str  # "event" o "task"
     color: Optional[str] = None
     is_completed: bool = False  # Solo relevante para tareas
+    # Ocurrencias de eventos recurrentes: inicio original (id es el de la serie)
+    recurrence_id: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+class TimelineDensityDay(BaseModel):
+    day: date
+    events: int
+    tasks: int
+    holidays: int
+
+
+class FreeSlot(BaseModel):
+    start: datetime
+    end: datetime
+    minutes: int
+
+
 class NowView(BaseModel):
     current: Optional[TimelineItem] = None
     next: Optional[TimelineItem] = None
 
 
 # --- 4. Schemas de EVENTOS (Events) ---
+def _validate_recurrence_rule(rule: Optional[str], dtstart: Optional[datetime]):
+    if rule is not None:
+        parse_rule(rule, dtstart or datetime.now(timezone.utc))
+    return rule
+
+
 class EventBase(BaseModel):
     title: str = Field(..., min_length=1)
     description: Optional[str] = None
     start_time: datetime
     end_time: datetime
+    # RRULE (RFC 5545), p. ej. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20260630T000000Z"
+    recurrence_rule: Optional[str] = None
 
     @model_validator(mode="after")
     def validate_times(self) -> "EventBase":
         if self.end_time < self.start_time:
             raise ValueError("end_time must be after start_time")
+        _validate_recurrence_rule(self.recurrence_rule, self.start_time)
         return self
 
 
@@ -133,6 +189,34 @@ class EventUpdate(BaseModel):
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     category_id: Optional[int] = None
+    recurrence_rule: Optional[str] = None  # null explícito: deja de repetirse
+
+    @model_validator(mode="after")
+    def validate_rule(self) -> "EventUpdate":
+        _validate_recurrence_rule(self.recurrence_rule, self.start_time)
+        return self
+
+
+class EventExceptionCreate(BaseModel):
+    original_start: datetime  # Inicio de la ocurrencia según la regla
+    is_cancelled: bool = False
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    title: Optional[str] = Field(None, min_length=1)
+
+    @model_validator(mode="after")
+    def validate_times(self) -> "EventExceptionCreate":
+        if self.start_time and self.end_time and self.end_time < self.start_time:
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class EventException(EventExceptionCreate):
+    id: int
+    event_id: int
+
+    class Config:
+        from_attributes = True
 
 
 class Event(EventBase):
@@ -154,24 +238,24 @@ class UserCreate(UserBase):
     country: Optional[str] = "MX"
 
 
-class User(UserBase):
-    id: int
-    is_active: bool = True
-    country: str = "US"
-    tasks: List[Task] = []  # Para ver sus tareas anidadas
+class UserProfile(UserBase):
+    """Perfil ligero (sin hijos): /users/me y registro."""
 
-
-class User(UserBase):
     id: int
     is_active: bool = True
     country: str = "US"
-    tasks: List[Task] = []  # Para ver sus tareas anidadas
-    events: List[Event] = []
 
     class Config:
         from_attributes = True
 
 
+class User(UserProfile):
+    """Usuario con tareas y eventos anidados (sólo /users/me/full)."""
+
+    tasks: List[Task] = []  # Para ver sus tareas anidadas
+    events: List[Event] = []
+
+
 class UserUpdate(BaseModel):
     country: Optional[str] = None
     # Add other fields as needed
@@ -214,6 +298,27 @@ class FocusSessionUpdate(BaseModel):
     feedback_score: Optional[int] = None
 
 
+class FocusInterruptionCreate(BaseModel):
+    occurred_at: Optional[datetime] = None  # Por defecto, el momento de la petición
+    note: Optional[str] = None
+
+
+class FocusInterruptionBatch(BaseModel):
+    interruptions: List[FocusInterruptionCreate] = Field(
+        ..., min_length=1, max_length=100
+    )
+
+
+class FocusInterruption(FocusInterruptionCreate):
+    id: int
+    session_id: int
+    task_id: Optional[int] = None
+    occurred_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class FocusSession(FocusSessionBase):
     id: int
     user_id: int
@@ -224,13 +329,49 @@ class FocusSession(FocusSessionBase):
     interruption_notes: Optional[str] = None
     feedback_score: Optional[int] = None
     status: str
+    paused_seconds: int = 0
+    paused_at: Optional[datetime] = None
+    # Foco efectivo en el momento de la respuesta: el cliente puede seguir
+    # contando localmente mientras status == "active" sin volver a consultar
+    active_seconds: int = 0
 
     class Config:
         from_attributes = True
 
 
+class StatsGroupBy(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class FocusStatsBucket(BaseModel):
+    period_start: date  # Día, lunes de la semana o día 1 del mes
+    sessions: int
+    minutes: int
+    avg_score: Optional[float] = None
+    interruptions: int
+
+
 class FocusStats(BaseModel):
     total_sessions: int
     total_minutes: int
     avg_score: float
     total_interruptions: int
+    buckets: Optional[List[FocusStatsBucket]] = None  # Sólo con ?group_by=
+
+
+class InterruptionHourCount(BaseModel):
+    hour: int  # 0-23, UTC
+    count: int
+
+
+class InterruptionTaskCount(BaseModel):
+    task_id: Optional[int] = None  # None = sesiones sin tarea
+    count: int
+
+
+class InterruptionAnalytics(BaseModel):
+    total: int
+    by_hour: List[InterruptionHourCount]
+    by_task: List[InterruptionTaskCount]
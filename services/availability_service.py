@@ -0,0 +1,111 @@
+"""
+Disponibilidad (free/busy) del usuario.
+
+Los intervalos ocupados salen de las mismas fuentes que el timeline (eventos,
+tareas agendadas y ocurrencias de series) pero sólo se leen las columnas de
+inicio y fin, sin construir objetos ORM. Se ordenan una vez y un barrido lineal
+los fusiona; los huecos entre ellos son los intervalos libres.
+Los festivos no ocupan: son informativos (ver get_holiday_items).
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+import cache
+import models
+from services import recurrence_service, timeline_service
+from timeline_index import as_utc, task_end
+
+
+def get_busy_intervals(
+    db: Session, user_id: int, date_start: datetime, date_end: datetime
+):
+    """Intervalos (inicio, fin) que se solapan con la ventana, sin ordenar ni fusionar."""
+    Event, Task = models.Event, models.Task
+    rows = db.execute(
+        union_all(
+            select(Event.start_time.label("start"), Event.end_time.label("end")).where(
+                timeline_service.event_window_filter(user_id, date_start, date_end)
+            ),
+            select(Task.planned_start, Task.planned_end).where(
+                timeline_service.task_window_filter(user_id, date_start, date_end)
+            ),
+        )
+    )
+    intervals = [(as_utc(start), as_utc(task_end(start, end))) for start, end in rows]
+    intervals.extend(
+        (start, end)
+        for _, start, end, _, _ in recurrence_service.get_occurrences(
+            db, user_id, date_start, date_end
+        )
+    )
+    return intervals
+
+
+def merge_intervals(intervals):
+    """Barrido sobre los intervalos ordenados: fusiona los que se solapan o tocan."""
+    merged = []
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_between(busy, date_start: datetime, date_end: datetime, min_duration):
+    """Huecos de al menos min_duration en [date_start, date_end] dado `busy` ya fusionado."""
+    slots = []
+    cursor = date_start
+    for start, end in busy:
+        if start >= date_end:
+            break
+        if start - cursor >= min_duration:
+            slots.append((cursor, start))
+        cursor = max(cursor, end)
+    if date_end - cursor >= min_duration:
+        slots.append((cursor, date_end))
+    return slots
+
+
+def get_free_slots(
+    db: Session,
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    min_minutes: int = 30,
+):
+    """
+    Intervalos libres de al menos min_minutes en [date_start, date_end], como
+    dicts {start, end, minutes}. Se cachea por versión de datos del usuario.
+    """
+    date_start, date_end = as_utc(date_start), as_utc(date_end)
+    key = (
+        "free_slots",
+        user_id,
+        date_start,
+        date_end,
+        min_minutes,
+        cache.timeline_version(db, user_id),
+    )
+    cached = cache.timeline_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    busy = merge_intervals(get_busy_intervals(db, user_id, date_start, date_end))
+    slots = [
+        {
+            "start": start,
+            "end": end,
+            "minutes": int((end - start).total_seconds() // 60),
+        }
+        for start, end in free_between(
+            busy, date_start, date_end, timedelta(minutes=min_minutes)
+        )
+    ]
+    cache.timeline_cache.set(key, slots)
+    return list(slots)
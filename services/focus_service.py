@@ -0,0 +1,364 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Integer, case, cast, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import cache
+import models
+
+OPEN_STATUSES = ("active", "paused")
+
+
+def remember_active_session(user_id: int, session_id: int = None):
+    """Actualiza la caché tras start/stop/pause/resume (0 = sin sesión abierta)."""
+    cache.active_focus_cache.set(user_id, session_id or 0)
+
+
+def get_active_session(db: Session, user_id: int):
+    """
+    Sesión de focus no completada (activa o pausada) del usuario.
+    Con la caché caliente cuesta como mucho una búsqueda por clave primaria
+    (y ninguna consulta si sabemos que no hay sesión abierta).
+    """
+    cached_id = cache.active_focus_cache.get(user_id)
+    if cached_id == 0:
+        return None
+    if cached_id is not None:
+        session = db.get(models.FocusSession, cached_id)
+        if (
+            session is not None
+            and session.user_id == user_id
+            and session.status in OPEN_STATUSES
+        ):
+            return session
+        # Cambió en otro worker: se resuelve con la consulta normal
+
+    session = (
+        db.query(models.FocusSession)
+        .filter(
+            models.FocusSession.user_id == user_id,
+            models.FocusSession.status.in_(OPEN_STATUSES),
+        )
+        .first()
+    )
+    remember_active_session(user_id, session.id if session else None)
+    return session
+
+
+def _bucket_expr(db: Session, column, group_by: str, utc: bool = True):
+    """
+    Expresión SQL que trunca `column` al inicio del día/semana (lunes)/mes.
+    Con utc=True (columnas timestamptz) el día es el UTC, igual que _session_day()
+    en las actualizaciones incrementales, sea cual sea el TimeZone de PostgreSQL.
+    Las columnas DATE (focus_daily_rollup.day) se truncan tal cual: utc=False.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        if group_by == "week":
+            # 'weekday 0' avanza al domingo (o se queda si ya lo es); -6 días = lunes
+            return func.date(column, "weekday 0", "-6 days")
+        if group_by == "month":
+            return func.strftime("%Y-%m-01", column)
+        return func.date(column)
+    if utc:
+        column = func.timezone("UTC", column)
+    return func.date(func.date_trunc(group_by, column))
+
+
+def get_focus_stats(db: Session, user_id: int):
+    """Totales de focus calculados en la BD (una fila, sin cargar sesiones)."""
+    FocusSession = models.FocusSession
+    total_sessions, total_minutes, avg_score, total_interruptions = (
+        db.query(
+            func.count(FocusSession.id),
+            func.coalesce(func.sum(FocusSession.duration_minutes), 0),
+            func.avg(FocusSession.feedback_score),
+            func.coalesce(func.sum(FocusSession.interruptions), 0),
+        )
+        .filter(FocusSession.user_id == user_id)
+        .one()
+    )
+    return {
+        "total_sessions": total_sessions,
+        "total_minutes": total_minutes,
+        "avg_score": float(avg_score) if avg_score is not None else 0.0,
+        "total_interruptions": total_interruptions,
+    }
+
+
+def get_focus_buckets(
+    db: Session,
+    user_id: int,
+    group_by: str,
+    date_start: datetime = None,
+    date_end: datetime = None,
+):
+    """
+    Estadísticas por día/semana/mes (GROUP BY sobre el inicio de la sesión).
+    Devuelve una fila por periodo con actividad, ordenadas cronológicamente.
+    """
+    FocusSession = models.FocusSession
+    bucket = _bucket_expr(db, FocusSession.start_time, group_by).label("bucket")
+    query = db.query(
+        bucket,
+        func.count(FocusSession.id),
+        func.coalesce(func.sum(FocusSession.duration_minutes), 0),
+        func.avg(FocusSession.feedback_score),
+        func.coalesce(func.sum(FocusSession.interruptions), 0),
+    ).filter(FocusSession.user_id == user_id)
+    if date_start is not None:
+        query = query.filter(FocusSession.start_time >= date_start)
+    if date_end is not None:
+        query = query.filter(FocusSession.start_time <= date_end)
+
+    rows = query.group_by(bucket).order_by(bucket).all()
+    return [
+        {
+            "period_start": (
+                date.fromisoformat(period) if isinstance(period, str) else period
+            ),
+            "sessions": sessions,
+            "minutes": minutes,
+            "avg_score": float(avg_score) if avg_score is not None else None,
+            "interruptions": interruptions,
+        }
+        for period, sessions, minutes, avg_score, interruptions in rows
+    ]
+
+
+# --- ROLLUP DIARIO (focus_daily_rollup) ---
+# Contrato: una sesión cuenta en `sessions`/`minutes`/`score_*` al completarse y sus
+# interrupciones cuentan al registrarse, siempre en el día UTC de su inicio.
+_ROLLUP_COUNTERS = ("sessions", "minutes", "interruptions", "score_sum", "score_count")
+
+
+def _session_day(session: models.FocusSession) -> date:
+    start = session.start_time
+    if start.tzinfo is not None:
+        start = start.astimezone(timezone.utc)
+    return start.date()
+
+
+def _add_to_rollup(db: Session, user_id: int, day: date, **increments):
+    """UPSERT que suma los incrementos a la fila (user_id, day)."""
+    values = {name: increments.get(name, 0) for name in _ROLLUP_COUNTERS}
+    dialect = db.get_bind().dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert_fn(models.FocusDailyRollup).values(user_id=user_id, day=day, **values)
+    table = models.FocusDailyRollup.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day],
+        set_={name: table.c[name] + stmt.excluded[name] for name in _ROLLUP_COUNTERS},
+    )
+    db.execute(stmt)
+
+
+def record_session_completed(db: Session, session: models.FocusSession):
+    score = session.feedback_score
+    _add_to_rollup(
+        db,
+        session.user_id,
+        _session_day(session),
+        sessions=1,
+        minutes=session.duration_minutes or 0,
+        score_sum=score or 0,
+        score_count=1 if score is not None else 0,
+    )
+
+
+# Columnas que escribe FocusSession.finish()
+_FINISH_COLUMNS = (
+    "end_time",
+    "status",
+    "duration_minutes",
+    "paused_seconds",
+    "paused_at",
+    "feedback_score",
+)
+
+
+def finish_session(
+    db: Session, session: models.FocusSession, now: datetime, feedback_score=None
+) -> bool:
+    """
+    Cierra la sesión con un UPDATE ... WHERE end_time IS NULL y, sólo si esta
+    petición es la que la cerró, la suma al rollup diario. Dos /stop simultáneos
+    sobre la misma sesión ya no la cuentan dos veces. No hace commit.
+    """
+    session.finish(now)
+    if feedback_score:
+        session.feedback_score = feedback_score
+    values = {name: getattr(session, name) for name in _FINISH_COLUMNS}
+    session_id = session.id
+
+    # Descartar los cambios en memoria: la única escritura es el UPDATE condicional
+    # (y no tocar la instancia hasta después, o se recargaría con los valores viejos)
+    db.expire(session)
+
+    FocusSession = models.FocusSession
+    result = db.execute(
+        update(FocusSession)
+        .where(FocusSession.id == session_id, FocusSession.end_time.is_(None))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        return False
+    record_session_completed(db, session)
+    return True
+
+
+def record_interruptions(db: Session, session: models.FocusSession, count: int = 1):
+    _add_to_rollup(db, session.user_id, _session_day(session), interruptions=count)
+
+
+# --- Registro de interrupciones ---
+def log_interruptions(db: Session, session: models.FocusSession, entries):
+    """
+    Inserta en bloque las interrupciones `entries` (pares occurred_at, note) y
+    actualiza el contador de la sesión y el rollup diario. No hace commit.
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "session_id": session.id,
+            "user_id": session.user_id,
+            "task_id": session.task_id,
+            "occurred_at": occurred_at or now,
+            "note": note,
+        }
+        for occurred_at, note in entries
+    ]
+    if not rows:
+        return 0
+    db.execute(insert(models.FocusInterruption), rows)
+    # Incremento en SQL: dos peticiones simultáneas no se pisan el contador
+    session.interruptions = func.coalesce(models.FocusSession.interruptions, 0) + len(
+        rows
+    )
+    record_interruptions(db, session, len(rows))
+    return len(rows)
+
+
+def _hour_expr(db: Session, column):
+    """Hora del día (0-23, UTC) de `column`."""
+    if db.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%H", column), Integer)
+    return cast(func.extract("hour", func.timezone("UTC", column)), Integer)
+
+
+def get_interruption_analytics(
+    db: Session,
+    user_id: int,
+    date_start: datetime = None,
+    date_end: datetime = None,
+):
+    """
+    Interrupciones del usuario por hora del día y por tarea.
+    Ambas agregaciones se resuelven con los índices (user_id, occurred_at) y
+    (user_id, task_id) de focus_interruptions.
+    """
+    filters = [models.FocusInterruption.user_id == user_id]
+    if date_start:
+        filters.append(models.FocusInterruption.occurred_at >= date_start)
+    if date_end:
+        filters.append(models.FocusInterruption.occurred_at <= date_end)
+
+    hour = _hour_expr(db, models.FocusInterruption.occurred_at).label("hour")
+    by_hour = (
+        db.query(hour, func.count().label("count"))
+        .filter(*filters)
+        .group_by(hour)
+        .order_by(hour)
+        .all()
+    )
+    count = func.count().label("count")
+    by_task = (
+        db.query(models.FocusInterruption.task_id, count)
+        .filter(*filters)
+        .group_by(models.FocusInterruption.task_id)
+        .order_by(count.desc(), models.FocusInterruption.task_id)
+        .all()
+    )
+    return {
+        "total": sum(row.count for row in by_hour),
+        "by_hour": [{"hour": row.hour, "count": row.count} for row in by_hour],
+        "by_task": [{"task_id": row.task_id, "count": row.count} for row in by_task],
+    }
+
+
+def rebuild_focus_rollup(db: Session, user_id: int = None):
+    """
+    Recalcula el rollup desde focus_sessions (INSERT ... SELECT ... GROUP BY).
+    Sin user_id reconstruye todos los usuarios. No hace commit.
+    """
+    FocusSession = models.FocusSession
+    rollup = models.FocusDailyRollup
+    completed = FocusSession.status == "completed"
+
+    day = _bucket_expr(db, FocusSession.start_time, "day")
+    select_stmt = select(
+        FocusSession.user_id,
+        day,
+        func.sum(case((completed, 1), else_=0)),
+        func.sum(
+            case((completed, func.coalesce(FocusSession.duration_minutes, 0)), else_=0)
+        ),
+        func.coalesce(func.sum(FocusSession.interruptions), 0),
+        func.sum(
+            case((completed, func.coalesce(FocusSession.feedback_score, 0)), else_=0)
+        ),
+        func.sum(
+            case((completed & FocusSession.feedback_score.isnot(None), 1), else_=0)
+        ),
+    ).group_by(FocusSession.user_id, day)
+
+    delete_stmt = delete(rollup)
+    if user_id is not None:
+        select_stmt = select_stmt.where(FocusSession.user_id == user_id)
+        delete_stmt = delete_stmt.where(rollup.user_id == user_id)
+
+    db.execute(delete_stmt)
+    db.execute(
+        insert(rollup).from_select(["user_id", "day", *_ROLLUP_COUNTERS], select_stmt)
+    )
+
+
+def get_rollup_buckets(
+    db: Session,
+    user_id: int,
+    group_by: str = "day",
+    date_start: date = None,
+    date_end: date = None,
+):
+    """Lee el rollup (O(días)) agrupado por día/semana/mes."""
+    rollup = models.FocusDailyRollup
+    bucket = _bucket_expr(db, rollup.day, group_by, utc=False).label("bucket")
+    score_sum = func.sum(rollup.score_sum)
+    score_count = func.sum(rollup.score_count)
+    query = db.query(
+        bucket,
+        func.sum(rollup.sessions),
+        func.sum(rollup.minutes),
+        score_sum,
+        score_count,
+        func.sum(rollup.interruptions),
+    ).filter(rollup.user_id == user_id)
+    if date_start is not None:
+        query = query.filter(rollup.day >= date_start)
+    if date_end is not None:
+        query = query.filter(rollup.day <= date_end)
+
+    rows = query.group_by(bucket).order_by(bucket).all()
+    return [
+        {
+            "period_start": (
+                date.fromisoformat(period) if isinstance(period, str) else period
+            ),
+            "sessions": sessions,
+            "minutes": minutes,
+            "avg_score": total_score / scored if scored else None,
+            "interruptions": interruptions,
+        }
+        for period, sessions, minutes, total_score, scored, interruptions in rows
+    ]
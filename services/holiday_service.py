@@ -0,0 +1,64 @@
+"""
+Índice de festivos en memoria, por (país, año).
+
+Generar festivos con la librería holidays es caro (cálculo perezoso por año) y el
+timeline lo pedía en cada petición, recorriendo el rango día a día. Aquí cada
+(país, año) se calcula una sola vez por proceso como un par de tuplas ordenadas
+(fechas, nombres) y los rangos se resuelven con bisect.
+"""
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from functools import lru_cache
+
+import holidays
+
+DEFAULT_COUNTRY = "US"
+# ~50 países x 3 años en uso a la vez sobra para una instancia
+HOLIDAY_INDEX_SIZE = int(os.getenv("HOLIDAY_INDEX_SIZE", 256))
+# Sólo se indexan los años a esta distancia del actual: una ventana de años 1-9999
+# no debe construir miles de índices ni vaciar la caché de los demás países
+HOLIDAY_YEAR_RANGE = int(os.getenv("HOLIDAY_YEAR_RANGE", 10))
+
+
+@lru_cache(maxsize=HOLIDAY_INDEX_SIZE)
+def _year_index(country_code: str, year: int):
+    try:
+        calendar = holidays.country_holidays(country_code, years=year)
+    except Exception:
+        # País desconocido para la librería: mismo fallback que antes (EE.UU.)
+        calendar = holidays.country_holidays(DEFAULT_COUNTRY, years=year)
+    items = sorted(calendar.items())
+    return tuple(day for day, _ in items), tuple(name for _, name in items)
+
+
+def holidays_between(country_code: str, date_start: date, date_end: date):
+    """
+    Lista de (fecha, nombre) de los festivos en [date_start, date_end]. Fuera de
+    HOLIDAY_YEAR_RANGE años alrededor del actual no se devuelven festivos.
+    """
+    country_code = country_code or DEFAULT_COUNTRY
+    current_year = datetime.now(timezone.utc).year
+    first_year = max(date_start.year, current_year - HOLIDAY_YEAR_RANGE)
+    last_year = min(date_end.year, current_year + HOLIDAY_YEAR_RANGE)
+    result = []
+    for year in range(first_year, last_year + 1):
+        days, names = _year_index(country_code, year)
+        lo = bisect_left(days, date_start)
+        hi = bisect_right(days, date_end)
+        result.extend(zip(days[lo:hi], names[lo:hi]))
+    return result
+
+
+def index_stats() -> dict:
+    info = _year_index.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+def clear_index():
+    _year_index.cache_clear()
@@ -0,0 +1,67 @@
+"""
+Cursores opacos para paginación por clave (keyset).
+
+El cursor codifica la clave de ordenación del último elemento devuelto, p.ej.
+(start_time, id). La siguiente página se pide con ?after=<cursor> y la consulta
+continúa con `WHERE (sort_key, id) > (...)` sobre un índice, sin recorrer las filas
+ya servidas como hace OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _matches(value, expected: type) -> bool:
+    # bool es subclase de int, pero nunca es un id válido
+    return isinstance(value, expected) and not (
+        expected is int and isinstance(value, bool)
+    )
+
+
+def decode_cursor(cursor: str, types: tuple) -> tuple:
+    """
+    Devuelve la tupla codificada, con un valor de cada tipo de `types` (p. ej.
+    (datetime, int)); lanza InvalidCursor si no es válida o no coincide.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise InvalidCursor("Invalid cursor")
+        decoded = tuple(_decode_value(v) for v in values)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if not all(_matches(v, t) for v, t in zip(decoded, types)):
+        raise InvalidCursor("Invalid cursor")
+    return decoded
+
+
+def next_cursor(items, limit: int, key):
+    """Cursor para la siguiente página, o None si ésta fue la última."""
+    if not items or len(items) < limit:
+        return None
+    return encode_cursor(*key(items[-1]))
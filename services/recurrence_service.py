@@ -0,0 +1,183 @@
+"""
+Eventos recurrentes (RRULE, RFC 5545) con excepciones.
+
+Una serie es una sola fila de events: start_time/end_time son la primera
+ocurrencia y recurrence_rule la regla (p. ej. "FREQ=WEEKLY;BYDAY=MO,WE").
+Las ocurrencias no se guardan: se generan bajo demanda sólo dentro de la ventana
+pedida, así que el coste no depende de lo lejos que llegue la serie.
+EventException cancela o modifica ocurrencias concretas.
+"""
+from datetime import datetime, timedelta
+
+from dateutil.rrule import DAILY, rrule, rrulestr
+from sqlalchemy import or_
+from sqlalchemy.orm import Session, joinedload
+
+import cache
+import models
+from timeline_index import as_utc
+
+# Como mucho una ocurrencia por día y un número acotado de repeticiones: así
+# expandir una ventana (p. ej. 92 días de /timeline/free-slots) o calcular el fin
+# de la serie al guardarla cuesta lo mismo llegue la serie hasta donde llegue
+MAX_RECURRENCE_COUNT = 1000
+
+
+def parse_rule(rule: str, dtstart: datetime) -> rrule:
+    """
+    Valida y construye la regla; lanza ValueError si no es una RRULE simple,
+    repite más de una vez al día o supera MAX_RECURRENCE_COUNT repeticiones.
+    """
+    try:
+        parsed = rrulestr(rule, dtstart=as_utc(dtstart))
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"recurrence_rule inválida: {exc}") from exc
+    if not isinstance(parsed, rrule):
+        raise ValueError("recurrence_rule debe ser una sola RRULE")
+    # dateutil no expone la regla ya normalizada: se leen sus atributos internos
+    per_day = (
+        len(parsed._byhour or ())
+        * len(parsed._byminute or ())
+        * len(parsed._bysecond or ())
+    )
+    if parsed._freq > DAILY or per_day > 1:
+        raise ValueError("recurrence_rule no puede repetirse más de una vez al día")
+    if parsed._count is not None and parsed._count > MAX_RECURRENCE_COUNT:
+        raise ValueError(
+            f"recurrence_rule: COUNT no puede superar {MAX_RECURRENCE_COUNT}"
+        )
+    return parsed
+
+
+def series_until(start_time: datetime, end_time: datetime, rule: str):
+    """
+    Cota superior del fin de la serie, o None si no tiene fin (sin COUNT ni
+    UNTIL). Se guarda en recurrence_until para buscar series por índice, así que
+    basta con que no se quede corta: con UNTIL no hace falta recorrer la regla.
+    """
+    parsed = parse_rule(rule, start_time)
+    duration = as_utc(end_time) - as_utc(start_time)
+    if parsed._until is not None:
+        try:
+            return max(as_utc(parsed._until), as_utc(start_time)) + duration
+        except OverflowError:
+            return None  # UNTIL en el año 9999: a efectos prácticos no termina
+    if parsed._count is None:
+        return None
+    last = None
+    for last in parsed:  # Como mucho MAX_RECURRENCE_COUNT ocurrencias
+        pass
+    if last is None:
+        return as_utc(start_time)
+    return last + duration
+
+
+def _overlaps(start: datetime, end: datetime, date_start, date_end) -> bool:
+    return start <= date_end and (start >= date_start or end > date_start)
+
+
+def expand_occurrences(
+    event: models.Event, exceptions, date_start: datetime, date_end: datetime
+):
+    """
+    Genera (inicio, fin, título, inicio_original) de las ocurrencias que se solapan
+    con la ventana, aplicando cancelaciones y modificaciones. Perezoso: la regla
+    se recorre desde la ventana y se corta al pasar date_end.
+    """
+    first_start = as_utc(event.start_time)
+    duration = as_utc(event.end_time) - first_start
+    by_original = {as_utc(exc.original_start): exc for exc in exceptions}
+
+    # Una ocurrencia que empezó antes de la ventana la solapa si aún no terminó
+    search_from = date_start - duration - timedelta(microseconds=1)
+    for original in parse_rule(event.recurrence_rule, first_start).xafter(
+        search_from, inc=False
+    ):
+        if original > date_end:
+            break
+        exc = by_original.pop(original, None)
+        if exc is None:
+            if _overlaps(original, original + duration, date_start, date_end):
+                yield original, original + duration, event.title, original
+            continue
+        if exc.is_cancelled:
+            continue
+        start, end = _override_times(exc, original, duration)
+        if _overlaps(start, end, date_start, date_end):
+            yield start, end, exc.title or event.title, original
+
+    # Ocurrencias movidas a la ventana desde fuera de ella
+    for original, exc in by_original.items():
+        if exc.is_cancelled or exc.start_time is None:
+            continue
+        start, end = _override_times(exc, original, duration)
+        if _overlaps(start, end, date_start, date_end):
+            yield start, end, exc.title or event.title, original
+
+
+def _override_times(exc: models.EventException, original: datetime, duration):
+    start = as_utc(exc.start_time) if exc.start_time else original
+    end = as_utc(exc.end_time) if exc.end_time else start + duration
+    return start, end
+
+
+def get_occurrences(
+    db: Session, user_id: int, date_start: datetime, date_end: datetime
+):
+    """
+    Ocurrencias de todas las series del usuario en la ventana, ordenadas por inicio,
+    como (event, inicio, fin, título, inicio_original).
+
+    Las expansiones se cachean por (serie, ventana, versión de datos del usuario);
+    las excepciones sólo se leen para las series que no estaban en caché.
+    """
+    Event = models.Event
+    series = (
+        db.query(Event)
+        .options(joinedload(Event.category))
+        .filter(
+            Event.user_id == user_id,
+            Event.recurrence_rule.is_not(None),
+            Event.start_time <= date_end,
+            or_(
+                Event.recurrence_until.is_(None),
+                Event.recurrence_until > date_start,
+            ),
+        )
+        .all()
+    )
+    if not series:
+        return []
+
+    version = cache.timeline_version(db, user_id)
+    expansions, missing = {}, []
+    for event in series:
+        key = (event.id, date_start, date_end, version)
+        cached = cache.occurrence_cache.get(key)
+        if cached is None:
+            missing.append(event)
+        else:
+            expansions[event.id] = cached
+
+    if missing:
+        exceptions = {}
+        for exc in db.query(models.EventException).filter(
+            models.EventException.event_id.in_([e.id for e in missing])
+        ):
+            exceptions.setdefault(exc.event_id, []).append(exc)
+        for event in missing:
+            occurrences = list(
+                expand_occurrences(
+                    event, exceptions.get(event.id, []), date_start, date_end
+                )
+            )
+            cache.occurrence_cache.set(
+                (event.id, date_start, date_end, version), occurrences
+            )
+            expansions[event.id] = occurrences
+
+    result = [
+        (event, *occurrence) for event in series for occurrence in expansions[event.id]
+    ]
+    result.sort(key=lambda row: (row[1], row[0].id))
+    return result
@@ -0,0 +1,298 @@
+"""
+Agenda automática (time blocking) de tareas pendientes.
+
+Toma las tareas pendientes sin planned_start y los huecos libres del usuario
+(services/availability_service.py) dentro del horario de trabajo, y propone un
+plan:
+
+1. Orden EDF (earliest deadline first): primero lo que vence antes; las tareas
+   sin deadline van al final, por antigüedad.
+2. Colocación según energía: las de energía alta buscan el primer hueco de la
+   mañana (pico de concentración) y las de energía baja el primero de la tarde;
+   si no cabe en su franja antes del deadline se usa el primer hueco de cualquier
+   franja. Las que ya no llegan a tiempo se agendan después de todas las demás
+   con deadline (sin quitarles huecos), en el primero libre, marcadas como `late`.
+
+Las horas son UTC (el usuario no tiene zona horaria guardada). No se agenda en
+días no laborables (SCHEDULER_WORKDAYS, por defecto de lunes a viernes) ni en
+los festivos del país del usuario. El plan se aplica con un solo UPDATE masivo.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+import cache
+import models
+import timeline_index
+from services import availability_service, timeline_service
+
+SCHEDULER_HORIZON_DAYS = int(os.getenv("SCHEDULER_HORIZON_DAYS", 28))
+SCHEDULER_DAY_START_HOUR = int(os.getenv("SCHEDULER_DAY_START_HOUR", 9))
+SCHEDULER_DAY_END_HOUR = int(os.getenv("SCHEDULER_DAY_END_HOUR", 18))
+# Días laborables (0 = lunes ... 6 = domingo)
+SCHEDULER_WORKDAYS = frozenset(
+    int(day) for day in os.getenv("SCHEDULER_WORKDAYS", "0,1,2,3,4").split(",")
+)
+# Separa la franja de mañana de la de tarde
+SCHEDULER_MIDDAY_HOUR = int(os.getenv("SCHEDULER_MIDDAY_HOUR", 13))
+
+# Las tareas no tienen duración propia: se bloquea lo que asume el timeline
+TASK_DURATION = timeline_index.TASK_DEFAULT_DURATION
+# Los bloques empiezan en múltiplos de este paso
+SLOT_STEP = timedelta(minutes=15)
+
+MORNING, AFTERNOON = "morning", "afternoon"
+ENERGY_PERIODS = {
+    models.EnergyLevel.high: MORNING,
+    models.EnergyLevel.medium: None,  # Cualquier franja
+    models.EnergyLevel.low: AFTERNOON,
+}
+
+
+def _round_up(value: datetime, step: timedelta = SLOT_STEP) -> datetime:
+    midnight = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    steps = -(-(value - midnight) // step)
+    return midnight + steps * step
+
+
+def _off_hours(date_start: datetime, date_end: datetime, days_off=frozenset()):
+    """
+    Intervalos fuera del horario de trabajo entre date_start y date_end: las
+    noches, y el día entero si no es laborable o está en `days_off`.
+    """
+    day = timeline_index.day_start(timeline_index.utc_date(date_start))
+    intervals = []
+    while day < date_end:
+        next_day = day + timedelta(days=1)
+        if day.weekday() not in SCHEDULER_WORKDAYS or day.date() in days_off:
+            intervals.append((day, next_day))
+        else:
+            intervals.append((day, day + timedelta(hours=SCHEDULER_DAY_START_HOUR)))
+            intervals.append((day + timedelta(hours=SCHEDULER_DAY_END_HOUR), next_day))
+        day = next_day
+    return intervals
+
+
+def split_periods(slots):
+    """Parte los huecos a mediodía: [inicio, fin, franja], ordenados."""
+    fragments = []
+    for start, end in slots:
+        midday = timeline_index.day_start(timeline_index.utc_date(start)) + timedelta(
+            hours=SCHEDULER_MIDDAY_HOUR
+        )
+        if start < midday < end:
+            fragments.append([start, midday, MORNING])
+            fragments.append([midday, end, AFTERNOON])
+        else:
+            fragments.append([start, end, MORNING if start < midday else AFTERNOON])
+    return fragments
+
+
+def get_schedulable_slots(
+    db: Session, user_id: int, date_start: datetime, date_end: datetime
+):
+    """Huecos libres en horario de trabajo donde cabe al menos una tarea."""
+    busy = availability_service.get_busy_intervals(db, user_id, date_start, date_end)
+    holidays = {
+        item["start"].date()
+        for item in timeline_service.get_holiday_items(
+            db, user_id, date_start, date_end
+        )
+    }
+    busy.extend(_off_hours(date_start, date_end, holidays))
+    slots = availability_service.free_between(
+        availability_service.merge_intervals(busy), date_start, date_end, TASK_DURATION
+    )
+    fragments = split_periods((_round_up(start), end) for start, end in slots)
+    return [f for f in fragments if f[1] - f[0] >= TASK_DURATION]
+
+
+def edf_key(task) -> tuple:
+    deadline = task.deadline and timeline_index.as_utc(task.deadline)
+    return (
+        deadline is None,
+        deadline or datetime.max.replace(tzinfo=timezone.utc),
+        task.id,
+    )
+
+
+def _find_fragment(fragments, duration, deadline, period):
+    fallback = None
+    for i, (start, end, fragment_period) in enumerate(fragments):
+        if end - start < duration:
+            continue
+        if deadline is not None and start + duration > deadline:
+            break  # Ordenados: los siguientes terminan aún más tarde
+        if period is None or fragment_period == period:
+            return i
+        if fallback is None:
+            fallback = i
+    return fallback
+
+
+def _place(fragments, i, duration):
+    start = fragments[i][0]
+    end = start + duration
+    if fragments[i][1] - end < duration:
+        fragments.pop(i)
+    else:
+        fragments[i][0] = end
+    return start, end
+
+
+def plan_schedule(tasks, fragments, duration: timedelta = TASK_DURATION):
+    """
+    Reparte `tasks` (con id, energy_required y deadline) en `fragments` (de
+    split_periods; se consumen) y devuelve (plan, ids sin hueco). Cada entrada del
+    plan es (tarea, inicio, fin, late).
+
+    Primera pasada: en orden EDF, las tareas que aún llegan a su deadline. Las que
+    no llegan se apartan para no quitar huecos a las siguientes y se agendan en
+    una segunda pasada, lo antes posible, antes que las que no tienen deadline.
+    """
+    plan, late, unscheduled = [], [], []
+    ordered = sorted(tasks, key=edf_key)
+    undated = [task for task in ordered if task.deadline is None]
+
+    for task in ordered:
+        if task.deadline is None:
+            continue
+        i = _find_fragment(
+            fragments,
+            duration,
+            timeline_index.as_utc(task.deadline),
+            ENERGY_PERIODS.get(task.energy_required),
+        )
+        if i is None:
+            late.append(task)
+            continue
+        plan.append((task, *_place(fragments, i, duration), False))
+
+    # Las tardías, en el primer hueco; las demás, en su franja si queda
+    second_pass = [(task, None) for task in late] + [
+        (task, ENERGY_PERIODS.get(task.energy_required)) for task in undated
+    ]
+    for task, period in second_pass:
+        i = _find_fragment(fragments, duration, None, period)
+        if i is None:
+            unscheduled.append(task.id)
+            continue
+        plan.append((task, *_place(fragments, i, duration), task.deadline is not None))
+
+    plan.sort(key=lambda entry: entry[1])
+    return plan, unscheduled
+
+
+def get_pending_tasks(db: Session, user_id: int):
+    """Tareas pendientes sin agendar (sólo las columnas que usa el plan)."""
+    Task = models.Task
+    return db.execute(
+        select(Task.id, Task.title, Task.energy_required, Task.deadline).where(
+            Task.user_id == user_id,
+            Task.status == models.TaskStatus.pending,
+            Task.is_completed.is_not(True),
+            Task.planned_start.is_(None),
+        )
+    ).all()
+
+
+def propose_schedule(
+    db: Session,
+    user_id: int,
+    now: datetime = None,
+    horizon_days: int = SCHEDULER_HORIZON_DAYS,
+):
+    """Plan propuesto para los próximos horizon_days días, sin guardar nada."""
+    date_start = _round_up(timeline_index.as_utc(now or datetime.now(timezone.utc)))
+    date_end = date_start + timedelta(days=horizon_days)
+
+    tasks = get_pending_tasks(db, user_id)
+    if not tasks:
+        return {"items": [], "unscheduled": []}
+    fragments = get_schedulable_slots(db, user_id, date_start, date_end)
+    plan, unscheduled = plan_schedule(tasks, fragments)
+    return {
+        "items": [
+            {
+                "task_id": task.id,
+                "title": task.title,
+                "energy_required": task.energy_required,
+                "deadline": task.deadline and timeline_index.as_utc(task.deadline),
+                "planned_start": start,
+                "planned_end": end,
+                "late": late,
+            }
+            for task, start, end, late in plan
+        ],
+        "unscheduled": unscheduled,
+    }
+
+
+def apply_schedule(db: Session, user_id: int, items) -> int:
+    """
+    Guarda el plan en un solo UPDATE masivo. Sólo toca tareas que siguen sin
+    agendar (si el usuario agendó alguna entre medias se respeta su horario).
+    Devuelve cuántas tareas se actualizaron.
+    """
+    if not items:
+        return 0
+    Task = models.Task
+    table = Task.__table__
+    db.execute(
+        update(table)
+        .where(
+            table.c.id == bindparam("task_id"),
+            table.c.user_id == user_id,
+            table.c.planned_start.is_(None),
+        )
+        .values(
+            planned_start=bindparam("new_start"),
+            planned_end=bindparam("new_end"),
+        ),
+        [
+            {
+                "task_id": item["task_id"],
+                "new_start": item["planned_start"],
+                "new_end": item["planned_end"],
+            }
+            for item in items
+        ],
+    )
+
+    # Qué filas cambió de verdad el UPDATE: una tarea agendada a mano entre el
+    # plan y la escritura conserva su horario y sus filas del índice
+    planned = {
+        (item["task_id"], item["planned_start"], item["planned_end"]) for item in items
+    }
+    rows = db.execute(
+        select(Task.id, Task.planned_start, Task.planned_end).where(
+            Task.id.in_([item["task_id"] for item in items])
+        )
+    )
+    applied = []
+    for task_id, start, end in rows:
+        if start is None or end is None:
+            continue
+        interval = (task_id, timeline_index.as_utc(start), timeline_index.as_utc(end))
+        if interval in planned:
+            applied.append(interval)
+    # El UPDATE masivo no pasa por los listeners de timeline_index
+    if applied:
+        timeline_index.index_task_intervals(db, user_id, applied)
+        cache.invalidate_timeline(db, user_id)
+    db.commit()
+    return len(applied)
+
+
+def schedule_user(
+    db: Session,
+    user_id: int,
+    now: datetime = None,
+    horizon_days: int = SCHEDULER_HORIZON_DAYS,
+):
+    """Calcula y aplica el plan (p. ej. desde una tarea nocturna)."""
+    proposal = propose_schedule(db, user_id, now=now, horizon_days=horizon_days)
+    proposal["applied"] = apply_schedule(db, user_id, proposal["items"])
+    return proposal
@@ -1,10 +1,27 @@
-from datetime import datetime, timedelta, timezone
+import heapq
+import os
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
 
-import holidays
+from sqlalchemy import and_, case, func, literal, or_, select, union, union_all
 from sqlalchemy.orm import Session, joinedload
 
+import cache
 import crud
 import models
+import timeline_index
+from services import holiday_service, recurrence_service
+
+# Estrategia de get_timeline: "sql" (UNION ALL paginado en la BD) o "python"
+# (merge en memoria, se conserva para comparar resultados y rendimiento)
+TIMELINE_STRATEGIES = ("sql", "python")
+TIMELINE_STRATEGY = os.getenv("TIMELINE_STRATEGY", "sql")
+
+EVENT_DEFAULT_COLOR = "#ccc"
+TASK_COLOR = "#ff9f43"  # Orange for tasks
+HOLIDAY_COLOR = "#e91e63"
+TASK_DEFAULT_DURATION = timeline_index.TASK_DEFAULT_DURATION
 
 
 def ensure_utc(dt: datetime):
@@ -13,6 +30,182 @@ def ensure_utc(dt: datetime):
     return dt
 
 
+def timeline_sort_key(item: dict):
+    """Orden total del timeline: inicio, tipo e id (desempata elementos simultáneos)."""
+    return (item["start"], item["type"], item["id"])
+
+
+def _task_end(planned_start: datetime, planned_end: datetime) -> datetime:
+    return timeline_index.task_end(planned_start, planned_end)
+
+
+# --- Ventana del timeline ---
+# Un elemento entra si se solapa con [date_start, date_end]: empieza dentro o
+# empezó antes y sigue en curso. Los candidatos salen de dos búsquedas por índice
+# (inicio desde la medianoche de date_start, y timeline_day_index para lo que viene
+# de días anteriores) y sobre ellos se aplica la condición exacta de solape.
+def _window_candidates(
+    model, start_col, item_type: str, user_id: int, date_start, date_end, lookback
+):
+    first_day = timeline_index.utc_date(date_start)
+    started = select(model.id).where(
+        model.user_id == user_id,
+        start_col >= timeline_index.day_start(first_day) - lookback,
+        start_col <= date_end,
+    )
+    index = models.TimelineDayIndex
+    spanning = select(index.item_id).where(
+        index.user_id == user_id,
+        index.day >= first_day,
+        index.day <= timeline_index.utc_date(date_end),
+        index.item_type == item_type,
+    )
+    return union(started, spanning)
+
+
+def event_window_filter(user_id: int, date_start: datetime, date_end: datetime):
+    Event = models.Event
+    # Sin user_id fuera del IN (los candidatos ya son del usuario): así el
+    # planificador resuelve el IN por clave primaria en vez de recorrer el índice
+    return and_(
+        Event.id.in_(
+            _window_candidates(
+                Event,
+                Event.start_time,
+                "event",
+                user_id,
+                date_start,
+                date_end,
+                timedelta(0),
+            )
+        ),
+        # Las series recurrentes se expanden aparte (get_occurrence_items)
+        Event.recurrence_rule.is_(None),
+        Event.start_time <= date_end,
+        or_(Event.start_time >= date_start, Event.end_time > date_start),
+    )
+
+
+def task_window_filter(user_id: int, date_start: datetime, date_end: datetime):
+    Task = models.Task
+    return and_(
+        Task.id.in_(
+            _window_candidates(
+                Task,
+                Task.planned_start,
+                "task",
+                user_id,
+                date_start,
+                date_end,
+                # Sin planned_end la tarea dura 30 min y puede venir del día anterior
+                TASK_DEFAULT_DURATION,
+            )
+        ),
+        Task.planned_start <= date_end,
+        or_(
+            Task.planned_start >= date_start,
+            Task.planned_end > date_start,
+            and_(
+                Task.planned_end.is_(None),
+                Task.planned_start > date_start - TASK_DEFAULT_DURATION,
+            ),
+        ),
+    )
+
+
+def _event_item(e: models.Event) -> dict:
+    return {
+        "id": e.id,
+        "title": e.title,
+        "start": ensure_utc(e.start_time),
+        "end": ensure_utc(e.end_time),
+        "type": "event",
+        "color": e.category.color_hex if e.category else EVENT_DEFAULT_COLOR,
+        "is_completed": False,
+        "recurrence_id": None,
+    }
+
+
+def _task_item(t: models.Task) -> dict:
+    return {
+        "id": t.id,
+        "title": t.title,
+        "start": ensure_utc(t.planned_start),
+        "end": ensure_utc(_task_end(t.planned_start, t.planned_end)),
+        "type": "task",
+        "color": TASK_COLOR,
+        "is_completed": t.is_completed,
+        "recurrence_id": None,
+    }
+
+
+def _user_country(db: Session, user_id: int) -> str:
+    # get_current_user ya dejó las columnas del usuario en caché: sin consulta
+    values = cache.user_cache.get(user_id)
+    if values is not None:
+        return values.get("country") or "US"
+    user = crud.get_user_by_id(db, user_id)
+    return user.country if user and hasattr(user, "country") else "US"
+
+
+def get_holiday_items(
+    db: Session, user_id: int, date_start: datetime, date_end: datetime
+):
+    """
+    Festivos del país del usuario entre date_start y date_end como elementos del
+    timeline (no están en la BD: ver services/holiday_service.py).
+    """
+    country_code = _user_country(db, user_id)
+
+    items = []
+    for day, holiday_name in holiday_service.holidays_between(
+        country_code, date_start.date(), date_end.date()
+    ):
+        items.append(
+            {
+                "id": -1 * int(day.strftime("%Y%m%d")),
+                "title": f"🎉 {holiday_name}",
+                "start": datetime.combine(day, datetime.min.time()).replace(
+                    tzinfo=timezone.utc
+                ),
+                "end": datetime.combine(day, datetime.max.time()).replace(
+                    tzinfo=timezone.utc
+                ),
+                "type": "holiday",
+                "color": HOLIDAY_COLOR,
+                "is_completed": False,
+                "recurrence_id": None,
+            }
+        )
+    return items
+
+
+def get_occurrence_items(
+    db: Session, user_id: int, date_start: datetime, date_end: datetime
+):
+    """
+    Ocurrencias de eventos recurrentes en la ventana, ordenadas como el timeline.
+    `id` es el de la serie y `recurrence_id` el inicio original de la ocurrencia.
+    """
+    return [
+        {
+            "id": event.id,
+            "title": title,
+            "start": start,
+            "end": end,
+            "type": "event",
+            "color": event.category.color_hex
+            if event.category
+            else EVENT_DEFAULT_COLOR,
+            "is_completed": False,
+            "recurrence_id": original,
+        }
+        for event, start, end, title, original in recurrence_service.get_occurrences(
+            db, user_id, date_start, date_end
+        )
+    ]
+
+
 def get_timeline(
     db: Session,
     user_id: int,
@@ -20,11 +213,219 @@ def get_timeline(
     date_end: datetime,
     skip: int = 0,
     limit: int = 50,
+    strategy: str = None,
+    after: tuple = None,
 ):
     """
     Obtiene el timeline del usuario con eventos, tareas y festivos.
     Soporta paginación real filtrando por fecha y luego aplicando skip/limit.
+
+    strategy: "sql" (por defecto, ver TIMELINE_STRATEGY) o "python".
+    after: clave (start, type, id) del último elemento ya servido; si se indica
+    se ignoran skip y strategy y el coste por página es constante.
+    """
+    strategy = strategy or TIMELINE_STRATEGY
+    if strategy not in TIMELINE_STRATEGIES:
+        raise ValueError(f"Estrategia de timeline desconocida: {strategy!r}")
+
+    # La versión se lee antes de consultar: si alguien escribe mientras tanto,
+    # la página se guarda con la versión vieja y no se volverá a servir
+    key = (
+        user_id,
+        ensure_utc(date_start),
+        ensure_utc(date_end),
+        skip,
+        limit,
+        after,
+        strategy,
+        cache.timeline_version(db, user_id),
+    )
+    items = cache.timeline_cache.get(key)
+    if items is None:
+        if after is not None:
+            items = _get_timeline_merged(
+                db, user_id, date_start, date_end, limit, after
+            )
+        elif strategy == "python":
+            items = _get_timeline_python(db, user_id, date_start, date_end, skip, limit)
+        else:
+            items = _get_timeline_sql(db, user_id, date_start, date_end, skip, limit)
+        cache.timeline_cache.set(key, items)
+    return list(items)
+
+
+def _get_timeline_sql(
+    db: Session,
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    skip: int,
+    limit: int,
+):
+    """
+    UNION ALL de eventos y tareas agendadas paginado en la BD. Los festivos y las
+    ocurrencias de eventos recurrentes (V elementos generados en Python; como filas
+    literales del UNION una ventana larga superaba el límite de términos de un
+    SELECT compuesto de SQLite) se mezclan después con heapq.merge con la misma
+    clave de orden.
+
+    Antes de la posición skip hay como mucho V virtuales, así que las filas
+    guardadas de la página están entre OFFSET max(0, skip - V) y LIMIT limit + V:
+    se leen O(limit + V) filas sea cual sea skip. La posición global de la primera
+    fila leída es su OFFSET más los virtuales que la preceden; los virtuales
+    anteriores se intercalan con filas saltadas y sólo cuentan para esa posición.
+    """
+    events = (
+        select(
+            literal("event").label("type"),
+            models.Event.id.label("id"),
+            models.Event.title.label("title"),
+            models.Event.start_time.label("start"),
+            models.Event.end_time.label("end"),
+            case(
+                (models.Category.id.is_(None), EVENT_DEFAULT_COLOR),
+                else_=models.Category.color_hex,
+            ).label("color"),
+            literal(False).label("is_completed"),
+        )
+        .outerjoin(models.Category, models.Event.category_id == models.Category.id)
+        .where(
+            event_window_filter(user_id, date_start, date_end),
+        )
+    )
+    tasks = select(
+        literal("task"),
+        models.Task.id,
+        models.Task.title,
+        models.Task.planned_start,
+        # planned_end puede ser NULL: el fin por defecto se calcula al leer
+        models.Task.planned_end,
+        literal(TASK_COLOR),
+        models.Task.is_completed,
+    ).where(task_window_filter(user_id, date_start, date_end))
+
+    virtual = list(
+        heapq.merge(
+            get_holiday_items(db, user_id, date_start, date_end),
+            get_occurrence_items(db, user_id, date_start, date_end),
+            key=timeline_sort_key,
+        )
+    )
+    offset = max(0, skip - len(virtual))
+
+    timeline = union_all(events, tasks).subquery()
+    rows = db.execute(
+        select(timeline)
+        .order_by(timeline.c.start, timeline.c.type, timeline.c.id)
+        .offset(offset)
+        .limit(limit + len(virtual))
+    ).all()
+
+    stored = []
+    for row in rows:
+        item = dict(row._mapping)
+        item["start"] = ensure_utc(item["start"])
+        if item["type"] == "task":
+            item["end"] = _task_end(item["start"], item["end"])
+        item["end"] = ensure_utc(item["end"])
+        item["is_completed"] = bool(item["is_completed"])
+        item["recurrence_id"] = None
+        stored.append(item)
+
+    position = 0  # Posición global del primer elemento de la mezcla
+    if offset:
+        if not stored:
+            return []  # Hay menos de skip - V filas: la página queda vacía
+        first = timeline_sort_key(stored[0])
+        before = bisect_left([timeline_sort_key(item) for item in virtual], first)
+        virtual = virtual[before:]
+        position = offset + before
+
+    merged = heapq.merge(stored, virtual, key=timeline_sort_key)
+    return list(islice(merged, skip - position, skip - position + limit))
+
+
+def _after_in_source(start_col, id_col, source_type: str, after: tuple):
+    """
+    `(start, type, id) > after` para una fuente cuyo tipo es fijo: se reduce a
+    un rango sobre (start, id), que cubren los índices (user_id, start...).
+    """
+    after_start, after_type, after_id = after
+    if source_type > after_type:
+        return start_col >= after_start
+    if source_type < after_type:
+        return start_col > after_start
+    return or_(
+        start_col > after_start, and_(start_col == after_start, id_col > after_id)
+    )
+
+
+def _get_timeline_merged(
+    db: Session,
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    limit: int,
+    after: tuple = None,
+):
+    """
+    Primeros `limit` elementos de la ventana (tras `after` si se indica): cada
+    fuente lee como mucho `limit` filas ya ordenadas y heapq.merge las combina.
     """
+    event_filters = [event_window_filter(user_id, date_start, date_end)]
+    task_filters = [task_window_filter(user_id, date_start, date_end)]
+    # Festivos y ocurrencias de series: ya ordenados, se generan en memoria
+    virtual_items = list(
+        heapq.merge(
+            get_holiday_items(db, user_id, date_start, date_end),
+            get_occurrence_items(db, user_id, date_start, date_end),
+            key=timeline_sort_key,
+        )
+    )
+    if after is not None:
+        event_filters.append(
+            _after_in_source(models.Event.start_time, models.Event.id, "event", after)
+        )
+        task_filters.append(
+            _after_in_source(models.Task.planned_start, models.Task.id, "task", after)
+        )
+        after_key = (ensure_utc(after[0]), after[1], after[2])
+        virtual_items = [
+            item for item in virtual_items if timeline_sort_key(item) > after_key
+        ]
+
+    events = (
+        db.query(models.Event)
+        .options(joinedload(models.Event.category))
+        .filter(*event_filters)
+        .order_by(models.Event.start_time, models.Event.id)
+        .limit(limit)
+    )
+    tasks = (
+        db.query(models.Task)
+        .filter(*task_filters)
+        .order_by(models.Task.planned_start, models.Task.id)
+        .limit(limit)
+    )
+
+    merged = heapq.merge(
+        (_event_item(e) for e in events),
+        (_task_item(t) for t in tasks),
+        virtual_items,
+        key=timeline_sort_key,
+    )
+    return list(islice(merged, limit))
+
+
+def _get_timeline_python(
+    db: Session,
+    user_id: int,
+    date_start: datetime,
+    date_end: datetime,
+    skip: int,
+    limit: int,
+):
+    """Merge en memoria: lee skip + limit filas de cada fuente, ordena y corta."""
     # Calculamos un buffer seguro para DB queries
     # Necesitamos traer suficientes items de CADA fuente para garantizar que tras el merge
     # el slice [skip : skip + limit] sea correcto.
@@ -37,10 +438,9 @@ def get_timeline(
         db.query(models.Event)
         .options(joinedload(models.Event.category))
         .filter(
-            models.Event.user_id == user_id,
-            models.Event.start_time >= date_start,
-            models.Event.start_time <= date_end,
+            event_window_filter(user_id, date_start, date_end),
         )
+        .order_by(models.Event.start_time, models.Event.id)
         .limit(fetch_limit)
         .all()
     )
@@ -49,10 +449,9 @@ def get_timeline(
     tasks = (
         db.query(models.Task)
         .filter(
-            models.Task.user_id == user_id,
-            models.Task.planned_start >= date_start,
-            models.Task.planned_start <= date_end,
+            task_window_filter(user_id, date_start, date_end),
         )
+        .order_by(models.Task.planned_start, models.Task.id)
         .limit(fetch_limit)
         .all()
     )
@@ -60,77 +459,15 @@ def get_timeline(
     # 3. Unificar
     timeline = []
 
-    for e in events:
-        timeline.append(
-            {
-                "id": e.id,
-                "title": e.title,
-                "start": ensure_utc(e.start_time),
-                "end": ensure_utc(e.end_time),
-                "type": "event",
-                "color": e.category.color_hex if e.category else "#ccc",
-                "is_completed": False,
-            }
-        )
-
-    for t in tasks:
-        # Si no tiene planned_end, asumimos 30 mins
-        end_time = (
-            t.planned_end if t.planned_end else t.planned_start + timedelta(minutes=30)
-        )
-        timeline.append(
-            {
-                "id": t.id,
-                "title": t.title,
-                "start": ensure_utc(t.planned_start),
-                "end": ensure_utc(end_time),
-                "type": "task",
-                "color": "#ff9f43",  # Orange for tasks
-                "is_completed": t.is_completed,
-            }
-        )
+    timeline.extend(_event_item(e) for e in events)
+    timeline.extend(_task_item(t) for t in tasks)
 
-    # 4. Obtener Festivos del País (Solo si estamos en la primera "página" o el rango es pequeño)
-    # Para simplificar la paginación con festivos (que son generados, no de BD),
-    # los generamos siempre en el rango, pero solo se mostrarán si caen en el slice final.
-    # Esto es barato computacionalmente.
-
-    user = crud.get_user_by_id(db, user_id)
-    country_code = user.country if user and hasattr(user, "country") else "US"
-
-    try:
-        user_holidays = holidays.country_holidays(country_code)
-    except Exception:
-        user_holidays = holidays.US()
-
-    current_itr = date_start.date()
-    end_date_date = date_end.date()
-
-    while current_itr <= end_date_date:
-        if current_itr in user_holidays:
-            holiday_name = user_holidays.get(current_itr)
-            h_start = datetime.combine(current_itr, datetime.min.time()).replace(
-                tzinfo=timezone.utc
-            )
-            h_end = datetime.combine(current_itr, datetime.max.time()).replace(
-                tzinfo=timezone.utc
-            )
-
-            timeline.append(
-                {
-                    "id": -1 * int(current_itr.strftime("%Y%m%d")),
-                    "title": f"🎉 {holiday_name}",
-                    "start": h_start,
-                    "end": h_end,
-                    "type": "holiday",
-                    "color": "#e91e63",
-                    "is_completed": False,
-                }
-            )
-        current_itr += timedelta(days=1)
+    # 4. Festivos del país (generados, no de BD): sólo se verán si caen en el slice
+    timeline.extend(get_holiday_items(db, user_id, date_start, date_end))
+    timeline.extend(get_occurrence_items(db, user_id, date_start, date_end))
 
     # 5. Ordenar por hora de inicio
-    timeline.sort(key=lambda x: x["start"])
+    timeline.sort(key=timeline_sort_key)
 
     # 6. Aplicar Paginación (Slice)
     # [start : end]
@@ -140,30 +477,123 @@ def get_timeline(
     return paginated_timeline
 
 
-def get_now_view(db: Session, user_id: int, current_time: datetime):
-    # Obtener todo lo de hoy
-    start_of_day = current_time.replace(hour=0, minute=0, second=0)
-    end_of_day = current_time.replace(hour=23, minute=59, second=59)
+def _utc_day_expr(db: Session, column):
+    """Día (UTC) de `column`, sea cual sea el TimeZone de la sesión de PostgreSQL."""
+    if db.get_bind().dialect.name == "sqlite":
+        return func.date(column)  # SQLite guarda las fechas en UTC
+    return func.date(func.timezone("UTC", column))
 
-    full_timeline = get_timeline(db, user_id, start_of_day, end_of_day)
 
-    current_item = None
-    next_item = None
+def _as_date(value) -> date:
+    # date() devuelve 'YYYY-MM-DD' en SQLite y un date en PostgreSQL
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def get_density(db: Session, user_id: int, date_start: date, date_end: date):
+    """
+    Número de eventos, tareas agendadas y festivos de cada día de
+    [date_start, date_end] (p. ej. los puntos de la vista de mes).
+
+    Un elemento cuenta en su día de inicio (GROUP BY date(inicio) sobre los índices
+    (user_id, inicio)) y en cada día que sigue ocupando (timeline_day_index). Las
+    ocurrencias de eventos recurrentes se cuentan al expandirlas.
+    """
+    key = (
+        "density",
+        user_id,
+        date_start,
+        date_end,
+        cache.timeline_version(db, user_id),
+    )
+    cached = cache.timeline_cache.get(key)
+    if cached is not None:
+        return list(cached)
+
+    counts = {
+        date_start + timedelta(days=i): {"events": 0, "tasks": 0, "holidays": 0}
+        for i in range((date_end - date_start).days + 1)
+    }
+    range_start = timeline_index.day_start(date_start)
+    range_end = timeline_index.day_start(date_end + timedelta(days=1))
 
-    # Buscar ítem actual y siguiente
-    # Aseguramos que current_time tenga timezone si full_timeline tiene items con timezone
-    if (
-        full_timeline
-        and full_timeline[0]["start"].tzinfo
-        and current_time.tzinfo is None
+    for field, model, start_col, extra_filters in (
+        (
+            "events",
+            models.Event,
+            models.Event.start_time,
+            [models.Event.recurrence_rule.is_(None)],
+        ),
+        ("tasks", models.Task, models.Task.planned_start, []),
     ):
-        current_time = current_time.replace(tzinfo=timezone.utc)
+        day = _utc_day_expr(db, start_col).label("day")
+        rows = db.execute(
+            select(day, func.count().label("count"))
+            .where(
+                model.user_id == user_id,
+                start_col >= range_start,
+                start_col < range_end,
+                *extra_filters,
+            )
+            .group_by(day)
+        )
+        for row in rows:
+            day_counts = counts.get(_as_date(row.day))
+            if day_counts is not None:
+                day_counts[field] += row.count
+
+    index = models.TimelineDayIndex
+    rows = db.execute(
+        select(index.day, index.item_type, func.count().label("count"))
+        .where(
+            index.user_id == user_id,
+            index.day >= date_start,
+            index.day <= date_end,
+        )
+        .group_by(index.day, index.item_type)
+    )
+    for row in rows:
+        counts[row.day][f"{row.item_type}s"] += row.count
+
+    # Ocurrencias de series: su día de inicio y los que siguen ocupando
+    for item in get_occurrence_items(db, user_id, range_start, range_end):
+        first_day = timeline_index.utc_date(item["start"])
+        spanned = timeline_index.spanned_days(item["start"], item["end"])
+        for day in [first_day, *spanned]:
+            if day in counts:
+                counts[day]["events"] += 1
+
+    country_code = _user_country(db, user_id)
+    for day, _ in holiday_service.holidays_between(country_code, date_start, date_end):
+        counts[day]["holidays"] += 1
+
+    density = [{"day": day, **values} for day, values in counts.items()]
+    cache.timeline_cache.set(key, density)
+    return list(density)
+
 
-    pending_items = [i for i in full_timeline if i["end"] > current_time]
+def get_now_view(db: Session, user_id: int, current_time: datetime):
+    """
+    Elemento en curso y siguiente. Lo pendiente (termina después de ahora) de
+    aquí al fin del día, ordenado por inicio: el primero es el actual si ya
+    empezó; si no, es el siguiente. Bastan dos filas de cada fuente.
+
+    El resultado se cachea por usuario hasta el próximo cambio previsible (fin del
+    actual, inicio o fin del siguiente, o fin del día); crud lo invalida al escribir.
+    """
+    current_time = ensure_utc(current_time)
+    version = cache.timeline_version(db, user_id)
+    cached = cache.now_view_cache.get(user_id)
+    if cached is not None:
+        cached_version, computed_at, valid_until, view = cached
+        if cached_version == version and computed_at <= current_time < valid_until:
+            return view
+
+    end_of_day = current_time.replace(hour=23, minute=59, second=59, microsecond=999999)
+    pending_items = _get_timeline_merged(db, user_id, current_time, end_of_day, limit=2)
 
+    current_item = None
+    next_item = None
     if pending_items:
-        # El primero que encontremos que termina en el futuro
-        # Verificamos si ya empezó
         candidate = pending_items[0]
         if candidate["start"] <= current_time:
             current_item = candidate
@@ -173,4 +603,17 @@ def get_now_view(db: Session, user_id: int, current_time: datetime):
             # Nada ocurriendo ahora mismo, el primero es el "siguiente"
             next_item = candidate
 
-    return {"current": current_item, "next": next_item}
+    view = {"current": current_item, "next": next_item}
+
+    boundaries = [end_of_day]
+    if current_item:
+        boundaries.append(current_item["end"])
+    if next_item:
+        boundaries.extend([next_item["start"], next_item["end"]])
+    # Un "siguiente" que ya empezó (solapado con el actual) no marca límite
+    valid_until = min(b for b in boundaries if b > current_time)
+    ttl = min((valid_until - current_time).total_seconds(), cache.now_view_cache.ttl)
+    cache.now_view_cache.set(
+        user_id, (version, current_time, valid_until, view), ttl=ttl
+    )
+    return view
@@ -7,6 +7,7 @@ from httpx import ASGITransport, AsyncClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+import cache
 from database import Base, get_db
 from main import app
 
@@ -41,6 +42,8 @@ def engine():
 @pytest.fixture(scope="function")
 def db_session(engine):
     """Retorna una sesión de base de datos limpia para cada test."""
+    # Los IDs se reutilizan tras cada rollback: no arrastrar cachés entre tests
+    cache.clear_all()
     connection = engine.connect()
     transport = connection.begin()
 
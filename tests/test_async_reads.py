@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import auth
+import cache
+import database
+import models
+from database import Base, get_async_db
+from routers import async_reads
+
+
+def test_to_async_url():
+    assert database.to_async_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert (
+        database.to_async_url("postgresql://u:p@h/db")
+        == "postgresql+asyncpg://u:p@h/db"
+    )
+    assert (
+        database.to_async_url("postgresql+psycopg2://u:p@h/db")
+        == "postgresql+asyncpg://u:p@h/db"
+    )
+    with pytest.raises(ValueError):
+        database.to_async_url("mysql://h/db")
+
+
+@pytest_asyncio.fixture
+async def async_app(tmp_path):
+    """App mínima con sólo las rutas async, sobre una BD con datos ya confirmados."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(sync_engine)
+
+    now = datetime.now(timezone.utc)
+    with sessionmaker(bind=sync_engine)() as db:
+        user = models.User(email="async@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        category = models.Category(name="Clase", user_id=user.id)
+        db.add(category)
+        db.flush()
+        db.add(
+            models.Event(
+                title="Evento ahora",
+                start_time=now - timedelta(minutes=5),
+                end_time=now + timedelta(minutes=30),
+                user_id=user.id,
+                category_id=category.id,
+            )
+        )
+        db.add(models.Task(title="Tarea", user_id=user.id))
+        db.add(models.FocusSession(user_id=user.id, start_time=now, status="active"))
+        db.commit()
+        user_id = user.id
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(database.to_async_url(url))
+    factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_reads.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    cache.clear_all()
+
+    token = auth.create_access_token({"sub": str(user_id)})
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://localhost") as ac:
+        yield ac, {"Authorization": f"Bearer {token}"}
+
+    await async_engine.dispose()
+    cache.clear_all()
+
+
+@pytest.mark.asyncio
+async def test_async_read_routes(async_app):
+    client, headers = async_app
+
+    res = await client.get("/tasks/", headers=headers)
+    assert res.status_code == 200
+    assert [t["title"] for t in res.json()] == ["Tarea"]
+
+    res = await client.get("/timeline/", headers=headers)
+    assert res.status_code == 200
+    assert "Evento ahora" in [i["title"] for i in res.json()]
+
+    res = await client.get("/timeline/now", headers=headers)
+    assert res.status_code == 200
+
+    res = await client.get("/focus/current", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "active"
+
+
+@pytest.mark.asyncio
+async def test_async_routes_reject_bad_token(async_app):
+    client, _ = async_app
+    res = await client.get("/tasks/", headers={"Authorization": "Bearer nope"})
+    assert res.status_code == 401
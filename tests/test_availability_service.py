@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import crud
+import models
+import schemas
+from services import availability_service, timeline_service
+
+
+def _at(hour, minute=0):
+    return datetime(2026, 3, 2, hour, minute, tzinfo=timezone.utc)
+
+
+def test_merge_intervals_sweeps_overlaps_and_touching():
+    busy = availability_service.merge_intervals(
+        [
+            (_at(13), _at(14)),
+            (_at(9), _at(10)),
+            (_at(9, 30), _at(9, 45)),  # Contenido en el anterior
+            (_at(10), _at(11)),  # Toca el anterior
+            (_at(12), _at(12)),  # Vacío
+        ]
+    )
+    assert busy == [(_at(9), _at(11)), (_at(13), _at(14))]
+
+
+def test_free_between_clips_to_window():
+    busy = [(_at(7), _at(9)), (_at(11), _at(11, 20)), (_at(17), _at(20))]
+    slots = availability_service.free_between(
+        busy, _at(8), _at(18), timedelta(minutes=30)
+    )
+    assert slots == [(_at(9), _at(11)), (_at(11, 20), _at(17))]
+    assert availability_service.free_between([], _at(8), _at(9), timedelta(0)) == [
+        (_at(8), _at(9))
+    ]
+
+
+def test_free_slots_match_timeline_items(db_session):
+    user = crud.create_user(
+        db_session,
+        schemas.UserCreate(email="availability@example.com", password="password123"),
+    )
+    category = models.Category(name="Work", color_hex="#123456", user_id=user.id)
+    db_session.add(category)
+    db_session.flush()
+    db_session.add_all(
+        [
+            # Empieza la víspera y ocupa la primera hora de la ventana
+            models.Event(
+                title="Night shift",
+                start_time=_at(0) - timedelta(hours=3),
+                end_time=_at(1),
+                user_id=user.id,
+                category_id=category.id,
+            ),
+            models.Event(
+                title="Standup",
+                start_time=_at(9) - timedelta(days=7),
+                end_time=_at(9, 15) - timedelta(days=7),
+                recurrence_rule="FREQ=DAILY",
+                user_id=user.id,
+                category_id=category.id,
+            ),
+            models.Task(title="Deep work", planned_start=_at(9), user_id=user.id),
+            models.Task(
+                title="Review",
+                planned_start=_at(15),
+                planned_end=_at(16, 30),
+                user_id=user.id,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    window = (_at(0), _at(0) + timedelta(days=2))
+    slots = availability_service.get_free_slots(
+        db_session, user.id, *window, min_minutes=1
+    )
+
+    # Lo mismo calculado a partir del timeline completo
+    items = timeline_service.get_timeline(
+        db_session, user.id, *window, limit=1000, strategy="python"
+    )
+    busy = availability_service.merge_intervals(
+        (item["start"], item["end"]) for item in items if item["type"] != "holiday"
+    )
+    expected = availability_service.free_between(busy, *window, timedelta(minutes=1))
+    assert [(slot["start"], slot["end"]) for slot in slots] == expected
+    assert [(slot["start"], slot["end"]) for slot in slots[:3]] == [
+        (_at(1), _at(9)),
+        (_at(9, 30), _at(15)),
+        (_at(16, 30), _at(9) + timedelta(days=1)),
+    ]
@@ -1,5 +1,5 @@
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
@@ -38,3 +38,48 @@ def test_subscription_management(db_session, test_user):
     subs = crud.get_subscriptions(db_session, test_user.id)
     assert len(subs) == 1
     assert subs[0].endpoint == sub.endpoint
+
+
+def test_task_stats_aggregates_without_limit(db_session, test_user):
+    now = datetime.now(timezone.utc)
+    past = now - timedelta(days=1)
+    tasks = [
+        models.Task(title=f"t{i}", user_id=test_user.id, energy_required="low")
+        for i in range(120)
+    ]
+    tasks += [
+        models.Task(
+            title="done",
+            user_id=test_user.id,
+            is_completed=True,
+            status=models.TaskStatus.completed,
+            energy_required=models.EnergyLevel.high,
+        ),
+        models.Task(
+            title="ignored",
+            user_id=test_user.id,
+            status=models.TaskStatus.ignored,
+            deadline=past,
+        ),
+        models.Task(title="late", user_id=test_user.id, deadline=past),
+        models.Task(
+            title="late but done",
+            user_id=test_user.id,
+            deadline=past,
+            is_completed=True,
+        ),
+    ]
+    db_session.add_all(tasks)
+    db_session.commit()
+
+    stats = crud.get_task_stats(db_session, test_user.id, now=now)
+    # Antes se contaban sólo las 100 primeras tareas
+    assert stats["total"] == 124
+    assert stats["completed"] == 2
+    assert stats["incomplete"] == 121
+    assert stats["overdue"] == 1
+    assert stats["by_status"]["completed"] == 1
+    assert stats["by_status"]["ignored"] == 1
+    assert stats["by_energy"]["low"] == {"total": 120, "incomplete": 120}
+    assert stats["by_energy"]["high"] == {"total": 1, "incomplete": 0}
+    assert stats["by_energy"]["medium"]["incomplete"] == 1
@@ -0,0 +1,52 @@
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool
+
+import database
+
+
+def test_profile_is_inferred_from_url(monkeypatch):
+    monkeypatch.delenv("DB_ENGINE_PROFILE", raising=False)
+    monkeypatch.delenv("VERCEL", raising=False)
+    assert database.resolve_engine_profile("sqlite:///./x.db") == "sqlite"
+    assert database.resolve_engine_profile("postgresql://u:p@h/db") == "server"
+
+    monkeypatch.setenv("VERCEL", "1")
+    assert database.resolve_engine_profile("postgresql://u:p@h/db") == "serverless"
+
+    monkeypatch.setenv("DB_ENGINE_PROFILE", "server")
+    assert database.resolve_engine_profile("postgresql://u:p@h/db") == "server"
+
+    monkeypatch.setenv("DB_ENGINE_PROFILE", "turbo")
+    with pytest.raises(ValueError):
+        database.resolve_engine_profile("postgresql://u:p@h/db")
+
+
+def test_engine_kwargs_per_profile(monkeypatch):
+    sqlite_kwargs = database.build_engine_kwargs("sqlite:///./x.db", "sqlite")
+    assert sqlite_kwargs == {"connect_args": {"check_same_thread": False}}
+
+    serverless = database.build_engine_kwargs("postgresql://h/db", "serverless")
+    assert serverless["poolclass"] is NullPool
+    assert "connect_args" not in serverless
+
+    monkeypatch.setenv("DB_POOL_SIZE", "12")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    server = database.build_engine_kwargs("postgresql://h/db", "server")
+    assert server["poolclass"] is QueuePool
+    assert server["pool_size"] == 12
+    assert server["pool_pre_ping"] is False
+    assert "connect_args" not in server
+
+    # La URL manda: SQLite no admite las opciones de pool de servidor
+    mismatched = database.build_engine_kwargs("sqlite:///./x.db", "server")
+    assert mismatched == {"connect_args": {"check_same_thread": False}}
+
+
+@pytest.mark.asyncio
+async def test_health_reports_pool_and_cache_stats(client):
+    res = await client.get("/health")
+    assert res.status_code == 200
+    body = res.json()
+    assert body["db_pool"]["profile"] == database.ENGINE_PROFILE
+    assert "checkouts_total" in body["db_pool"]
+    assert "auth_users" in body["caches"]
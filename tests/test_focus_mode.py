@@ -72,3 +72,293 @@ async def test_focus_flow(client):
     assert stats["total_sessions"] == 1
     assert stats["avg_score"] == 5.0
     assert stats["total_interruptions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_focus_stats_group_by(client, db_session):
+    from datetime import datetime, timezone
+
+    import models
+
+    headers = await get_auth_headers(client, email="focus_buckets@example.com")
+    user_id = (await client.get("/users/me", headers=headers)).json()["id"]
+
+    def session(day, minutes, score, interruptions):
+        return models.FocusSession(
+            user_id=user_id,
+            start_time=datetime(2026, 3, day, 10, 0, tzinfo=timezone.utc),
+            duration_minutes=minutes,
+            feedback_score=score,
+            interruptions=interruptions,
+            status="completed",
+        )
+
+    # 2026-03-02 es lunes; el 9 empieza la semana siguiente
+    db_session.add_all(
+        [
+            session(2, 25, 4, 1),
+            session(2, 50, None, 0),
+            session(4, 30, 2, 2),
+            session(9, 45, 5, 0),
+        ]
+    )
+    db_session.commit()
+
+    res = await client.get("/focus/stats", headers=headers)
+    stats = res.json()
+    assert stats["total_sessions"] == 4
+    assert stats["total_minutes"] == 150
+    assert stats["avg_score"] == pytest.approx(11 / 3)
+    assert stats["buckets"] is None
+
+    res = await client.get("/focus/stats?group_by=day", headers=headers)
+    days = res.json()["buckets"]
+    assert [b["period_start"] for b in days] == [
+        "2026-03-02",
+        "2026-03-04",
+        "2026-03-09",
+    ]
+    assert days[0]["sessions"] == 2 and days[0]["minutes"] == 75
+    assert days[0]["avg_score"] == 4.0
+
+    res = await client.get("/focus/stats?group_by=week", headers=headers)
+    weeks = res.json()["buckets"]
+    assert [(b["period_start"], b["sessions"]) for b in weeks] == [
+        ("2026-03-02", 3),
+        ("2026-03-09", 1),
+    ]
+    assert weeks[0]["interruptions"] == 3
+
+    res = await client.get(
+        "/focus/stats?group_by=month&start=2026-03-03T00:00:00Z", headers=headers
+    )
+    months = res.json()["buckets"]
+    assert months == [
+        {
+            "period_start": "2026-03-01",
+            "sessions": 2,
+            "minutes": 75,
+            "avg_score": 3.5,
+            "interruptions": 2,
+        }
+    ]
+
+    res = await client.get("/focus/stats?group_by=year", headers=headers)
+    assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_focus_rollup_incremental_and_rebuild(client, db_session):
+    import models
+    from services import focus_service
+
+    headers = await get_auth_headers(client, email="focus_rollup@example.com")
+
+    for score in (4, None):
+        res = await client.post("/focus/start", json={}, headers=headers)
+        session_id = res.json()["id"]
+        await client.post(f"/focus/{session_id}/interruption", headers=headers)
+        params = {"feedback_score": score} if score else {}
+        await client.post(f"/focus/{session_id}/stop", params=params, headers=headers)
+
+    res = await client.get("/focus/rollup", headers=headers)
+    assert res.status_code == 200
+    rows = res.json()
+    assert len(rows) == 1
+    assert rows[0]["sessions"] == 2
+    assert rows[0]["interruptions"] == 2
+    assert rows[0]["avg_score"] == 4.0
+
+    # Si el rollup se desincroniza, la reconstrucción lo deja igual que el cálculo en vivo
+    db_session.query(models.FocusDailyRollup).update({"sessions": 99})
+    focus_service.rebuild_focus_rollup(db_session)
+    db_session.commit()
+
+    res = await client.get("/focus/rollup?group_by=month", headers=headers)
+    assert res.json()[0]["sessions"] == 2
+    assert res.json()[0]["interruptions"] == 2
+    live = (await client.get("/focus/stats", headers=headers)).json()
+    assert live["total_sessions"] == 2
+    assert live["total_interruptions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_focus_open_session_unique_and_cached(client, db_session):
+    from sqlalchemy.exc import IntegrityError
+
+    import models
+
+    headers = await get_auth_headers(client, email="focus_unique@example.com")
+
+    res = await client.post("/focus/start", json={"task_id": None}, headers=headers)
+    session_id = res.json()["id"]
+
+    # Una sesión pausada sigue abierta: no se puede iniciar otra
+    await client.post(f"/focus/{session_id}/pause", headers=headers)
+    res = await client.post("/focus/start", json={"task_id": None}, headers=headers)
+    assert res.status_code == 400
+
+    # La BD rechaza una segunda sesión abierta aunque se salte la API
+    user_id = (
+        db_session.query(models.FocusSession).filter_by(id=session_id).one().user_id
+    )
+    with pytest.raises(IntegrityError):
+        with db_session.begin_nested():
+            db_session.add(models.FocusSession(user_id=user_id, status="active"))
+
+    # /focus/current con la caché caliente: una búsqueda por PK como mucho
+    res = await client.get("/focus/current", headers=headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "paused"
+    assert int(res.headers["X-DB-Query-Count"]) <= 1
+
+    await client.post(f"/focus/{session_id}/stop", headers=headers)
+    res = await client.get("/focus/current", headers=headers)
+    assert res.status_code == 404
+    assert int(res.headers["X-DB-Query-Count"]) == 0
+
+    # Una sesión terminada no se puede reabrir
+    res = await client.post(f"/focus/{session_id}/resume", headers=headers)
+    assert res.status_code == 400
+
+    res = await client.post("/focus/start", json={"task_id": None}, headers=headers)
+    assert res.status_code == 200
+    res = await client.get("/focus/current", headers=headers)
+    assert res.json()["id"] != session_id
+
+
+@pytest.mark.asyncio
+async def test_focus_interruption_log_and_analytics(client):
+    headers = await get_auth_headers(client, email="focus_interrupt@example.com")
+    res = await client.post("/focus/start", json={"task_id": None}, headers=headers)
+    session_id = res.json()["id"]
+
+    res = await client.post(
+        f"/focus/{session_id}/interruption", params={"note": "Phone"}, headers=headers
+    )
+    assert res.json()["interruptions"] == 1
+
+    batch = {
+        "interruptions": [
+            {"occurred_at": "2026-01-05T09:15:00Z", "note": "Slack"},
+            {"occurred_at": "2026-01-05T09:40:00Z"},
+            {"occurred_at": "2026-01-05T14:05:00Z", "note": "Door"},
+        ]
+    }
+    res = await client.post(
+        f"/focus/{session_id}/interruptions", json=batch, headers=headers
+    )
+    assert res.status_code == 200
+    assert res.json()["interruptions"] == 4
+
+    res = await client.post(
+        f"/focus/{session_id}/interruptions",
+        json={"interruptions": []},
+        headers=headers,
+    )
+    assert res.status_code == 422
+
+    res = await client.get(f"/focus/{session_id}/interruptions", headers=headers)
+    notes = [item["note"] for item in res.json()]
+    assert len(notes) == 4
+    assert notes[:3] == ["Slack", None, "Door"]
+
+    res = await client.get(
+        "/focus/interruptions/stats",
+        params={"start": "2026-01-05T00:00:00Z", "end": "2026-01-05T23:59:59Z"},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert {"hour": 9, "count": 2} in data["by_hour"]
+    assert {"hour": 14, "count": 1} in data["by_hour"]
+    assert data["total"] == 3
+    assert data["by_task"] == [{"task_id": None, "count": 3}]
+
+    res = await client.get("/focus/stats", headers=headers)
+    assert res.json()["total_interruptions"] == 4
+
+
+@pytest.mark.asyncio
+async def test_focus_duration_excludes_pauses(client, db_session):
+    from datetime import datetime, timedelta, timezone
+
+    import models
+
+    headers = await get_auth_headers(client, email="focus_pause@example.com")
+    res = await client.post("/focus/start", json={"task_id": None}, headers=headers)
+    session_id = res.json()["id"]
+
+    now = datetime.now(timezone.utc)
+    session = db_session.get(models.FocusSession, session_id)
+    session.start_time = now - timedelta(minutes=60)
+    db_session.commit()
+
+    res = await client.post(f"/focus/{session_id}/pause", headers=headers)
+    assert res.json()["paused_at"] is not None
+
+    # Simula una pausa de 20 minutos
+    session = db_session.get(models.FocusSession, session_id)
+    session.paused_at = now - timedelta(minutes=20)
+    db_session.commit()
+
+    res = await client.get("/focus/current", headers=headers)
+    # Pausada: el contador se congela al inicio de la pausa
+    assert abs(res.json()["active_seconds"] - 40 * 60) <= 5
+
+    res = await client.post(f"/focus/{session_id}/resume", headers=headers)
+    data = res.json()
+    assert data["paused_at"] is None
+    assert abs(data["paused_seconds"] - 20 * 60) <= 5
+
+    res = await client.post(f"/focus/{session_id}/stop", headers=headers)
+    data = res.json()
+    assert data["duration_minutes"] in (39, 40)
+    assert abs(data["active_seconds"] - 40 * 60) <= 5
+
+
+@pytest.mark.asyncio
+async def test_focus_concurrent_stop_counts_once(client, db_session):
+    from datetime import datetime, timezone
+
+    import models
+    from services import focus_service
+
+    headers = await get_auth_headers(client, email="focus_race@example.com")
+    res = await client.post("/focus/start", json={}, headers=headers)
+    session_id = res.json()["id"]
+
+    # Dos peticiones cargan la sesión abierta antes de que ninguna la cierre
+    stale = db_session.get(models.FocusSession, session_id)
+    assert stale.end_time is None
+    res = await client.post(f"/focus/{session_id}/stop", headers=headers)
+    assert res.status_code == 200
+
+    now = datetime.now(timezone.utc)
+    db_session.expire(stale)
+    stale.end_time = None  # Lo que vio la segunda petición
+    assert focus_service.finish_session(db_session, stale, now) is False
+    db_session.commit()
+
+    rows = (await client.get("/focus/rollup", headers=headers)).json()
+    assert rows[0]["sessions"] == 1
+
+
+def test_focus_buckets_days_in_utc_on_postgresql():
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+
+    import models
+    from services import focus_service
+
+    pg = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()))
+    started = focus_service._bucket_expr(pg, models.FocusSession.start_time, "week")
+    sql = str(started.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("date(date_trunc(") and "timezone(" in sql
+
+    # focus_daily_rollup.day ya es un día UTC: no se convierte
+    rollup_day = focus_service._bucket_expr(
+        pg, models.FocusDailyRollup.day, "week", utc=False
+    )
+    assert "timezone(" not in str(rollup_day.compile(dialect=postgresql.dialect()))
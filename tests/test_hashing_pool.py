@@ -0,0 +1,36 @@
+import threading
+
+import pytest
+
+import auth
+
+
+@pytest.mark.asyncio
+async def test_hash_pool_roundtrip():
+    hashed = await auth.get_password_hash_async("secret123")
+    assert await auth.verify_password_async("secret123", hashed)
+    assert not await auth.verify_password_async("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hash_pool_is_full(client, monkeypatch):
+    email = "busy_pool@example.com"
+    res = await client.post("/users/", json={"email": email, "password": "pw123456"})
+    assert res.status_code == 201
+
+    # Sin huecos libres: cualquier petición que necesite bcrypt se rechaza
+    monkeypatch.setattr(auth, "_hash_slots", threading.BoundedSemaphore(1))
+    auth._hash_slots.acquire()
+
+    res = await client.post("/token", data={"username": email, "password": "pw123456"})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == str(auth.HASH_BUSY_RETRY_AFTER)
+
+    res = await client.post(
+        "/users/", json={"email": "other_busy@example.com", "password": "pw"}
+    )
+    assert res.status_code == 503
+
+    auth._hash_slots.release()
+    res = await client.post("/token", data={"username": email, "password": "pw123456"})
+    assert res.status_code == 200
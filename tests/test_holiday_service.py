@@ -0,0 +1,39 @@
+from datetime import date
+
+from services import holiday_service
+
+
+def test_holidays_between_uses_year_index():
+    holiday_service.clear_index()
+
+    december = holiday_service.holidays_between(
+        "US", date(2025, 12, 1), date(2025, 12, 31)
+    )
+    assert december == [(date(2025, 12, 25), "Christmas Day")]
+
+    # El rango cruza el año: se consultan dos índices y se respeta el orden
+    new_year = holiday_service.holidays_between(
+        "US", date(2025, 12, 20), date(2026, 1, 2)
+    )
+    assert [day for day, _ in new_year] == [date(2025, 12, 25), date(2026, 1, 1)]
+
+    stats = holiday_service.index_stats()
+    assert stats["misses"] == 2  # 2025 y 2026, una vez cada uno
+    assert stats["hits"] == 1
+
+
+def test_unknown_country_falls_back_to_us():
+    assert holiday_service.holidays_between(
+        "ZZ", date(2025, 7, 4), date(2025, 7, 4)
+    ) == [(date(2025, 7, 4), "Independence Day")]
+
+
+def test_huge_ranges_only_index_nearby_years():
+    holiday_service.clear_index()
+
+    result = holiday_service.holidays_between("US", date(1, 1, 1), date(9999, 12, 31))
+    assert result
+    assert (
+        holiday_service.index_stats()["size"]
+        == 2 * holiday_service.HOLIDAY_YEAR_RANGE + 1
+    )
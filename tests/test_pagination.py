@@ -42,3 +42,145 @@ async def test_timeline_pagination_params(client, auth_headers):
     # Actually logic says if limit > 100: limit = 100.
     # We can check if response works.
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_tasks_keyset_pagination(client, auth_headers):
+    for i in range(5):
+        await client.post(
+            "/tasks/",
+            json={"title": f"Tarea {i}", "energy_required": "low"},
+            headers=auth_headers,
+        )
+
+    titles = []
+    cursor = None
+    pages = 0
+    while True:
+        url = "/tasks/?limit=2" + (f"&after={cursor}" if cursor else "")
+        res = await client.get(url, headers=auth_headers)
+        assert res.status_code == 200
+        titles += [t["title"] for t in res.json()]
+        pages += 1
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert titles == [f"Tarea {i}" for i in range(5)]
+    assert pages == 3
+
+
+@pytest.mark.asyncio
+async def test_events_keyset_pagination_orders_by_start(
+    client, auth_headers, category_id
+):
+    # Creados desordenados: la página debe salir por start_time
+    for day in (3, 1, 2, 1):
+        await client.post(
+            "/events/",
+            json={
+                "title": f"Dia {day}",
+                "start_time": f"2026-03-0{day}T09:00:00",
+                "end_time": f"2026-03-0{day}T10:00:00",
+                "category_id": category_id,
+            },
+            headers=auth_headers,
+        )
+
+    res = await client.get("/events/?limit=3", headers=auth_headers)
+    first = res.json()
+    assert [e["title"] for e in first] == ["Dia 1", "Dia 1", "Dia 2"]
+    cursor = res.headers["X-Next-Cursor"]
+
+    res = await client.get(f"/events/?limit=3&after={cursor}", headers=auth_headers)
+    assert [e["title"] for e in res.json()] == ["Dia 3"]
+    assert "X-Next-Cursor" not in res.headers
+
+
+@pytest.mark.asyncio
+async def test_categories_keyset_and_invalid_cursor(client, auth_headers):
+    for name in ("Zeta", "Alfa", "Beta"):
+        await client.post("/categories/", json={"name": name}, headers=auth_headers)
+
+    res = await client.get("/categories/?limit=2", headers=auth_headers)
+    assert [c["name"] for c in res.json()] == ["Alfa", "Beta"]
+    res = await client.get(
+        f"/categories/?limit=2&after={res.headers['X-Next-Cursor']}",
+        headers=auth_headers,
+    )
+    assert [c["name"] for c in res.json()] == ["Zeta"]
+
+    res = await client.get("/categories/?after=%%%garbage", headers=auth_headers)
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_timeline_cursor_pagination(client, auth_headers, category_id):
+    for hour in (9, 9, 10, 11, 12):
+        await client.post(
+            "/events/",
+            json={
+                "title": f"Agenda {hour}",
+                "start_time": f"2026-03-02T{hour:02d}:00:00Z",
+                "end_time": f"2026-03-02T{hour:02d}:30:00Z",
+                "category_id": category_id,
+            },
+            headers=auth_headers,
+        )
+    window = {"start": "2026-03-02T00:00:00Z", "end": "2026-03-02T23:59:59Z"}
+
+    full = await client.get("/timeline/", params=window, headers=auth_headers)
+    titles = [item["title"] for item in full.json()]
+    assert len(titles) == 5
+
+    seen, after = [], None
+    while True:
+        params = {**window, "limit": 2}
+        if after:
+            params["after"] = after
+        res = await client.get("/timeline/", params=params, headers=auth_headers)
+        assert res.status_code == 200
+        seen.extend(item["title"] for item in res.json())
+        after = res.headers.get("X-Next-Cursor")
+        if not after:
+            break
+    assert seen == titles
+
+    res = await client.get("/timeline/", params={"after": "nope"}, headers=auth_headers)
+    assert res.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url, values",
+    [
+        ("/events/", ("x", "y")),
+        ("/events/", (1, 2)),
+        ("/tasks/", ("x",)),
+        ("/tasks/", (True,)),
+        ("/categories/", (1, 2)),
+    ],
+)
+async def test_cursor_with_wrong_types_is_rejected(client, auth_headers, url, values):
+    from services import pagination
+
+    cursor = pagination.encode_cursor(*values)
+    res = await client.get(f"{url}?after={cursor}", headers=auth_headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Cursor inválido"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "values",
+    [(1, 2, 3), (datetime(2026, 1, 1), "meeting", 3), (datetime(2026, 1, 1), "task")],
+)
+async def test_timeline_cursor_with_wrong_values_is_rejected(
+    client, auth_headers, values
+):
+    from services import pagination
+
+    cursor = pagination.encode_cursor(*values)
+    res = await client.get(f"/timeline/?after={cursor}", headers=auth_headers)
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Cursor inválido"
@@ -0,0 +1,76 @@
+"""
+Comprueba que SQLite usa los índices compuestos en las consultas calientes
+(ver alembic/versions/3c9a5e1f7b20_add_composite_indexes_for_range_queries.py).
+"""
+from sqlalchemy import text
+
+
+def _plan(db_session, sql):
+    rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_timeline_events_use_user_start_index(db_session):
+    plan = _plan(
+        db_session,
+        "SELECT id FROM events WHERE user_id = 1 "
+        "AND start_time >= '2026-01-01' AND start_time <= '2026-02-01'",
+    )
+    assert "ix_events_user_id_start_time" in plan
+
+
+def test_timeline_tasks_use_user_planned_start_index(db_session):
+    plan = _plan(
+        db_session,
+        "SELECT id FROM tasks WHERE user_id = 1 "
+        "AND planned_start >= '2026-01-01' AND planned_start <= '2026-02-01'",
+    )
+    assert "ix_tasks_user_id_planned_start" in plan
+
+
+def test_suggestions_use_user_status_index(db_session):
+    plan = _plan(
+        db_session,
+        "SELECT id FROM tasks WHERE user_id = 1 AND status = 'pending' "
+        "AND deadline <= '2026-02-01'",
+    )
+    assert "ix_tasks_user_id_status_deadline" in plan
+
+
+def test_focus_lookup_uses_user_status_index(db_session):
+    plan = _plan(
+        db_session,
+        "SELECT id FROM focus_sessions WHERE user_id = 1 AND status = 'active'",
+    )
+    assert "ix_focus_sessions_user_id_status" in plan
+
+
+def test_push_subscription_endpoint_lookup(db_session):
+    plan = _plan(
+        db_session, "SELECT id FROM push_subscriptions WHERE endpoint = 'https://x'"
+    )
+    assert "ix_push_subscriptions_endpoint" in plan
+
+
+def test_timeline_overlap_window_is_index_backed(db_session):
+    from datetime import datetime, timezone
+
+    from sqlalchemy import select
+
+    import models
+    from services import timeline_service
+
+    query = select(models.Event.id).where(
+        timeline_service.event_window_filter(
+            1,
+            datetime(2026, 3, 3, tzinfo=timezone.utc),
+            datetime(2026, 3, 4, tzinfo=timezone.utc),
+        )
+    )
+    sql = str(
+        query.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+    )
+    plan = _plan(db_session, sql)
+    assert "SCAN" not in plan
+    assert "ix_events_user_id_start_time" in plan
+    assert "timeline_day_index" in plan
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import text
+
+import query_stats
+
+
+@pytest.mark.asyncio
+async def test_query_count_headers_in_development(client, auth_headers):
+    res = await client.get("/tasks/", headers=auth_headers)
+    assert res.status_code == 200
+    assert int(res.headers["X-DB-Query-Count"]) >= 1
+    assert float(res.headers["X-DB-Time-Ms"]) >= 0
+
+
+@pytest.mark.asyncio
+async def test_strict_budget_fails_request(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(query_stats, "SQL_QUERY_BUDGET", 1)
+    monkeypatch.setattr(query_stats, "SQL_QUERY_BUDGET_STRICT", True)
+
+    res = await client.get("/users/me/full", headers=auth_headers)
+    assert res.status_code == 500
+    assert "Query budget" in res.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_budget_not_strict_only_logs(client, auth_headers, monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SQL_QUERY_BUDGET", 1)
+
+    res = await client.get("/users/me/full", headers=auth_headers)
+    assert res.status_code == 200
+    assert "budget 1" in caplog.text
+
+
+def test_repeated_statements_are_flagged(db_session):
+    stats, token = query_stats.start_request(budget=0, strict=False)
+    try:
+        for i in range(6):
+            db_session.execute(text("SELECT :i"), {"i": i})
+        db_session.execute(text("SELECT 1"))
+    finally:
+        query_stats.end_request(token)
+
+    assert stats.count == 7
+    assert stats.repeated_statements(threshold=5) == [("SELECT ?", 6)]
+    assert not stats.over_budget
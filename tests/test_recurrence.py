@@ -0,0 +1,263 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import cache
+from services import recurrence_service, timeline_service
+
+
+async def _create_series(client, auth_headers, category_id, rule):
+    response = await client.post(
+        "/events/",
+        json={
+            "title": "Yoga",
+            "start_time": "2026-01-05T18:00:00Z",  # Lunes
+            "end_time": "2026-01-05T19:00:00Z",
+            "category_id": category_id,
+            "recurrence_rule": rule,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+async def _timeline(client, auth_headers, start, end, **params):
+    response = await client.get(
+        "/timeline/",
+        params={"start": start, "end": end, **params},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    return [item for item in response.json() if item["type"] == "event"]
+
+
+@pytest.mark.asyncio
+async def test_weekly_series_expands_inside_window(
+    client, auth_headers, category_id, db_session
+):
+    series = await _create_series(
+        client, auth_headers, category_id, "FREQ=WEEKLY;BYDAY=MO,WE"
+    )
+    assert series["recurrence_rule"] == "FREQ=WEEKLY;BYDAY=MO,WE"
+
+    items = await _timeline(
+        client, auth_headers, "2026-03-02T00:00:00Z", "2026-03-15T23:59:59Z"
+    )
+    assert [item["start"][:10] for item in items] == [
+        "2026-03-02",
+        "2026-03-04",
+        "2026-03-09",
+        "2026-03-11",
+    ]
+    assert {item["id"] for item in items} == {series["id"]}
+    assert items[0]["recurrence_id"].startswith("2026-03-02T18:00:00")
+
+    # Serie sin fin: una ventana años después cuesta lo mismo
+    items = await _timeline(
+        client, auth_headers, "2031-03-03T00:00:00Z", "2031-03-03T23:59:59Z"
+    )
+    assert len(items) == 1
+
+    # Mismo resultado con UNION ALL, merge en memoria y paginando por cursor
+    window = (
+        datetime(2026, 3, 2, tzinfo=timezone.utc),
+        datetime(2026, 3, 15, 23, 59, tzinfo=timezone.utc),
+    )
+    pages = {
+        strategy: timeline_service.get_timeline(
+            db_session, series["user_id"], *window, skip=2, limit=2, strategy=strategy
+        )
+        for strategy in ("sql", "python")
+    }
+    first = timeline_service.get_timeline(
+        db_session, series["user_id"], *window, limit=2
+    )
+    pages["cursor"] = timeline_service.get_timeline(
+        db_session,
+        series["user_id"],
+        *window,
+        limit=2,
+        after=timeline_service.timeline_sort_key(first[-1]),
+    )
+    for page in pages.values():
+        events = [item for item in page if item["type"] == "event"]
+        assert [item["start"].day for item in events] == [9, 11]
+
+
+@pytest.mark.asyncio
+async def test_series_exceptions_cancel_and_move(client, auth_headers, category_id):
+    series = await _create_series(
+        client, auth_headers, category_id, "FREQ=WEEKLY;COUNT=4"
+    )
+    base = f"/events/{series['id']}/exceptions"
+
+    res = await client.put(
+        base,
+        json={"original_start": "2026-01-12T18:00:00Z", "is_cancelled": True},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    res = await client.put(
+        base,
+        json={
+            "original_start": "2026-01-19T18:00:00Z",
+            "start_time": "2026-01-20T08:00:00Z",
+            "end_time": "2026-01-20T09:00:00Z",
+            "title": "Yoga (moved)",
+        },
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    moved_id = res.json()["id"]
+
+    items = await _timeline(
+        client, auth_headers, "2026-01-01T00:00:00Z", "2026-02-28T23:59:59Z"
+    )
+    assert [(item["start"][:16], item["title"]) for item in items] == [
+        ("2026-01-05T18:00", "Yoga"),
+        ("2026-01-20T08:00", "Yoga (moved)"),
+        ("2026-01-26T18:00", "Yoga"),
+    ]
+
+    # La ocurrencia movida aparece aunque su inicio original quede fuera
+    items = await _timeline(
+        client, auth_headers, "2026-01-20T00:00:00Z", "2026-01-20T23:59:59Z"
+    )
+    assert [item["title"] for item in items] == ["Yoga (moved)"]
+
+    res = await client.delete(f"{base}/{moved_id}", headers=auth_headers)
+    assert res.status_code == 204
+    res = await client.get(base, headers=auth_headers)
+    assert len(res.json()) == 1
+
+    res = await client.get(
+        "/timeline/density?start=2026-01-01&end=2026-01-31", headers=auth_headers
+    )
+    events_per_day = {d["day"]: d["events"] for d in res.json() if d["events"]}
+    assert events_per_day == {"2026-01-05": 1, "2026-01-19": 1, "2026-01-26": 1}
+
+
+@pytest.mark.asyncio
+async def test_series_validation(client, auth_headers, category_id):
+    res = await client.post(
+        "/events/",
+        json={
+            "title": "Broken",
+            "start_time": "2026-01-05T18:00:00Z",
+            "end_time": "2026-01-05T19:00:00Z",
+            "category_id": category_id,
+            "recurrence_rule": "FREQ=SOMETIMES",
+        },
+        headers=auth_headers,
+    )
+    assert res.status_code == 422
+
+    single = await client.post(
+        "/events/",
+        json={
+            "title": "Once",
+            "start_time": "2026-01-05T18:00:00Z",
+            "end_time": "2026-01-05T19:00:00Z",
+            "category_id": category_id,
+        },
+        headers=auth_headers,
+    )
+    res = await client.put(
+        f"/events/{single.json()['id']}/exceptions",
+        json={"original_start": "2026-01-05T18:00:00Z", "is_cancelled": True},
+        headers=auth_headers,
+    )
+    assert res.status_code == 400
+
+
+def test_series_until_and_lazy_expansion():
+    start = datetime(2026, 1, 5, 18, tzinfo=timezone.utc)
+    end = datetime(2026, 1, 5, 19, tzinfo=timezone.utc)
+    assert recurrence_service.series_until(start, end, "FREQ=DAILY") is None
+    assert recurrence_service.series_until(
+        start, end, "FREQ=DAILY;COUNT=3"
+    ) == datetime(2026, 1, 7, 19, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_occurrence_cache_per_window(client, auth_headers, category_id):
+    await _create_series(client, auth_headers, category_id, "FREQ=DAILY")
+    window = ("2026-02-01T00:00:00Z", "2026-02-07T23:59:59Z")
+
+    await _timeline(client, auth_headers, *window)
+    misses = cache.occurrence_cache.misses
+    await _timeline(client, auth_headers, *window, limit=3)
+    assert cache.occurrence_cache.misses == misses
+    assert cache.occurrence_cache.hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_sql_timeline_with_many_virtual_items(
+    client, auth_headers, category_id, db_session
+):
+    series = await _create_series(client, auth_headers, category_id, "FREQ=DAILY")
+    await _create_series(client, auth_headers, category_id, "FREQ=DAILY")
+    await client.post(
+        "/events/",
+        json={
+            "title": "Single",
+            "start_time": "2026-06-01T10:00:00Z",
+            "end_time": "2026-06-01T11:00:00Z",
+            "category_id": category_id,
+        },
+        headers=auth_headers,
+    )
+    # ~730 ocurrencias + festivos: antes eran más de 500 términos en el UNION ALL
+    window = (
+        datetime(2026, 1, 1, tzinfo=timezone.utc),
+        datetime(2026, 12, 31, 23, 59, tzinfo=timezone.utc),
+    )
+    pages = {
+        strategy: timeline_service.get_timeline(
+            db_session,
+            series["user_id"],
+            *window,
+            skip=300,
+            limit=400,
+            strategy=strategy,
+        )
+        for strategy in ("sql", "python")
+    }
+    assert len(pages["sql"]) == 400
+    assert pages["sql"] == pages["python"]
+
+    response = await client.get(
+        "/timeline/",
+        params={"start": "2026-01-01T00:00:00Z", "end": "2026-12-31T23:59:59Z"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=SECONDLY;UNTIL=20300101T000000Z",
+        "FREQ=MINUTELY;COUNT=300000",
+        "FREQ=HOURLY",
+        "FREQ=DAILY;BYHOUR=8,20",
+        f"FREQ=DAILY;COUNT={recurrence_service.MAX_RECURRENCE_COUNT + 1}",
+    ],
+)
+def test_parse_rule_rejects_unbounded_expansion(rule):
+    start = datetime(2026, 1, 5, 18, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        recurrence_service.parse_rule(rule, start)
+
+
+def test_series_until_does_not_walk_until_rules():
+    start = datetime(2026, 1, 5, 18, tzinfo=timezone.utc)
+    end = datetime(2026, 1, 5, 19, tzinfo=timezone.utc)
+    # Cota superior directa desde UNTIL, sin recorrer 8000 años de ocurrencias
+    assert recurrence_service.series_until(
+        start, end, "FREQ=DAILY;UNTIL=99991230T000000Z"
+    ) == datetime(9999, 12, 30, 1, tzinfo=timezone.utc)
+    assert recurrence_service.series_until(
+        start, end, "FREQ=WEEKLY;UNTIL=20260301T000000Z"
+    ) == datetime(2026, 3, 1, 1, tzinfo=timezone.utc)
@@ -183,3 +183,108 @@ async def test_timeline_with_date_range(client, auth_headers, category_id):
     assert resp.status_code == 200
     items = resp.json()
     assert len(items) > 0
+
+
+@pytest.mark.asyncio
+async def test_task_stats_endpoint(client, auth_headers):
+    """Las estadísticas salen de una única consulta agregada"""
+    await client.post(
+        "/tasks/", json={"title": "A", "energy_required": "low"}, headers=auth_headers
+    )
+    resp = await client.post(
+        "/tasks/", json={"title": "B", "energy_required": "high"}, headers=auth_headers
+    )
+    await client.patch(f"/tasks/{resp.json()['id']}/complete", headers=auth_headers)
+
+    resp = await client.get("/tasks/stats", headers=auth_headers)
+    assert resp.status_code == 200
+    stats = resp.json()
+    assert stats["completed"] == 1
+    assert stats["incomplete"] == 1
+    assert stats["total"] == 2
+    assert stats["by_energy"]["low"]["incomplete"] == 1
+    # Usuario en caché + un único GROUP BY
+    assert resp.headers["X-DB-Query-Count"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_timeline_density(client, auth_headers, category_id):
+    await client.post(
+        "/events/",
+        json={
+            "title": "Density",
+            "start_time": "2026-02-10T09:00:00Z",
+            "end_time": "2026-02-10T10:00:00Z",
+            "category_id": category_id,
+        },
+        headers=auth_headers,
+    )
+    response = await client.get(
+        "/timeline/density?start=2026-02-01", headers=auth_headers
+    )
+    assert response.status_code == 200
+    days = response.json()
+    assert len(days) == 28
+    assert days[9] == {"day": "2026-02-10", "events": 1, "tasks": 0, "holidays": 0}
+
+    response = await client.get(
+        "/timeline/density?start=2026-02-10&end=2026-02-01", headers=auth_headers
+    )
+    assert response.status_code == 400
+    response = await client.get(
+        "/timeline/density?start=2026-01-01&end=2027-06-01", headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_timeline_free_slots(client, auth_headers, category_id):
+    for start, end in (
+        ("2026-02-10T09:00:00Z", "2026-02-10T10:00:00Z"),
+        ("2026-02-10T09:30:00Z", "2026-02-10T11:00:00Z"),  # Se solapa
+        ("2026-02-10T11:10:00Z", "2026-02-10T12:00:00Z"),  # Deja un hueco de 10 min
+    ):
+        await client.post(
+            "/events/",
+            json={
+                "title": "Busy",
+                "start_time": start,
+                "end_time": end,
+                "category_id": category_id,
+            },
+            headers=auth_headers,
+        )
+    await client.post(
+        "/tasks/",
+        json={"title": "Sin fin", "planned_start": "2026-02-10T14:00:00Z"},
+        headers=auth_headers,
+    )
+
+    params = {"start": "2026-02-10T08:00:00Z", "end": "2026-02-10T18:00:00Z"}
+    response = await client.get(
+        "/timeline/free-slots", params=params, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [
+        (s["start"][11:16], s["end"][11:16], s["minutes"]) for s in response.json()
+    ] == [
+        ("08:00", "09:00", 60),
+        ("12:00", "14:00", 120),
+        ("14:30", "18:00", 210),
+    ]
+
+    response = await client.get(
+        "/timeline/free-slots",
+        params={**params, "min_minutes": 5},
+        headers=auth_headers,
+    )
+    assert ("11:00", "11:10") in [
+        (s["start"][11:16], s["end"][11:16]) for s in response.json()
+    ]
+
+    response = await client.get(
+        "/timeline/free-slots",
+        params={"start": "2026-02-10T00:00:00Z", "end": "2026-08-10T00:00:00Z"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+import crud
+import models
+import schemas
+from services import scheduler_service, timeline_service
+
+MONDAY = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+
+def _at(day, hour, minute=0):
+    return MONDAY + timedelta(days=day, hours=hour, minutes=minute)
+
+
+def _task(task_id, energy="medium", deadline=None):
+    return SimpleNamespace(
+        id=task_id, energy_required=models.EnergyLevel(energy), deadline=deadline
+    )
+
+
+def _fragments():
+    # Lunes: mañana 9-10 y tarde 15-16
+    return scheduler_service.split_periods(
+        [(_at(0, 9), _at(0, 10)), (_at(0, 15), _at(0, 16))]
+    )
+
+
+def test_plan_is_edf_and_energy_aware():
+    tasks = [
+        _task(1, "low"),
+        _task(2, "high"),
+        _task(3, "medium", deadline=_at(0, 9, 30)),
+        _task(4, "low", deadline=_at(0, 16)),
+    ]
+    plan, unscheduled = scheduler_service.plan_schedule(tasks, _fragments())
+    placed = {task.id: (start, late) for task, start, _, late in plan}
+
+    assert placed[3] == (_at(0, 9), False)  # Vence antes: primer hueco
+    assert placed[4] == (_at(0, 15), False)  # Baja energía: tarde
+    assert placed[2] == (_at(0, 9, 30), False)  # Alta energía: mañana
+    assert placed[1] == (_at(0, 15, 30), False)
+    assert unscheduled == []
+
+
+def test_plan_marks_late_and_reports_overflow():
+    tasks = [_task(i, "high", deadline=_at(0, 8)) for i in range(1, 4)] + [_task(9)]
+    fragments = scheduler_service.split_periods([(_at(0, 9), _at(0, 10))])
+    plan, unscheduled = scheduler_service.plan_schedule(tasks, fragments)
+    assert [(task.id, late) for task, _, _, late in plan] == [(1, True), (2, True)]
+    assert unscheduled == [3, 9]
+
+
+def test_late_tasks_do_not_take_feasible_slots():
+    tasks = [
+        _task(1, deadline=_at(0, 8)),  # Ya no llega
+        _task(2, deadline=_at(0, 9, 30)),
+        _task(3, deadline=_at(0, 10)),
+    ]
+    fragments = scheduler_service.split_periods([(_at(0, 9), _at(0, 10))])
+    plan, unscheduled = scheduler_service.plan_schedule(tasks, fragments)
+    assert [(task.id, start, late) for task, start, _, late in plan] == [
+        (2, _at(0, 9), False),
+        (3, _at(0, 9, 30), False),
+    ]
+    assert unscheduled == [1]
+
+
+@pytest.fixture
+def scheduler_user(db_session):
+    user = crud.create_user(
+        db_session,
+        schemas.UserCreate(email="scheduler@example.com", password="password123"),
+    )
+    category = models.Category(name="Work", user_id=user.id)
+    db_session.add(category)
+    db_session.flush()
+    db_session.add_all(
+        [
+            models.Event(
+                title="Meeting",
+                start_time=_at(0, 9),
+                end_time=_at(0, 12, 10),
+                user_id=user.id,
+                category_id=category.id,
+            ),
+            models.Task(
+                title="Already planned",
+                planned_start=_at(0, 13),
+                planned_end=_at(0, 14),
+                user_id=user.id,
+            ),
+            models.Task(
+                title="Done",
+                is_completed=True,
+                status=models.TaskStatus.completed,
+                user_id=user.id,
+            ),
+            models.Task(
+                title="Report",
+                energy_required=models.EnergyLevel.high,
+                deadline=_at(1, 12),
+                user_id=user.id,
+            ),
+            models.Task(
+                title="Emails",
+                energy_required=models.EnergyLevel.low,
+                user_id=user.id,
+            ),
+        ]
+    )
+    db_session.commit()
+    return user
+
+
+def test_schedule_user_applies_plan_in_bulk(db_session, scheduler_user):
+    now = _at(0, 8, 50)
+    window = (_at(0, 0), _at(2, 0))
+    # Calentar la caché del timeline: tras aplicar el plan debe invalidarse
+    before = timeline_service.get_timeline(db_session, scheduler_user.id, *window)
+
+    result = scheduler_service.schedule_user(
+        db_session, scheduler_user.id, now=now, horizon_days=7
+    )
+    assert result["applied"] == 2
+    assert result["unscheduled"] == []
+    planned = {item["title"]: item["planned_start"] for item in result["items"]}
+    # Alta energía: primer hueco de mañana tras la reunión (12:10 -> 12:15)
+    assert planned["Report"] == _at(0, 12, 15)
+    # Baja energía: la tarde, después de la tarea agendada a mano
+    assert planned["Emails"] == _at(0, 14)
+
+    after = timeline_service.get_timeline(db_session, scheduler_user.id, *window)
+    assert len(after) == len(before) + 2
+    tasks = {t.title: t for t in db_session.query(models.Task)}
+    db_session.refresh(tasks["Report"])
+    assert tasks["Report"].planned_end.replace(tzinfo=timezone.utc) == _at(0, 12, 45)
+    assert tasks["Already planned"].planned_start.replace(tzinfo=timezone.utc) == _at(
+        0, 13
+    )
+
+    # Ya no quedan tareas sin agendar
+    again = scheduler_service.schedule_user(
+        db_session, scheduler_user.id, now=now, horizon_days=7
+    )
+    assert again["items"] == [] and again["applied"] == 0
+
+
+@pytest.mark.asyncio
+async def test_schedule_endpoints(client, auth_headers):
+    deadline = (datetime.now(timezone.utc) + timedelta(days=3)).isoformat()
+    for title in ("A", "B"):
+        await client.post(
+            "/tasks/",
+            json={"title": title, "deadline": deadline},
+            headers=auth_headers,
+        )
+
+    response = await client.get("/tasks/schedule", headers=auth_headers)
+    assert response.status_code == 200
+    proposal = response.json()
+    assert [item["title"] for item in proposal["items"]] == ["A", "B"]
+    assert proposal["applied"] is None
+    tasks = (await client.get("/tasks/", headers=auth_headers)).json()
+    assert all(task["planned_start"] is None for task in tasks)
+
+    response = await client.post("/tasks/schedule", headers=auth_headers)
+    assert response.json()["applied"] == 2
+    tasks = (await client.get("/tasks/", headers=auth_headers)).json()
+    assert all(task["planned_start"] for task in tasks)
+
+    response = await client.get("/tasks/schedule?horizon_days=0", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_apply_schedule_skips_tasks_planned_meanwhile(db_session, scheduler_user):
+    manual = models.Task(
+        title="Night",
+        planned_start=_at(0, 23),
+        planned_end=_at(1, 1),  # Cruza la medianoche: fila en el índice del día 1
+        user_id=scheduler_user.id,
+    )
+    db_session.add(manual)
+    db_session.commit()
+    emails = db_session.query(models.Task).filter_by(title="Emails").one()
+
+    index = models.TimelineDayIndex
+    rows_before = (
+        db_session.query(index.day).filter_by(item_type="task", item_id=manual.id).all()
+    )
+    assert rows_before == [(_at(1, 0).date(),)]
+
+    # Plan calculado antes de que el usuario agendara "Night" a mano
+    items = [
+        {
+            "task_id": task.id,
+            "planned_start": start,
+            "planned_end": start + timedelta(minutes=30),
+        }
+        for task, start in ((manual, _at(2, 10)), (emails, _at(2, 15)))
+    ]
+    assert scheduler_service.apply_schedule(db_session, scheduler_user.id, items) == 1
+
+    db_session.refresh(manual)
+    assert manual.planned_start.replace(tzinfo=timezone.utc) == _at(0, 23)
+    rows_after = (
+        db_session.query(index.day).filter_by(item_type="task", item_id=manual.id).all()
+    )
+    assert rows_after == rows_before
+
+
+def test_schedule_skips_weekends_and_holidays(db_session):
+    user = crud.create_user(
+        db_session,
+        schemas.UserCreate(
+            email="scheduler_mx@example.com", password="password123", country="MX"
+        ),
+    )
+    user.country = "MX"
+    db_session.add(models.Task(title="Paperwork", user_id=user.id))
+    db_session.commit()
+
+    # Viernes 13/03/2026 a última hora; el lunes 16 es festivo en México
+    result = scheduler_service.propose_schedule(
+        db_session, user.id, now=datetime(2026, 3, 13, 17, 45, tzinfo=timezone.utc)
+    )
+    assert result["items"][0]["planned_start"] == datetime(
+        2026, 3, 17, 9, tzinfo=timezone.utc
+    )
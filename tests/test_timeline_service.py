@@ -0,0 +1,477 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import crud
+import models
+import schemas
+from services import timeline_service
+
+WINDOW_START = datetime(2025, 12, 1, tzinfo=timezone.utc)
+WINDOW_END = datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def timeline_user(db_session):
+    user_in = schemas.UserCreate(
+        email="timeline_service@example.com", password="password123", country="US"
+    )
+    user = crud.create_user(db_session, user_in)
+
+    work = models.Category(name="Work", color_hex="#123456", user_id=user.id)
+    home = models.Category(name="Home", color_hex="#abcdef", user_id=user.id)
+    db_session.add_all([work, home])
+    db_session.flush()
+
+    for day in range(1, 31, 2):
+        start = WINDOW_START + timedelta(days=day, hours=9)
+        db_session.add(
+            models.Event(
+                title=f"Event {day}",
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                user_id=user.id,
+                category_id=work.id if day % 4 == 1 else home.id,
+            )
+        )
+    for day in range(0, 31, 3):
+        start = WINDOW_START + timedelta(days=day, hours=9)  # Coinciden con eventos
+        db_session.add(
+            models.Task(
+                title=f"Task {day}",
+                planned_start=start,
+                planned_end=start + timedelta(hours=2) if day % 2 else None,
+                is_completed=day % 2 == 0,
+                user_id=user.id,
+            )
+        )
+    db_session.commit()
+    return user
+
+
+def _timeline(db_session, user, skip, limit, strategy):
+    return timeline_service.get_timeline(
+        db_session,
+        user.id,
+        WINDOW_START,
+        WINDOW_END,
+        skip=skip,
+        limit=limit,
+        strategy=strategy,
+    )
+
+
+def test_sql_timeline_matches_python_merge(db_session, timeline_user):
+    full = _timeline(db_session, timeline_user, 0, 1000, "python")
+    types = {item["type"] for item in full}
+    assert types == {"event", "task", "holiday"}
+    assert full == sorted(full, key=timeline_service.timeline_sort_key)
+
+    for skip, limit in ((0, 1000), (0, 5), (7, 5), (20, 10), (100, 5)):
+        assert _timeline(db_session, timeline_user, skip, limit, "sql") == (
+            full[skip : skip + limit]
+        )
+
+
+def test_sql_timeline_item_fields(db_session, timeline_user):
+    items = _timeline(db_session, timeline_user, 0, 1000, "sql")
+    task = next(i for i in items if i["type"] == "task" and i["title"] == "Task 0")
+    assert task["end"] - task["start"] == timeline_service.TASK_DEFAULT_DURATION
+    assert task["is_completed"] is True
+    assert task["start"].tzinfo is not None
+
+    colors = {i["color"] for i in items if i["type"] == "event"}
+    assert colors == {"#123456", "#abcdef"}
+
+    christmas = next(
+        i for i in items if i["type"] == "holiday" and "Christmas" in i["title"]
+    )
+    assert christmas["start"] == datetime(2025, 12, 25, tzinfo=timezone.utc)
+
+
+def test_unknown_timeline_strategy(db_session, timeline_user):
+    with pytest.raises(ValueError):
+        _timeline(db_session, timeline_user, 0, 10, "nosql")
+
+
+def test_cursor_pages_match_full_timeline(db_session, timeline_user):
+    full = _timeline(db_session, timeline_user, 0, 1000, "sql")
+
+    pages, after = [], None
+    while True:
+        page = timeline_service.get_timeline(
+            db_session,
+            timeline_user.id,
+            WINDOW_START,
+            WINDOW_END,
+            limit=4,
+            after=after,
+        )
+        if not page:
+            break
+        pages.extend(page)
+        after = timeline_service.timeline_sort_key(page[-1])
+    assert pages == full
+
+
+def _day_index(db_session, item_type, item_id):
+    return [
+        row.day
+        for row in db_session.query(models.TimelineDayIndex)
+        .filter_by(item_type=item_type, item_id=item_id)
+        .order_by(models.TimelineDayIndex.day)
+    ]
+
+
+def test_day_index_follows_event_writes(db_session, timeline_user):
+    category_id = db_session.query(models.Category.id).first()[0]
+    trip = models.Event(
+        title="Trip",
+        start_time=datetime(2026, 2, 10, 18, tzinfo=timezone.utc),
+        end_time=datetime(2026, 2, 13, tzinfo=timezone.utc),  # Medianoche: excluido
+        user_id=timeline_user.id,
+        category_id=category_id,
+    )
+    db_session.add(trip)
+    db_session.commit()
+    assert _day_index(db_session, "event", trip.id) == [
+        datetime(2026, 2, 11).date(),
+        datetime(2026, 2, 12).date(),
+    ]
+
+    trip.end_time = datetime(2026, 2, 10, 20, tzinfo=timezone.utc)
+    db_session.commit()
+    assert _day_index(db_session, "event", trip.id) == []
+
+    trip.end_time = datetime(2026, 2, 11, 9, tzinfo=timezone.utc)
+    db_session.commit()
+    assert len(_day_index(db_session, "event", trip.id)) == 1
+
+    db_session.delete(trip)
+    db_session.commit()
+    assert _day_index(db_session, "event", trip.id) == []
+
+
+@pytest.mark.parametrize("strategy", ["sql", "python"])
+def test_timeline_includes_items_overlapping_window(
+    db_session, timeline_user, strategy
+):
+    category_id = db_session.query(models.Category.id).first()[0]
+    db_session.add_all(
+        [
+            models.Event(
+                title="Conference",
+                start_time=datetime(2026, 3, 1, 9, tzinfo=timezone.utc),
+                end_time=datetime(2026, 3, 4, 17, tzinfo=timezone.utc),
+                user_id=timeline_user.id,
+                category_id=category_id,
+            ),
+            models.Event(
+                title="Breakfast",
+                start_time=datetime(2026, 3, 3, 7, tzinfo=timezone.utc),
+                end_time=datetime(2026, 3, 3, 10, tzinfo=timezone.utc),
+                user_id=timeline_user.id,
+                category_id=category_id,
+            ),
+            models.Event(
+                title="Finished",
+                start_time=datetime(2026, 3, 3, 6, tzinfo=timezone.utc),
+                end_time=datetime(2026, 3, 3, 8, tzinfo=timezone.utc),
+                user_id=timeline_user.id,
+                category_id=category_id,
+            ),
+            models.Task(
+                title="Late task",  # Sin planned_end: 23:50 -> 00:20
+                planned_start=datetime(2026, 3, 2, 23, 50, tzinfo=timezone.utc),
+                user_id=timeline_user.id,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    window_start = datetime(2026, 3, 3, 0, 0, tzinfo=timezone.utc)
+    items = timeline_service.get_timeline(
+        db_session,
+        timeline_user.id,
+        window_start,
+        datetime(2026, 3, 3, 23, 59, tzinfo=timezone.utc),
+        strategy=strategy,
+    )
+    assert [i["title"] for i in items] == [
+        "Conference",
+        "Late task",
+        "Finished",
+        "Breakfast",
+    ]
+
+    items = timeline_service.get_timeline(
+        db_session,
+        timeline_user.id,
+        datetime(2026, 3, 3, 9, 0, tzinfo=timezone.utc),
+        datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc),
+        strategy=strategy,
+    )
+    assert [i["title"] for i in items] == ["Conference", "Breakfast"]
+
+
+def test_now_view_includes_multi_day_event(db_session, timeline_user):
+    category_id = db_session.query(models.Category.id).first()[0]
+    db_session.add(
+        models.Event(
+            title="Retreat",
+            start_time=datetime(2026, 4, 1, 9, tzinfo=timezone.utc),
+            end_time=datetime(2026, 4, 3, 17, tzinfo=timezone.utc),
+            user_id=timeline_user.id,
+            category_id=category_id,
+        )
+    )
+    db_session.commit()
+
+    view = timeline_service.get_now_view(
+        db_session,
+        timeline_user.id,
+        datetime(2026, 4, 2, 12, tzinfo=timezone.utc),
+    )
+    assert view["current"]["title"] == "Retreat"
+
+
+def test_reindex_rebuilds_day_index(db_session, timeline_user):
+    import timeline_index
+
+    task = models.Task(
+        title="Overnight",
+        planned_start=datetime(2026, 5, 1, 22, tzinfo=timezone.utc),
+        planned_end=datetime(2026, 5, 2, 2, tzinfo=timezone.utc),
+        user_id=timeline_user.id,
+    )
+    db_session.add(task)
+    db_session.commit()
+    db_session.query(models.TimelineDayIndex).delete()
+
+    assert timeline_index.reindex_user(db_session, timeline_user.id) >= 1
+    assert _day_index(db_session, "task", task.id) == [datetime(2026, 5, 2).date()]
+
+
+def test_now_view_cached_until_next_boundary(db_session, timeline_user):
+    import cache
+
+    category_id = db_session.query(models.Category.id).first()[0]
+    crud.create_user_event(
+        db_session,
+        schemas.EventCreate(
+            title="Meeting",
+            start_time=datetime(2026, 6, 1, 10, tzinfo=timezone.utc),
+            end_time=datetime(2026, 6, 1, 11, tzinfo=timezone.utc),
+            category_id=category_id,
+        ),
+        timeline_user.id,
+    )
+    lunch = models.Event(
+        title="Lunch",
+        start_time=datetime(2026, 6, 1, 13, tzinfo=timezone.utc),
+        end_time=datetime(2026, 6, 1, 14, tzinfo=timezone.utc),
+        user_id=timeline_user.id,
+        category_id=category_id,
+    )
+    db_session.add(lunch)
+    db_session.commit()
+    cache.now_view_cache.clear()
+
+    def now_view(hour, minute=0):
+        return timeline_service.get_now_view(
+            db_session,
+            timeline_user.id,
+            datetime(2026, 6, 1, hour, minute, tzinfo=timezone.utc),
+        )
+
+    view = now_view(10, 15)
+    assert view["current"]["title"] == "Meeting"
+    assert view["next"]["title"] == "Lunch"
+
+    # Escritura fuera de crud: la caché sigue sirviendo la vista anterior
+    lunch.title = "Late lunch"
+    db_session.commit()
+    assert now_view(10, 30)["next"]["title"] == "Lunch"
+    assert cache.now_view_cache.hits == 1
+
+    # Pasado el fin del elemento actual se recalcula
+    view = now_view(11, 30)
+    assert view["current"] is None
+    assert view["next"]["title"] == "Late lunch"
+
+    # Las escrituras por crud invalidan la vista
+    crud.update_event(db_session, lunch.id, schemas.EventUpdate(title="Lunch"))
+    assert now_view(11, 31)["next"]["title"] == "Lunch"
+
+
+def test_sql_timeline_deep_skip_reads_limit_plus_virtual_rows(
+    db_session, timeline_user
+):
+    from sqlalchemy import event
+
+    category_id = db_session.query(models.Category.id).first()[0]
+    db_session.add_all(
+        models.Task(
+            title=f"Bulk {i}",
+            planned_start=WINDOW_START + timedelta(minutes=5 * i),
+            user_id=timeline_user.id,
+        )
+        for i in range(5000)
+    )
+    db_session.commit()
+    crud.create_user_event(
+        db_session,
+        schemas.EventCreate(
+            title="Daily",
+            start_time=WINDOW_START + timedelta(hours=8),
+            end_time=WINDOW_START + timedelta(hours=8, minutes=30),
+            category_id=category_id,
+            recurrence_rule="FREQ=DAILY",
+        ),
+        timeline_user.id,
+    )
+    virtual = len(
+        timeline_service.get_holiday_items(
+            db_session, timeline_user.id, WINDOW_START, WINDOW_END
+        )
+    ) + len(
+        timeline_service.get_occurrence_items(
+            db_session, timeline_user.id, WINDOW_START, WINDOW_END
+        )
+    )
+    assert virtual > 30
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "UNION ALL" in statement:
+            statements.append(parameters)
+
+    engine = db_session.get_bind().engine
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        page = _timeline(db_session, timeline_user, 4000, 50, "sql")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    # LIMIT limit + V OFFSET skip - V: no se leen las 4000 filas anteriores
+    assert tuple(statements[-1][-2:]) == (50 + virtual, 4000 - virtual)
+    assert len(page) == 50
+    assert page == _timeline(db_session, timeline_user, 4000, 50, "python")
+
+    # Alrededor de V (offset 0 o no) y al final de la ventana
+    for skip in (0, 7, virtual - 1, virtual, virtual + 3, 5000, 6000):
+        assert _timeline(db_session, timeline_user, skip, 40, "sql") == _timeline(
+            db_session, timeline_user, skip, 40, "python"
+        ), skip
+
+
+def test_timeline_cache_is_versioned_by_writes(db_session, timeline_user):
+    import cache
+
+    def window():
+        return _timeline(db_session, timeline_user, 0, 50, "sql")
+
+    first = window()
+    assert window() == first
+    assert cache.timeline_cache.hits == 1
+
+    # Escritura fuera de crud: la página cacheada sigue sirviéndose
+    event = db_session.query(models.Event).filter_by(title="Event 1").one()
+    event.title = "Renamed"
+    db_session.commit()
+    assert window() == first
+
+    # crud incrementa la versión del usuario: la clave anterior ya no se usa
+    version = cache.timeline_version(db_session, timeline_user.id)
+    crud.update_event(db_session, event.id, schemas.EventUpdate(title="Event one"))
+    assert cache.timeline_version(db_session, timeline_user.id) > version
+    titles = [item["title"] for item in window()]
+    assert "Event one" in titles
+    assert cache.timeline_cache.stats()["hit_rate"] == 0.5
+
+
+def test_timeline_version_is_shared_between_workers(db_session, timeline_user):
+    import cache
+
+    def window():
+        return _timeline(db_session, timeline_user, 0, 50, "sql")
+
+    first = window()
+    now = datetime(2025, 12, 1, 8, tzinfo=timezone.utc)
+    view = timeline_service.get_now_view(db_session, timeline_user.id, now)
+    now_entry = cache.now_view_cache.get(timeline_user.id)
+
+    # Otro worker escribe: su proceso invalida su propia caché, no la de este
+    other_worker = sessionmaker(bind=db_session.get_bind())()
+    event = other_worker.query(models.Event).filter_by(title="Event 1").one()
+    crud.update_event(other_worker, event.id, schemas.EventUpdate(title="Elsewhere"))
+    other_worker.close()
+    cache.now_view_cache.set(timeline_user.id, now_entry)
+
+    assert window() != first
+    assert "Elsewhere" in [item["title"] for item in window()]
+    assert timeline_service.get_now_view(db_session, timeline_user.id, now) is not view
+
+
+def test_timeline_version_rolls_back_with_the_write(db_session, timeline_user):
+    import cache
+
+    user_id = timeline_user.id
+    version = cache.timeline_version(db_session, user_id)
+    write = db_session.begin_nested()
+    cache.invalidate_timeline(db_session, user_id)
+    assert cache.timeline_version(db_session, user_id) == version + 1
+    write.rollback()
+    assert cache.timeline_version(db_session, user_id) == version
+
+
+def test_density_counts_per_day(db_session, timeline_user):
+    from datetime import date
+
+    category_id = db_session.query(models.Category.id).first()[0]
+    db_session.add(
+        models.Event(
+            title="Trip",
+            start_time=datetime(2025, 12, 30, 18, tzinfo=timezone.utc),
+            end_time=datetime(2026, 1, 2, 12, tzinfo=timezone.utc),
+            user_id=timeline_user.id,
+            category_id=category_id,
+        )
+    )
+    db_session.commit()
+
+    density = timeline_service.get_density(
+        db_session, timeline_user.id, date(2025, 12, 1), date(2025, 12, 31)
+    )
+    assert len(density) == 31
+    by_day = {entry["day"]: entry for entry in density}
+    assert by_day[date(2025, 12, 1)] == {
+        "day": date(2025, 12, 1),
+        "events": 0,
+        "tasks": 1,
+        "holidays": 0,
+    }
+    assert by_day[date(2025, 12, 2)]["events"] == 1
+    assert by_day[date(2025, 12, 25)]["holidays"] == 1
+    # El viaje empieza el 30 (junto a "Event 29") y sigue el 31
+    assert by_day[date(2025, 12, 30)]["events"] == 2
+    assert by_day[date(2025, 12, 31)]["events"] == 1
+
+    full = _timeline(db_session, timeline_user, 0, 1000, "sql")
+    assert (
+        sum(e["events"] + e["tasks"] for e in density)
+        == sum(1 for item in full if item["type"] != "holiday") + 1
+    )
+
+
+def test_density_buckets_days_in_utc_on_postgresql():
+    from types import SimpleNamespace
+
+    from sqlalchemy.dialects import postgresql
+
+    pg = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=postgresql.dialect()))
+    expr = timeline_service._utc_day_expr(pg, models.Event.start_time)
+    sql = str(expr.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("date(timezone(")
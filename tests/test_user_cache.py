@@ -0,0 +1,76 @@
+import pytest
+
+import cache
+import crud
+import schemas
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_hit_user_cache(client, auth_headers):
+    res = await client.get("/tasks/", headers=auth_headers)
+    assert res.status_code == 200
+    before = cache.user_cache.stats()
+
+    for _ in range(3):
+        res = await client.get("/tasks/", headers=auth_headers)
+        assert res.status_code == 200
+
+    after = cache.user_cache.stats()
+    assert after["hits"] - before["hits"] == 3
+    assert after["misses"] == before["misses"]
+    assert cache.token_cache.stats()["hits"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cache(client, auth_headers):
+    res = await client.get("/users/me", headers=auth_headers)
+    assert res.status_code == 200
+    user_id = res.json()["id"]
+    assert cache.user_cache.get(user_id) is not None
+    assert "hashed_password" not in cache.user_cache.get(user_id)
+
+    res = await client.put("/users/me", json={"country": "ES"}, headers=auth_headers)
+    assert res.status_code == 200
+    assert cache.user_cache.get(user_id) is None
+
+    res = await client.get("/users/me", headers=auth_headers)
+    assert res.json()["country"] == "ES"
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_cached(client):
+    headers = {"Authorization": "Bearer not-a-jwt"}
+    res = await client.get("/tasks/", headers=headers)
+    assert res.status_code == 401
+    assert cache.token_cache.get("not-a-jwt") is None
+
+
+def test_ttl_cache_lru_eviction():
+    c = cache.TTLCache("test_lru", maxsize=2, ttl=60)
+    try:
+        c.set("a", 1)
+        c.set("b", 2)
+        assert c.get("a") == 1  # "a" pasa a ser el más reciente
+        c.set("c", 3)
+        assert c.get("b") is None
+        assert c.get("a") == 1
+        assert c.stats()["evictions"] == 1
+
+        c.set("d", 4, ttl=0)  # TTL no positivo: no se guarda
+        assert c.get("d") is None
+    finally:
+        cache._registry.remove(c)
+
+
+def test_cached_user_loads_password_hash_on_demand(db_session):
+    import dependencies
+
+    user = crud.create_user(
+        db_session, schemas.UserCreate(email="hash@example.com", password="pass12345")
+    )
+    dependencies._load_user(db_session, user.id)  # Llena la caché
+    db_session.expunge_all()
+
+    cached = dependencies._load_user(db_session, user.id)
+    assert "hashed_password" not in cached.__dict__
+    assert cached.hashed_password == user.hashed_password
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import exc
+
+import crud
+import models
+import schemas
+
+
+@pytest.mark.asyncio
+async def test_users_me_is_lean(client, auth_headers):
+    await client.post(
+        "/tasks/", json={"title": "T", "energy_required": "low"}, headers=auth_headers
+    )
+    res = await client.get("/users/me", headers=auth_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert "tasks" not in body and "events" not in body
+    assert set(body) == {"id", "email", "is_active", "country"}
+    # Con el usuario en caché, el perfil no necesita ninguna consulta
+    assert res.headers["X-DB-Query-Count"] == "0"
+
+
+@pytest.mark.asyncio
+async def test_users_me_full_loads_children(client, auth_headers, category_id):
+    await client.post(
+        "/tasks/", json={"title": "T", "energy_required": "low"}, headers=auth_headers
+    )
+    await client.post(
+        "/events/",
+        json={
+            "title": "E",
+            "start_time": "2026-01-01T10:00:00Z",
+            "end_time": "2026-01-01T11:00:00Z",
+            "category_id": category_id,
+        },
+        headers=auth_headers,
+    )
+    res = await client.get("/users/me/full", headers=auth_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert [t["title"] for t in body["tasks"]] == ["T"]
+    assert [e["title"] for e in body["events"]] == ["E"]
+
+
+def test_user_relationships_never_lazy_load(db_session):
+    user = crud.create_user(
+        db_session, schemas.UserCreate(email="raise@example.com", password="pw")
+    )
+    db_session.expire(user, ["tasks"])
+    with pytest.raises(exc.InvalidRequestError):
+        user.tasks
+
+    loaded = crud.get_user_with_children(db_session, user.id)
+    assert loaded.tasks == []
@@ -0,0 +1,165 @@
+"""
+Mantenimiento de timeline_day_index (ver models.TimelineDayIndex).
+
+Los listeners de mapper reescriben las filas de un evento o tarea cuando se
+inserta, cambia de horario o se borra, dentro de la misma transacción.
+Las actualizaciones masivas con Query.update() no disparan estos eventos: tras
+una de ellas hay que llamar a reindex_user() (o dev_tools/rebuild_timeline_index.py),
+o a index_task_intervals() si sólo cambió el horario de algunas tareas.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import delete, event, insert, inspect, select
+
+import models
+
+# Duración asumida de una tarea agendada sin planned_end
+TASK_DEFAULT_DURATION = timedelta(minutes=30)
+
+_DAY = timedelta(days=1)
+
+
+def as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)  # Naive = UTC (así lo guarda SQLite)
+    return value.astimezone(timezone.utc)
+
+
+def utc_date(value: datetime) -> date:
+    return as_utc(value).date()
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min).replace(tzinfo=timezone.utc)
+
+
+def task_end(planned_start: datetime, planned_end: datetime) -> datetime:
+    # Si no tiene planned_end, asumimos 30 mins
+    return planned_end if planned_end else planned_start + TASK_DEFAULT_DURATION
+
+
+def spanned_days(start: datetime, end: datetime):
+    """Días posteriores al de inicio en los que el intervalo [start, end) sigue activo."""
+    if start is None or end is None:
+        return []
+    start, end = as_utc(start), as_utc(end)
+    if end <= start:
+        return []
+    first = utc_date(start) + _DAY
+    # Un fin exacto a medianoche no ocupa el día que empieza
+    last = utc_date(end - timedelta(microseconds=1))
+    return [first + _DAY * i for i in range((last - first).days + 1)]
+
+
+def _item_interval(item_type: str, target):
+    if item_type == "event":
+        if target.recurrence_rule:
+            # Las series se expanden al consultar (services/recurrence_service.py)
+            return None, None
+        return target.start_time, target.end_time
+    if target.planned_start is None:
+        return None, None
+    return target.planned_start, task_end(target.planned_start, target.planned_end)
+
+
+_TRACKED = {
+    "event": (
+        models.Event,
+        ("user_id", "start_time", "end_time", "recurrence_rule"),
+    ),
+    "task": (models.Task, ("user_id", "planned_start", "planned_end")),
+}
+
+
+def _index_rows(item_type: str, target):
+    if target.user_id is None:
+        return []
+    return [
+        {
+            "user_id": target.user_id,
+            "day": day,
+            "item_type": item_type,
+            "item_id": target.id,
+        }
+        for day in spanned_days(*_item_interval(item_type, target))
+    ]
+
+
+def _delete_rows(connection, item_type: str, item_id: int):
+    table = models.TimelineDayIndex
+    connection.execute(
+        delete(table).where(table.item_type == item_type, table.item_id == item_id)
+    )
+
+
+def _write_rows(connection, item_type: str, target, replace: bool):
+    if replace:
+        _delete_rows(connection, item_type, target.id)
+    rows = _index_rows(item_type, target)
+    if rows:
+        connection.execute(insert(models.TimelineDayIndex), rows)
+
+
+def _register(item_type: str):
+    model, columns = _TRACKED[item_type]
+
+    @event.listens_for(model, "after_insert")
+    def _after_insert(mapper, connection, target):
+        _write_rows(connection, item_type, target, replace=False)
+
+    @event.listens_for(model, "after_update")
+    def _after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in columns):
+            _write_rows(connection, item_type, target, replace=True)
+
+    @event.listens_for(model, "after_delete")
+    def _after_delete(mapper, connection, target):
+        _delete_rows(connection, item_type, target.id)
+
+
+for _item_type in _TRACKED:
+    _register(_item_type)
+
+
+def reindex_user(db, user_id: int = None):
+    """Reconstruye el índice (de un usuario o completo). No hace commit."""
+    table = models.TimelineDayIndex
+    query = delete(table)
+    if user_id is not None:
+        query = query.where(table.user_id == user_id)
+    db.execute(query)
+
+    rows = []
+    for item_type, (model, _) in _TRACKED.items():
+        items = select(model)
+        if user_id is not None:
+            items = items.where(model.user_id == user_id)
+        for target in db.scalars(items):
+            rows.extend(_index_rows(item_type, target))
+    if rows:
+        db.execute(insert(table), rows)
+    return len(rows)
+
+
+def index_task_intervals(db, user_id: int, intervals):
+    """
+    Reescribe las filas de tareas reagendadas con un UPDATE masivo, dadas como
+    (task_id, planned_start, planned_end). No hace commit.
+    """
+    table = models.TimelineDayIndex
+    intervals = list(intervals)
+    db.execute(
+        delete(table).where(
+            table.item_type == "task",
+            table.item_id.in_([task_id for task_id, _, _ in intervals]),
+        )
+    )
+    rows = [
+        {"user_id": user_id, "day": day, "item_type": "task", "item_id": task_id}
+        for task_id, start, end in intervals
+        for day in spanned_days(start, task_end(start, end))
+    ]
+    if rows:
+        db.execute(insert(table), rows)
+    return len(rows)